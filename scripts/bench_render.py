@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+渲染性能基准测试
+在固定的小 / 中 / 长三档笔记语料上运行渲染器，记录各阶段耗时、峰值内存与出图速度，
+并可与保存的基线 JSON 对比，超过阈值即判定为性能回退
+
+覆盖范围:
+    - render_xhs.py:    全部 AVAILABLE_THEMES × PAGING_MODES
+    - render_xhs_v2.py: 全部 STYLES
+
+使用方法:
+    python bench_render.py [--output result.json] [--baseline baseline.json]
+                           [--save-baseline baseline.json] [--threshold 0.2]
+                           [--themes default retro] [--modes separator dynamic]
+                           [--styles purple] [--sizes small medium] [--repeat 1]
+
+退出码:
+    0 - 正常（或未发现回退）
+    1 - 与基线相比存在超过阈值的性能回退
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import render_xhs
+import render_xhs_v2
+from tracing import STAGES, StageRecorder, recording
+
+# 默认回退阈值：比基线慢 20% 以上视为回退
+DEFAULT_THRESHOLD = 0.2
+
+# 耗时过短的阶段波动较大，低于该值（毫秒）的阶段不参与回退判断
+DEFAULT_MIN_STAGE_MS = 50.0
+
+SIZES = ('small', 'medium', 'long')
+
+
+# ============ 固定语料 ============
+
+def _section(index: int) -> str:
+    """生成一个包含标题、段落、列表、引用与代码的内容块"""
+    return f"""## 第 {index} 部分：效率提升的关键
+
+很多人觉得时间不够用，其实是没有找到正确的方法。这一部分分享第 {index} 个实用技巧，
+帮助你在日常工作和学习中节省时间、减少内耗，把精力留给真正重要的事情。
+
+- 先列出今天最重要的三件事
+- 把大任务拆成 25 分钟可完成的小步骤
+- 每完成一步就**及时记录**，获得正反馈
+
+> 坚持 21 天，你会发现习惯的力量远比想象中强大。
+
+```python
+tasks = ["阅读", "运动", "复盘"]
+for task in tasks:
+    print(f"今天完成: {{task}}")
+```
+"""
+
+
+def build_corpus() -> Dict[str, str]:
+    """构造确定性的基准语料：small / medium / long"""
+    header = """---
+emoji: "🚀"
+title: "高效工作的 {count} 个方法"
+subtitle: "基准测试语料"
+---
+
+"""
+    counts = {'small': 1, 'medium': 4, 'long': 12}
+    corpus = {}
+    for size, count in counts.items():
+        body = "\n---\n\n".join(_section(i) for i in range(1, count + 1))
+        corpus[size] = header.format(count=count) + body
+    return corpus
+
+
+def write_corpus(directory: str, sizes: List[str]) -> Dict[str, str]:
+    """将语料写入目录，返回 {size: 文件路径}"""
+    corpus = build_corpus()
+    paths = {}
+    for size in sizes:
+        path = os.path.join(directory, f'{size}.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(corpus[size])
+        paths[size] = path
+    return paths
+
+
+# ============ 测量 ============
+
+def peak_rss_mb() -> Dict[str, float]:
+    """
+    返回当前进程与已回收子进程的峰值常驻内存（MB）
+    ru_maxrss 是进程生命周期内的最大值，只有在独立进程中运行单个用例时才反映该用例本身
+    """
+    # Linux 下 ru_maxrss 单位为 KB，macOS 下为字节
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1),
+    }
+
+
+def case_key(renderer: str, variant: str, mode: str, size: str) -> str:
+    return f"{renderer}/{variant}/{mode}/{size}"
+
+
+def iter_cases(args) -> Iterator[Dict[str, str]]:
+    """按命令行过滤条件枚举基准用例"""
+    for size in args.sizes:
+        if not args.skip_v1:
+            for theme in args.themes:
+                for mode in args.modes:
+                    yield {"renderer": "render_xhs", "variant": theme, "mode": mode, "size": size}
+        if not args.skip_v2:
+            for style in args.styles:
+                yield {"renderer": "render_xhs_v2", "variant": style, "mode": "smart-split", "size": size}
+
+
+async def _render_case(case: Dict[str, str], md_file: str, output_dir: str) -> None:
+    if case["renderer"] == "render_xhs":
+        await render_xhs.render_markdown_to_cards(
+            md_file, output_dir, theme=case["variant"], mode=case["mode"]
+        )
+    else:
+        await render_xhs_v2.render_markdown_to_cards(md_file, output_dir, case["variant"])
+
+
+def run_case(case: Dict[str, str], md_file: str, repeat: int = 1) -> Dict:
+    """运行单个用例（重复 repeat 次取最快一次），返回测量结果"""
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix='xhs_bench_') as output_dir:
+            recorder = StageRecorder()
+            start = time.perf_counter()
+            # 渲染器自身的进度输出对基准无意义，这里统一屏蔽
+            with recording(recorder), contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(_render_case(case, md_file, output_dir))
+            wall = time.perf_counter() - start
+            images = len([name for name in os.listdir(output_dir) if name.endswith('.png')])
+
+        if best is None or wall < best["wall_ms"] / 1000:
+            best = {
+                **case,
+                "wall_ms": round(wall * 1000, 3),
+                "images": images,
+                "images_per_sec": round(images / wall, 3) if wall > 0 else 0.0,
+                "stages": recorder.summary(),
+            }
+
+    best["peak_rss_mb"] = peak_rss_mb()
+    return best
+
+
+def run_case_isolated(case: Dict[str, str], md_file: str, repeat: int = 1) -> Dict:
+    """
+    在独立子进程中运行单个用例，峰值内存只包含该用例的渲染进程（self）与浏览器（children），
+    不受之前运行过的用例影响，也不随用例过滤条件变化
+    """
+    proc = subprocess.run(
+        [sys.executable, __file__, '--run-case', json.dumps(case), md_file, '--repeat', str(repeat)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"用例 {case_key(**case)} 运行失败:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ============ 基线对比 ============
+
+def compare_with_baseline(results: List[Dict], baseline: Dict,
+                          threshold: float = DEFAULT_THRESHOLD,
+                          min_stage_ms: float = DEFAULT_MIN_STAGE_MS) -> List[str]:
+    """与基线对比，返回回退描述列表"""
+    baseline_cases = {
+        case_key(c["renderer"], c["variant"], c["mode"], c["size"]): c
+        for c in baseline.get("cases", [])
+    }
+    regressions = []
+
+    for result in results:
+        key = case_key(result["renderer"], result["variant"], result["mode"], result["size"])
+        base = baseline_cases.get(key)
+        if base is None:
+            continue
+
+        metrics = [("wall", base["wall_ms"], result["wall_ms"])]
+        for name, stats in result["stages"].items():
+            base_stats = base.get("stages", {}).get(name)
+            if base_stats:
+                metrics.append((name, base_stats["total_ms"], stats["total_ms"]))
+
+        for name, old, new in metrics:
+            if max(old, new) < min_stage_ms or old <= 0:
+                continue
+            ratio = new / old - 1
+            if ratio > threshold:
+                regressions.append(f"{key} [{name}] {old:.1f}ms → {new:.1f}ms (+{ratio:.0%})")
+
+    return regressions
+
+
+def format_result_line(result: Dict) -> str:
+    key = case_key(result["renderer"], result["variant"], result["mode"], result["size"])
+    stages = " ".join(
+        f"{name}={result['stages'][name]['total_ms']:.0f}"
+        for name in STAGES if name in result["stages"]
+    )
+    return (f"  {key:<48} {result['wall_ms']:>9.0f}ms "
+            f"{result['images']:>3} 张 {result['images_per_sec']:>6.2f} 张/秒  {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='小红书卡片渲染性能基准测试',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f'''
+阶段说明:
+  {", ".join(STAGES)}
+  其中 screenshot 包含浏览器端 PNG 编码，write 为写出文件
+
+示例:
+  python bench_render.py --sizes small --modes separator --save-baseline baseline.json
+  python bench_render.py --sizes small --modes separator --baseline baseline.json
+'''
+    )
+    parser.add_argument('--output', '-o', help='结果 JSON 输出路径')
+    parser.add_argument('--baseline', help='对比的基线 JSON 文件')
+    parser.add_argument('--save-baseline', help='将本次结果保存为基线 JSON')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'回退阈值（比例，默认: {DEFAULT_THRESHOLD}）')
+    parser.add_argument('--min-stage-ms', type=float, default=DEFAULT_MIN_STAGE_MS,
+                        help=f'参与回退判断的最小耗时（毫秒，默认: {DEFAULT_MIN_STAGE_MS}）')
+    parser.add_argument('--themes', nargs='+', choices=render_xhs.AVAILABLE_THEMES,
+                        default=render_xhs.AVAILABLE_THEMES, help='render_xhs 主题（默认全部）')
+    parser.add_argument('--modes', nargs='+', choices=render_xhs.PAGING_MODES,
+                        default=render_xhs.PAGING_MODES, help='render_xhs 分页模式（默认全部）')
+    parser.add_argument('--styles', nargs='+', choices=list(render_xhs_v2.STYLES.keys()),
+                        default=list(render_xhs_v2.STYLES.keys()), help='render_xhs_v2 样式（默认全部）')
+    parser.add_argument('--sizes', nargs='+', choices=SIZES, default=list(SIZES),
+                        help='语料规模（默认全部）')
+    parser.add_argument('--repeat', type=int, default=1, help='每个用例重复次数，取最快一次（默认: 1）')
+    parser.add_argument('--skip-v1', action='store_true', help='跳过 render_xhs')
+    parser.add_argument('--skip-v2', action='store_true', help='跳过 render_xhs_v2')
+    # 内部使用：在子进程中运行单个用例并输出结果 JSON（见 run_case_isolated）
+    parser.add_argument('--run-case', nargs=2, metavar=('CASE', 'MD_FILE'), help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run_case:
+        case, md_file = args.run_case
+        print(json.dumps(run_case(json.loads(case), md_file, max(1, args.repeat)), ensure_ascii=False))
+        return
+
+    baseline: Optional[Dict] = None
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"❌ 错误: 基线文件不存在 - {args.baseline}")
+            sys.exit(1)
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    cases = list(iter_cases(args))
+    print(f"🏁 共 {len(cases)} 个基准用例")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='xhs_bench_corpus_') as corpus_dir:
+        corpus = write_corpus(corpus_dir, args.sizes)
+        for case in cases:
+            try:
+                result = run_case_isolated(case, corpus[case["size"]], max(1, args.repeat))
+            except RuntimeError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            results.append(result)
+            print(format_result_line(result))
+
+    report = {
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "cases": results,
+    }
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {path}")
+
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline, args.threshold, args.min_stage_ms)
+        if regressions:
+            print(f"\n❌ 发现 {len(regressions)} 处性能回退（阈值 {args.threshold:.0%}）:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\n✅ 未发现超过 {args.threshold:.0%} 的性能回退")
+
+
+if __name__ == '__main__':
+    main()
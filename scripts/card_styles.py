@@ -0,0 +1,810 @@
+#!/usr/bin/env python3
+"""
+小红书卡片样式提供者
+render_core 通过 StyleProvider 接口获取封面与正文卡片 HTML，
+新增样式只需实现 cover_html / card_html 并调用 register_style_provider 注册
+
+内置两类样式:
+    - ThemeStyle:  assets/themes/*.css 主题（render_xhs.py 使用，支持全部分页模式和自定义尺寸）
+    - PresetStyle: STYLES 预设配色（render_xhs_v2.py / v4 使用，固定 1080x1440）
+
+模板预编译:
+    每种（主题, 尺寸, 布局模式）的卡片 HTML 只生成一次，按 {{CONTENT}} / {{PAGE_NUMBER}} 等占位符
+    （与 assets/*.html 相同写法）切成静态片段缓存，之后每张卡片只转换正文并拼接片段。
+    样式提供者默认 shared_css=True：样式登记到虚拟源站（render_core.publish_stylesheet），
+    各卡片页面引用同一个 URL，浏览器跨页面复用缓存与解析结果；独立调用 theme_card_html 等函数时仍内联样式
+
+使用方法:
+    from card_styles import get_style_provider
+
+    style = get_style_provider('retro', width=1080, height=1440)
+    html = style.card_html(markdown_text, 1, 3, 'separator')
+"""
+
+import re
+from functools import lru_cache, partial
+from typing import Callable, Dict
+
+from render_core import (
+    ASSETS_DIR, CARD_PADDING, DEFAULT_HEIGHT, DEFAULT_WIDTH, convert_markdown_to_html,
+    publish_stylesheet,
+)
+from tracing import traced
+
+
+THEMES_DIR = ASSETS_DIR / "themes"
+
+# fragment 模式附加样式：--- 处强制换栏；后续卡片的内框由脚本复制到对应位置
+FRAGMENT_CSS = '''
+        .fragment-break {
+            break-after: column;
+        }
+
+        .card-inner.fragment-ghost {
+            position: absolute;
+            z-index: 0;
+        }
+'''
+
+# 可用主题列表
+AVAILABLE_THEMES = [
+    'default',
+    'playful-geometric',
+    'neo-brutalism',
+    'botanical',
+    'professional',
+    'retro',
+    'terminal',
+    'sketch'
+]
+
+
+# 主题背景色（正文卡片 / 封面）与封面标题文字渐变
+THEME_CARD_BACKGROUNDS = {
+    'default': 'linear-gradient(180deg, #f3f3f3 0%, #f9f9f9 100%)',
+    'playful-geometric': 'linear-gradient(135deg, #8B5CF6 0%, #F472B6 100%)',
+    'neo-brutalism': 'linear-gradient(135deg, #FF4757 0%, #FECA57 100%)',
+    'botanical': 'linear-gradient(135deg, #4A7C59 0%, #8FBC8F 100%)',
+    'professional': 'linear-gradient(135deg, #2563EB 0%, #3B82F6 100%)',
+    'retro': 'linear-gradient(135deg, #D35400 0%, #F39C12 100%)',
+    'terminal': 'linear-gradient(135deg, #0D1117 0%, #161B22 100%)',
+    'sketch': 'linear-gradient(135deg, #555555 0%, #888888 100%)'
+}
+
+THEME_COVER_BACKGROUNDS = {
+    'default': 'linear-gradient(180deg, #f3f3f3 0%, #f9f9f9 100%)',
+    'playful-geometric': 'linear-gradient(180deg, #8B5CF6 0%, #F472B6 100%)',
+    'neo-brutalism': 'linear-gradient(180deg, #FF4757 0%, #FECA57 100%)',
+    'botanical': 'linear-gradient(180deg, #4A7C59 0%, #8FBC8F 100%)',
+    'professional': 'linear-gradient(180deg, #2563EB 0%, #3B82F6 100%)',
+    'retro': 'linear-gradient(180deg, #D35400 0%, #F39C12 100%)',
+    'terminal': 'linear-gradient(180deg, #0D1117 0%, #21262D 100%)',
+    'sketch': 'linear-gradient(180deg, #555555 0%, #999999 100%)'
+}
+
+THEME_TITLE_GRADIENTS = {
+    'default': 'linear-gradient(180deg, #111827 0%, #4B5563 100%)',
+    'playful-geometric': 'linear-gradient(180deg, #7C3AED 0%, #F472B6 100%)',
+    'neo-brutalism': 'linear-gradient(180deg, #000000 0%, #FF4757 100%)',
+    'botanical': 'linear-gradient(180deg, #1F2937 0%, #4A7C59 100%)',
+    'professional': 'linear-gradient(180deg, #1E3A8A 0%, #2563EB 100%)',
+    'retro': 'linear-gradient(180deg, #8B4513 0%, #D35400 100%)',
+    'terminal': 'linear-gradient(180deg, #39D353 0%, #58A6FF 100%)',
+    'sketch': 'linear-gradient(180deg, #111827 0%, #6B7280 100%)',
+}
+
+# 代码高亮配色（Pygments 样式）：与各主题 pre 背景的明暗对应，预设配色的代码块均为深色背景
+THEME_CODE_STYLES = {
+    'sketch': 'default',
+}
+DARK_CODE_STYLE = 'monokai'
+
+
+@lru_cache(maxsize=None)
+def code_highlight_css(pygments_style: str) -> str:
+    """代码块词法单元的配色 CSS（每种 Pygments 样式只生成一次；未安装 Pygments 时为空）"""
+    try:
+        from pygments.formatters import HtmlFormatter
+    except ImportError:
+        return ''
+    return '\n'.join(HtmlFormatter(style=pygments_style).get_token_style_defs('.card-content .codehilite'))
+
+
+# ============ 预编译模板 ============
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([A-Z_]+)\}\}')
+STYLE_BLOCK_PATTERN = re.compile(r'<style>(.*?)</style>', re.S)
+
+
+class HtmlTemplate:
+    """
+    按 {{NAME}} 占位符切成静态片段的 HTML 模板，render 时只拼接片段与取值
+    shared_css 为 True 时把 <style> 内容发布为外部样式表（见 render_core.publish_stylesheet）并改为 <link> 引用
+    """
+
+    def __init__(self, text: str, shared_css: bool = False):
+        self.stylesheet = None
+        if shared_css:
+            match = STYLE_BLOCK_PATTERN.search(text)
+            if match:
+                self.stylesheet = match.group(1)
+                link = f'<link rel="stylesheet" href="{publish_stylesheet(self.stylesheet)}">'
+                text = text[:match.start()] + link + text[match.end():]
+        parts = PLACEHOLDER_PATTERN.split(text)
+        self.segments = parts[0::2]
+        self.names = parts[1::2]
+
+    def render(self, **values: str) -> str:
+        if self.stylesheet is not None:
+            # 虚拟源站的资源表有容量上限，模板缓存期间样式表可能已被淘汰，每次生成时重新登记
+            publish_stylesheet(self.stylesheet)
+        pieces = [self.segments[0]]
+        for name, segment in zip(self.names, self.segments[1:]):
+            pieces.append(values.get(name, ''))
+            pieces.append(segment)
+        return ''.join(pieces)
+
+
+def _limit_cover_text(metadata: dict):
+    """封面的 emoji、标题与副标题（标题和副标题限制长度）"""
+    return (metadata.get('emoji', '📝'), metadata.get('title', '标题')[:15],
+            metadata.get('subtitle', '')[:15])
+
+
+# ============ CSS 主题模板（render_xhs.py） ============
+
+@lru_cache(maxsize=None)
+def load_theme_css(theme: str) -> str:
+    """加载主题 CSS 样式"""
+    theme_file = THEMES_DIR / f"{theme}.css"
+    if theme_file.exists():
+        with open(theme_file, 'r', encoding='utf-8') as f:
+            return f.read()
+    else:
+        # 如果主题不存在，使用默认主题
+        default_file = THEMES_DIR / "default.css"
+        if default_file.exists():
+            with open(default_file, 'r', encoding='utf-8') as f:
+                return f.read()
+        return ""
+
+
+@traced('generate_cover_html')
+def theme_cover_html(metadata: dict, theme: str, width: int, height: int) -> str:
+    """生成封面 HTML"""
+    emoji, title, subtitle = _limit_cover_text(metadata)
+    return _theme_cover_template(theme, width, height).render(EMOJI=emoji, TITLE=title, SUBTITLE=subtitle)
+
+
+@lru_cache(maxsize=32)
+def _theme_cover_template(theme: str, width: int, height: int) -> HtmlTemplate:
+    """主题封面模板（每种主题与尺寸只生成一次）"""
+    emoji, title, subtitle = '{{EMOJI}}', '{{TITLE}}', '{{SUBTITLE}}'
+    bg = THEME_COVER_BACKGROUNDS.get(theme, THEME_COVER_BACKGROUNDS['default'])
+    # 封面标题文字渐变随主题变化
+    title_bg = THEME_TITLE_GRADIENTS.get(theme, THEME_TITLE_GRADIENTS['default'])
+
+    html = f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width={width}, height={height}">
+    <title>小红书封面</title>
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@300;400;500;700;900&display=swap');
+        
+        * {{
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }}
+        
+        body {{
+            font-family: 'Noto Sans SC', 'Source Han Sans CN', 'PingFang SC', 'Microsoft YaHei', sans-serif;
+            width: {width}px;
+            height: {height}px;
+            overflow: hidden;
+        }}
+        
+        .cover-container {{
+            width: {width}px;
+            height: {height}px;
+            background: {bg};
+            position: relative;
+            overflow: hidden;
+        }}
+        
+        .cover-inner {{
+            position: absolute;
+            width: {int(width * 0.88)}px;
+            height: {int(height * 0.91)}px;
+            left: {int(width * 0.06)}px;
+            top: {int(height * 0.045)}px;
+            background: #F3F3F3;
+            border-radius: 25px;
+            display: flex;
+            flex-direction: column;
+            padding: {int(width * 0.074)}px {int(width * 0.079)}px;
+        }}
+        
+        .cover-emoji {{
+            font-size: {int(width * 0.167)}px;
+            line-height: 1.2;
+            margin-bottom: {int(height * 0.035)}px;
+        }}
+        
+        .cover-title {{
+            font-weight: 900;
+            font-size: {int(width * 0.12)}px;
+            line-height: 1.4;
+            background: {title_bg};
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            background-clip: text;
+            flex: 1;
+            display: flex;
+            align-items: flex-start;
+            word-break: break-all;
+        }}
+        
+        .cover-subtitle {{
+            font-weight: 350;
+            font-size: {int(width * 0.067)}px;
+            line-height: 1.4;
+            color: #000000;
+            margin-top: auto;
+        }}
+    </style>
+</head>
+<body>
+    <div class="cover-container">
+        <div class="cover-inner">
+            <div class="cover-emoji">{emoji}</div>
+            <div class="cover-title">{title}</div>
+            <div class="cover-subtitle">{subtitle}</div>
+        </div>
+    </div>
+</body>
+</html>'''
+    return HtmlTemplate(html)
+
+
+@traced('generate_card_html')
+def theme_card_html(content: str, theme: str, page_number: int = 1, 
+                       total_pages: int = 1, width: int = DEFAULT_WIDTH, 
+                       height: int = DEFAULT_HEIGHT, mode: str = 'separator',
+                       shared_css: bool = False) -> str:
+    """生成正文卡片 HTML（模板按主题、尺寸与模式缓存，只转换正文）"""
+    html_content = convert_markdown_to_html(content)
+    page_text = f"{page_number}/{total_pages}" if total_pages > 1 else ""
+    template = _theme_card_template(theme, width, height, mode, shared_css)
+    return template.render(CONTENT=html_content, PAGE_NUMBER=page_text)
+
+
+@lru_cache(maxsize=64)
+def _theme_card_template(theme: str, width: int, height: int, mode: str,
+                         shared_css: bool = False) -> HtmlTemplate:
+    """主题正文卡片模板（每种主题、尺寸与布局模式只生成一次）"""
+    html_content, page_text = '{{CONTENT}}', '{{PAGE_NUMBER}}'
+    theme_css = load_theme_css(theme)
+    bg = THEME_CARD_BACKGROUNDS.get(theme, THEME_CARD_BACKGROUNDS['default'])
+    code_css = code_highlight_css(THEME_CODE_STYLES.get(theme, DARK_CODE_STYLE))
+    
+    # 根据模式设置不同的容器样式
+    if mode == 'auto-fit':
+        container_style = f'''
+            width: {width}px;
+            height: {height}px;
+            background: {bg};
+            position: relative;
+            padding: 50px;
+            overflow: hidden;
+        '''
+        inner_style = f'''
+            background: rgba(255, 255, 255, 0.95);
+            border-radius: 20px;
+            padding: 60px;
+            height: calc({height}px - 100px);
+            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+            backdrop-filter: blur(10px);
+            overflow: hidden;
+            display: flex;
+            flex-direction: column;
+        '''
+        content_style = '''
+            flex: 1;
+            overflow: hidden;
+        '''
+    elif mode == 'fragment':
+        # 整篇正文排成一行多栏：每栏宽 width - CARD_PADDING、栏间距 CARD_PADDING，
+        # 第 k 栏恰好落在第 k 张卡片的内容区，由浏览器分栏决定断点
+        container_style = f'''
+            width: {width}px;
+            height: {height}px;
+            background: {bg};
+            background-size: {width}px {height}px;
+            background-repeat: repeat-x;
+            position: relative;
+            padding: 50px;
+        '''
+        inner_style = f'''
+            background: rgba(255, 255, 255, 0.95);
+            border-radius: 20px;
+            padding: 60px;
+            height: calc({height}px - 100px);
+            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+            backdrop-filter: blur(10px);
+            position: relative;
+            z-index: 1;
+        '''
+        content_style = f'''
+            height: {height - CARD_PADDING}px;
+            column-width: {width - CARD_PADDING}px;
+            column-gap: {CARD_PADDING}px;
+            column-fill: auto;
+        '''
+        theme_css += FRAGMENT_CSS
+    elif mode == 'dynamic':
+        container_style = f'''
+            width: {width}px;
+            min-height: {height}px;
+            background: {bg};
+            position: relative;
+            padding: 50px;
+        '''
+        inner_style = '''
+            background: rgba(255, 255, 255, 0.95);
+            border-radius: 20px;
+            padding: 60px;
+            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+            backdrop-filter: blur(10px);
+        '''
+        content_style = ''
+    else:  # separator 和 auto-split
+        container_style = f'''
+            width: {width}px;
+            min-height: {height}px;
+            background: {bg};
+            position: relative;
+            padding: 50px;
+            overflow: hidden;
+        '''
+        inner_style = f'''
+            background: rgba(255, 255, 255, 0.95);
+            border-radius: 20px;
+            padding: 60px;
+            min-height: calc({height}px - 100px);
+            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+            backdrop-filter: blur(10px);
+        '''
+        content_style = ''
+    
+    html = f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width={width}">
+    <title>小红书卡片</title>
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@300;400;500;700;900&display=swap');
+        
+        * {{
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }}
+        
+        body {{
+            font-family: 'Noto Sans SC', 'Source Han Sans CN', 'PingFang SC', 'Microsoft YaHei', sans-serif;
+            width: {width}px;
+            overflow: hidden;
+            background: transparent;
+        }}
+        
+        .card-container {{
+            {container_style}
+        }}
+        
+        .card-inner {{
+            {inner_style}
+        }}
+        
+        .card-content {{
+            line-height: 1.7;
+            {content_style}
+        }}
+
+        /* auto-fit 用：由 AUTO_FIT_JS 设置 zoom，内容按缩放后的尺寸重新排版 */
+        .card-content-scale {{
+            zoom: 1;
+        }}
+        
+        {theme_css}
+        {code_css}
+        
+        .page-number {{
+            position: absolute;
+            bottom: 80px;
+            right: 80px;
+            font-size: 36px;
+            color: rgba(255, 255, 255, 0.8);
+            font-weight: 500;
+        }}
+    </style>
+</head>
+<body>
+    <div class="card-container">
+        <div class="card-inner">
+            <div class="card-content">
+                <div class="card-content-scale">{html_content}</div>
+            </div>
+        </div>
+        <div class="page-number">{page_text}</div>
+    </div>
+</body>
+</html>'''
+    return HtmlTemplate(html, shared_css)
+
+
+# ============ 预设配色模板（render_xhs_v2.py / v4） ============
+
+# 样式配置
+STYLES = {
+    "purple": {
+        "name": "紫韵",
+        "cover_bg": "linear-gradient(180deg, #3450E4 0%, #D266DA 100%)",
+        "card_bg": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)",
+        "accent_color": "#6366f1",
+    },
+    "xiaohongshu": {
+        "name": "小红书红",
+        "cover_bg": "linear-gradient(180deg, #FF2442 0%, #FF6B81 100%)",
+        "card_bg": "linear-gradient(135deg, #FF2442 0%, #FF6B81 100%)",
+        "accent_color": "#FF2442",
+    },
+    "mint": {
+        "name": "清新薄荷",
+        "cover_bg": "linear-gradient(180deg, #43e97b 0%, #38f9d7 100%)",
+        "card_bg": "linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)",
+        "accent_color": "#43e97b",
+    },
+    "sunset": {
+        "name": "日落橙",
+        "cover_bg": "linear-gradient(180deg, #fa709a 0%, #fee140 100%)",
+        "card_bg": "linear-gradient(135deg, #fa709a 0%, #fee140 100%)",
+        "accent_color": "#fa709a",
+    },
+    "ocean": {
+        "name": "深海蓝",
+        "cover_bg": "linear-gradient(180deg, #4facfe 0%, #00f2fe 100%)",
+        "card_bg": "linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)",
+        "accent_color": "#4facfe",
+    },
+    "elegant": {
+        "name": "优雅白",
+        "cover_bg": "linear-gradient(180deg, #f5f5f5 0%, #e0e0e0 100%)",
+        "card_bg": "linear-gradient(135deg, #f5f5f5 0%, #e8e8e8 100%)",
+        "accent_color": "#333333",
+        "text_light": "#555555",
+    },
+    "dark": {
+        "name": "暗黑模式",
+        "cover_bg": "linear-gradient(180deg, #1a1a2e 0%, #16213e 100%)",
+        "card_bg": "linear-gradient(135deg, #1a1a2e 0%, #16213e 100%)",
+        "accent_color": "#e94560",
+    },
+}
+
+
+@traced('generate_cover_html')
+def preset_cover_html(metadata: dict, style_key: str = "purple") -> str:
+    """生成封面 HTML"""
+    emoji, title, subtitle = _limit_cover_text(metadata)
+    return _preset_cover_template(style_key).render(EMOJI=emoji, TITLE=title, SUBTITLE=subtitle)
+
+
+@lru_cache(maxsize=None)
+def _preset_cover_template(style_key: str) -> HtmlTemplate:
+    """预设配色封面模板（每种配色只生成一次）"""
+    style = STYLES.get(style_key, STYLES["purple"])
+    emoji, title, subtitle = '{{EMOJI}}', '{{TITLE}}', '{{SUBTITLE}}'
+
+    # 暗黑模式特殊处理
+    is_dark = style_key == "dark"
+    text_color = "#ffffff" if is_dark else "#000000"
+    title_gradient = "linear-gradient(180deg, #ffffff 0%, #cccccc 100%)" if is_dark else "linear-gradient(180deg, #2E67B1 0%, #4C4C4C 100%)"
+    inner_bg = "#1a1a2e" if is_dark else "#F3F3F3"
+    
+    return HtmlTemplate(f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=1080, height=1440">
+    <title>小红书封面</title>
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@300;400;500;700;900&display=swap');
+        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+        body {{
+            font-family: 'Noto Sans SC', 'Source Han Sans CN', 'PingFang SC', 'Microsoft YaHei', sans-serif;
+            width: 1080px; height: 1440px; overflow: hidden;
+        }}
+        .cover-container {{
+            width: 1080px; height: 1440px;
+            background: {style['cover_bg']};
+            position: relative; overflow: hidden;
+        }}
+        .cover-inner {{
+            position: absolute; width: 950px; height: 1310px;
+            left: 65px; top: 65px;
+            background: {inner_bg};
+            border-radius: 25px;
+            display: flex; flex-direction: column;
+            padding: 80px 85px;
+        }}
+        .cover-emoji {{ font-size: 180px; line-height: 1.2; margin-bottom: 50px; }}
+        .cover-title {{
+            font-weight: 900; font-size: 130px; line-height: 1.4;
+            background: {title_gradient};
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            background-clip: text;
+            flex: 1;
+            display: flex; align-items: flex-start;
+            word-break: break-all;
+        }}
+        .cover-subtitle {{
+            font-weight: 350; font-size: 72px; line-height: 1.4;
+            color: {text_color};
+            margin-top: auto;
+        }}
+    </style>
+</head>
+<body>
+    <div class="cover-container">
+        <div class="cover-inner">
+            <div class="cover-emoji">{emoji}</div>
+            <div class="cover-title">{title}</div>
+            <div class="cover-subtitle">{subtitle}</div>
+        </div>
+    </div>
+</body>
+</html>''')
+
+
+@traced('generate_card_html')
+def preset_card_html(content: str, page_number: int = 1, total_pages: int = 1, 
+                       style_key: str = "purple", shared_css: bool = False) -> str:
+    """生成正文卡片 HTML（模板按配色缓存，只转换正文）"""
+    style = STYLES.get(style_key, STYLES["purple"])
+    html_content = convert_markdown_to_html(content, style.get('accent_color', '#6366f1'))
+    page_text = f"{page_number}/{total_pages}" if total_pages > 1 else ""
+    template = _preset_card_template(style_key, shared_css)
+    return template.render(CONTENT=html_content, PAGE_NUMBER=page_text)
+
+
+@lru_cache(maxsize=None)
+def _preset_card_template(style_key: str, shared_css: bool = False) -> HtmlTemplate:
+    """预设配色正文卡片模板（每种配色只生成一次）"""
+    style = STYLES.get(style_key, STYLES["purple"])
+    html_content, page_text = '{{CONTENT}}', '{{PAGE_NUMBER}}'
+
+    # 暗黑模式特殊处理
+    is_dark = style_key == "dark"
+    card_bg = "rgba(30, 30, 46, 0.95)" if is_dark else "rgba(255, 255, 255, 0.95)"
+    text_color = "#e0e0e0" if is_dark else "#475569"
+    heading_color = "#ffffff" if is_dark else "#1e293b"
+    h2_color = "#e0e0e0" if is_dark else "#334155"
+    h3_color = "#c0c0c0" if is_dark else "#475569"
+    code_bg = "#0f0f23" if is_dark else "#1e293b"
+    pre_bg = "#0f0f23" if is_dark else "#1e293b"
+    blockquote_bg = "#252540" if is_dark else "#f1f5f9"
+    blockquote_border = style['accent_color']
+    blockquote_color = "#a0a0a0" if is_dark else "#64748b"
+    
+    return HtmlTemplate(f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=1080">
+    <title>小红书卡片</title>
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@300;400;500;700;900&display=swap');
+        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+        body {{
+            font-family: 'Noto Sans SC', 'Source Han Sans CN', 'PingFang SC', 'Microsoft YaHei', sans-serif;
+            width: 1080px; min-height: 1440px; overflow: hidden; background: transparent;
+        }}
+        .card-container {{
+            width: 1080px; min-height: 1440px;
+            background: {style['card_bg']};
+            position: relative; padding: 50px; overflow: hidden;
+        }}
+        .card-inner {{
+            background: {card_bg};
+            border-radius: 20px;
+            padding: 60px;
+            min-height: calc(1440px - 100px);
+            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
+            backdrop-filter: blur(10px);
+        }}
+        .card-content {{
+            color: {text_color};
+            font-size: 42px;
+            line-height: 1.7;
+        }}
+        .card-content h1 {{
+            font-size: 72px; font-weight: 700; color: {heading_color};
+            margin-bottom: 40px; line-height: 1.3;
+        }}
+        .card-content h2 {{
+            font-size: 56px; font-weight: 600; color: {h2_color};
+            margin: 50px 0 25px 0; line-height: 1.4;
+        }}
+        .card-content h3 {{
+            font-size: 48px; font-weight: 600; color: {h3_color};
+            margin: 40px 0 20px 0;
+        }}
+        .card-content p {{ margin-bottom: 35px; }}
+        .card-content strong {{ font-weight: 700; color: {heading_color}; }}
+        .card-content em {{ font-style: italic; color: {style['accent_color']}; }}
+        .card-content a {{
+            color: {style['accent_color']}; text-decoration: none;
+            border-bottom: 2px solid {style['accent_color']};
+        }}
+        .card-content ul, .card-content ol {{
+            margin: 30px 0; padding-left: 60px;
+        }}
+        .card-content li {{ margin-bottom: 20px; line-height: 1.6; }}
+        .card-content blockquote {{
+            border-left: 8px solid {blockquote_border};
+            padding-left: 40px;
+            background: {blockquote_bg};
+            padding-top: 25px; padding-bottom: 25px; padding-right: 30px;
+            margin: 35px 0;
+            color: {blockquote_color};
+            font-style: italic;
+            border-radius: 0 12px 12px 0;
+        }}
+        .card-content blockquote p {{ margin: 0; }}
+        .card-content code {{
+            background: {'#252540' if is_dark else '#f1f5f9'};
+            padding: 6px 16px; border-radius: 8px;
+            font-family: 'SF Mono', 'Monaco', 'Consolas', monospace;
+            font-size: 38px;
+            color: {style['accent_color']};
+        }}
+        .card-content pre {{
+            background: {pre_bg};
+            color: {'#e0e0e0' if is_dark else '#e2e8f0'};
+            padding: 40px; border-radius: 16px;
+            margin: 35px 0;
+            overflow-x: visible;
+            overflow-wrap: break-word;
+            word-wrap: break-word;
+            word-break: break-all;
+            white-space: pre-wrap;
+            font-size: 36px; line-height: 1.5;
+        }}
+        .card-content pre code {{
+            background: transparent; color: inherit; padding: 0; font-size: inherit;
+        }}
+        .card-content img {{
+            max-width: 100%; height: auto; border-radius: 16px;
+            margin: 35px auto; display: block;
+            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.1);
+        }}
+        .card-content hr {{
+            border: none; height: 2px;
+            background: {'#333355' if is_dark else '#e2e8f0'};
+            margin: 50px 0;
+        }}
+        .tags-container {{
+            margin-top: 50px; padding-top: 30px;
+            border-top: 2px solid {'#333355' if is_dark else '#e2e8f0'};
+        }}
+        .tag {{
+            display: inline-block;
+            background: {style['accent_color']};
+            color: white;
+            padding: 12px 28px; border-radius: 30px;
+            font-size: 34px;
+            margin: 10px 15px 10px 0;
+            font-weight: 500;
+        }}
+        .page-number {{
+            position: absolute;
+            bottom: 80px; right: 80px;
+            font-size: 36px;
+            color: rgba(255, 255, 255, 0.8);
+            font-weight: 500;
+        }}
+        {code_highlight_css(DARK_CODE_STYLE)}
+    </style>
+</head>
+<body>
+    <div class="card-container">
+        <div class="card-inner">
+            <div class="card-content">
+                {html_content}
+            </div>
+        </div>
+        <div class="page-number">{page_text}</div>
+    </div>
+</body>
+</html>''', shared_css)
+
+
+# ============ 样式提供者 ============
+
+class StyleProvider:
+    """样式提供者接口：给出卡片尺寸并生成封面 / 正文卡片 HTML"""
+    name = ''
+    width = DEFAULT_WIDTH
+    height = DEFAULT_HEIGHT
+    # 模板尺寸与布局固定：忽略传入的尺寸与布局模式，只能用于 separator 分页
+    fixed_layout = False
+
+    def cover_html(self, metadata: dict) -> str:
+        raise NotImplementedError
+
+    def card_html(self, content: str, page_number: int = 1, total_pages: int = 1,
+                  mode: str = 'separator') -> str:
+        raise NotImplementedError
+
+
+class ThemeStyle(StyleProvider):
+    """assets/themes 下的 CSS 主题"""
+
+    def __init__(self, theme: str, width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT,
+                 shared_css: bool = True):
+        self.name = theme
+        self.width = width
+        self.height = height
+        self.shared_css = shared_css
+
+    def cover_html(self, metadata):
+        return theme_cover_html(metadata, self.name, self.width, self.height)
+
+    def card_html(self, content, page_number=1, total_pages=1, mode='separator'):
+        return theme_card_html(content, self.name, page_number, total_pages,
+                               self.width, self.height, mode, self.shared_css)
+
+
+class PresetStyle(StyleProvider):
+    """STYLES 预设配色（模板为固定 1080x1440 布局，只支持 separator 布局模式）"""
+    fixed_layout = True
+
+    def __init__(self, style_key: str, width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT,
+                 shared_css: bool = True):
+        # 预设模板尺寸固定，忽略传入的 width / height
+        self.name = style_key
+        self.shared_css = shared_css
+
+    def cover_html(self, metadata):
+        return preset_cover_html(metadata, self.name)
+
+    def card_html(self, content, page_number=1, total_pages=1, mode='separator'):
+        return preset_card_html(content, page_number, total_pages, self.name, self.shared_css)
+
+
+STYLE_PROVIDERS: Dict[str, Callable[..., StyleProvider]] = {}
+
+
+def register_style_provider(name: str, factory: Callable[..., StyleProvider]) -> None:
+    """注册样式，factory(width=..., height=..., **options) 返回 StyleProvider"""
+    STYLE_PROVIDERS[name] = factory
+
+
+def get_style_provider(name: str, width: int = DEFAULT_WIDTH,
+                       height: int = DEFAULT_HEIGHT, **options) -> StyleProvider:
+    """options 透传给样式构造函数（如 shared_css=False 内联样式）"""
+    if name not in STYLE_PROVIDERS:
+        raise ValueError(f"未知的样式: {name}（可选: {', '.join(STYLE_PROVIDERS)}）")
+    return STYLE_PROVIDERS[name](width=width, height=height, **options)
+
+
+for _theme in AVAILABLE_THEMES:
+    register_style_provider(_theme, partial(ThemeStyle, _theme))
+
+for _style_key in STYLES:
+    register_style_provider(_style_key, partial(PresetStyle, _style_key))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+渲染流程回归检查
+针对曾经出现过的问题逐项复现，确认修复仍然有效；不需要浏览器（Playwright 驱动可选）
+
+使用方法:
+    python check_regressions.py [--only pool_after_driver]
+
+退出码:
+    0 - 全部检查通过
+    1 - 存在未通过的检查
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+SHUTDOWN_TIMEOUT = 10.0
+
+
+def check_pool_after_driver() -> None:
+    """浏览器驱动启动后再创建进程池，关闭驱动不能被子进程继承的管道卡住"""
+    import asyncio
+
+    from render_pool import CpuPool
+
+    async def with_playwright() -> float:
+        from playwright.async_api import async_playwright
+
+        playwright = await async_playwright().start()
+        with CpuPool(2) as pool:
+            assert await pool.run(abs, -1) == 1
+            start = time.perf_counter()
+            await asyncio.wait_for(playwright.stop(), SHUTDOWN_TIMEOUT)
+            return time.perf_counter() - start
+
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        # 未安装 Playwright 时用读到 EOF 才退出的子进程模拟驱动
+        driver = subprocess.Popen([sys.executable, '-c', 'import sys; sys.stdin.read()'], stdin=subprocess.PIPE)
+        with CpuPool(2) as pool:
+            assert asyncio.run(pool.run(abs, -1)) == 1
+            driver.stdin.close()
+            try:
+                driver.wait(SHUTDOWN_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                driver.kill()
+                raise AssertionError("驱动未收到 EOF，进程池子进程继承了它的 stdin 管道")
+        return
+
+    try:
+        asyncio.run(with_playwright())
+    except asyncio.TimeoutError:
+        raise AssertionError(f"Playwright 驱动 {SHUTDOWN_TIMEOUT:.0f}s 内未退出，进程池子进程继承了它的 stdin 管道")
+
+
+def check_inline_snap() -> None:
+    """段落断点的禁则后退不能跨进行内标记（加粗 / 斜体 / 行内代码紧邻中文标点）"""
+    from markdown_blocks import _snap_inline
+
+    # （原文, 断点所在字符, 期望的前半段）
+    cases = [
+        ('前面的文字**加粗**，后面', '，', '前面的文字'),
+        ('这里有*斜体*，然后继续', '，', '这里有'),
+        ('调用`print()`。之后再说', '。', '调用'),
+        ('先看「`代码`」再说', '」', '先看'),
+    ]
+    for source, before, expected in cases:
+        head = source[:_snap_inline(source, 0, source.index(before))]
+        assert head == expected, f"{source!r} 断开为 {head!r}，应为 {expected!r}"
+
+
+def check_smart_split_separator() -> None:
+    """smart-split 按块分页时，分隔线处必须另起一张卡片"""
+    from render_core import smart_split_content
+
+    cards = smart_split_content('第一段内容\n\n---\n\n第二段内容')
+    assert cards == ['第一段内容', '第二段内容'], f"分隔线两侧被合并: {cards!r}"
+
+
+def check_framework_seed() -> None:
+    """相同种子下，某个框架的文案不随同时请求的其它框架变化"""
+    from copywriter import FRAMEWORK_NAMES, XiaohongshuCopywriter
+
+    copywriter = XiaohongshuCopywriter()
+    content = '# 周末在家做咖啡\n\n买了一台手冲壶，试了三种豆子，记录一下心得。'
+    together = copywriter.optimize_content(content, frameworks=FRAMEWORK_NAMES, seed=1)
+    for framework in FRAMEWORK_NAMES:
+        alone = copywriter.optimize_content(content, frameworks=[framework], seed=1)
+        assert alone["content_versions"][framework] == together["content_versions"][framework], \
+            f"{framework} 单独生成与全部生成的结果不同"
+        assert alone["titles"] == together["titles"], "标题随请求的框架变化"
+
+
+def check_template_pack_validation() -> None:
+    """模板包的结构与占位字段在加载时校验，错误信息指明文件与出错的键"""
+    import json
+    import tempfile
+
+    import copywriter
+    from copywriter import compile_template, load_template_pack
+
+    # 字段表须与各填充函数实际提供的占位符一致
+    writer = copywriter.XiaohongshuCopywriter()
+    analysis = writer.analyze_content('测试内容')
+    for fields, fill in ((copywriter.HOOK_FIELDS, writer._fill_hook_template),
+                         (copywriter.TITLE_FIELDS, writer._fill_title_template)):
+        assert fill(compile_template(''.join('{' + f + '}' for f in fields)), '', analysis), \
+            f"{fill.__name__} 无法填充字段表中的全部字段"
+    everything = ''.join('{' + f + '}' for f in copywriter.CONTENT_FIELDS)
+    assert writer._fill_content_template(compile_template(everything), '', analysis) != everything, \
+        "_fill_content_template 无法填充字段表中的全部字段"
+
+    cases = [
+        ({"title_patterns": [1, 2]}, "title_patterns"),
+        ({"hook_templates": {"shock": ["{content}{unknown}"]}}, "hook_templates.shock[0]"),
+        ({"emotion_words": {"positive": []}}, "emotion_words.positive"),
+        ({"content_frameworks": {"x": {"structure": ["a"], "templates": {"a": 1}}}},
+         "content_frameworks.x.templates.a"),
+        ({"title_pattern": {}}, "title_pattern"),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        good = Path(directory) / 'good.json'
+        good.write_text(json.dumps({"title_patterns": {"list": ["{number}个{category}"]}}), encoding='utf-8')
+        load_template_pack(str(good))
+        for i, (pack, key) in enumerate(cases):
+            path = Path(directory) / f'bad{i}.json'
+            path.write_text(json.dumps(pack), encoding='utf-8')
+            try:
+                load_template_pack(str(path))
+            except ValueError as e:
+                assert path.name in str(e) and key in str(e), f"错误信息未指明文件与键 {key}: {e}"
+            else:
+                raise AssertionError(f"不合法的模板包未被拒绝: {pack}")
+
+
+# 检查项（名称, 函数）：函数通过 AssertionError 报告失败
+CHECKS: List[Tuple[str, Callable[[], None]]] = [
+    ('pool_after_driver', check_pool_after_driver),
+    ('inline_snap', check_inline_snap),
+    ('smart_split_separator', check_smart_split_separator),
+    ('framework_seed', check_framework_seed),
+    ('template_pack_validation', check_template_pack_validation),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='渲染流程回归检查')
+    parser.add_argument('--only', nargs='+', help='只运行指定检查（默认全部）')
+    args = parser.parse_args()
+
+    checks = [c for c in CHECKS if not args.only or c[0] in args.only]
+    failures = 0
+
+    print("🔁 回归检查")
+    for name, check in checks:
+        try:
+            check()
+            print(f"  ✅ {name}")
+        except AssertionError as e:
+            print(f"  ❌ {name}: {e}")
+            failures += 1
+
+    if failures:
+        print(f"\n❌ {failures} 项检查未通过")
+        sys.exit(1)
+    print("\n✅ 全部检查通过")
+
+
+if __name__ == '__main__':
+    main()
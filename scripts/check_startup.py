@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+命令行启动耗时检查
+用 python -X importtime 运行各脚本的 --help，统计脚本自身触发的导入耗时，
+并确认 markdown / playwright / requests 等重量级依赖没有在启动阶段被加载
+
+使用方法:
+    python check_startup.py [--budget-ms 60] [--repeat 3] [--scripts render_xhs.py publish_xhs.py]
+
+退出码:
+    0 - 全部脚本在预算内且未提前加载重量级依赖
+    1 - 存在超出预算或提前加载依赖的脚本
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SCRIPT_DIR = Path(__file__).parent
+
+# 需要检查的命令行（脚本, 参数）
+COMMANDS: List[Tuple[str, List[str]]] = [
+    ('render_xhs.py', ['--help']),
+    ('render_xhs_v2.py', ['--help']),
+    ('render_xhs_v2.py', ['--list-styles']),
+    ('render_xhs_v4.py', ['--help']),
+    ('enhance_cards.py', ['--help']),
+    ('publish_xhs.py', ['--help']),
+    ('quality_checker.py', ['--help']),
+    ('optimize_copy.py', ['--help']),
+    ('render_queue.py', ['--help']),
+]
+
+# 启动阶段不允许加载的模块（只有真正解析、渲染、请求时才需要）
+FORBIDDEN_MODULES = (
+    'markdown', 'yaml', 'playwright', 'PIL', 'numpy', 'requests', 'dotenv',
+    'asyncio', 'multiprocessing', 'http.server',
+)
+
+# 解释器自身启动（site / encodings 等）与脚本无关，不计入预算
+INTERPRETER_MODULES = {'site', 'encodings', 'zipimport', '_frozen_importlib_external', 'codecs', 'io', 'abc'}
+
+DEFAULT_BUDGET_MS = 60.0
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[str]]:
+    """解析 -X importtime 输出，返回（脚本导入总耗时毫秒, 已导入模块列表）"""
+    total_us = 0
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        modules.append(name)
+        # 只累加顶层导入，嵌套导入已包含在其 cumulative 中
+        if not indent and name not in INTERPRETER_MODULES:
+            total_us += cumulative
+    return total_us / 1000, modules
+
+
+def measure(script: str, args: List[str], repeat: int) -> Dict:
+    """运行脚本 repeat 次，取最快一次的导入耗时"""
+    best_ms = None
+    modules: List[str] = []
+    returncode = 0
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', str(SCRIPT_DIR / script), *args],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        elapsed_ms, imported = parse_importtime(proc.stderr)
+        returncode = proc.returncode
+        if best_ms is None or elapsed_ms < best_ms:
+            best_ms, modules = elapsed_ms, imported
+
+    forbidden = sorted({
+        name for name in modules
+        if any(name == mod or name.startswith(mod + '.') for mod in FORBIDDEN_MODULES)
+    })
+    return {"import_ms": best_ms or 0.0, "forbidden": forbidden, "returncode": returncode}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查命令行脚本启动耗时与导入的依赖')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'单个命令的导入耗时预算（毫秒，默认: {DEFAULT_BUDGET_MS}）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个命令运行次数，取最快一次（默认: 3）')
+    parser.add_argument('--scripts', nargs='+', help='只检查指定脚本（默认全部）')
+    args = parser.parse_args()
+
+    commands = [c for c in COMMANDS if not args.scripts or c[0] in args.scripts]
+    failures = 0
+
+    print(f"⏱️  启动耗时检查（预算 {args.budget_ms:.0f}ms）")
+    for script, script_args in commands:
+        result = measure(script, script_args, max(1, args.repeat))
+        label = f"{script} {' '.join(script_args)}"
+        problems = []
+        if result["returncode"] != 0:
+            problems.append(f"退出码 {result['returncode']}")
+        if result["import_ms"] > args.budget_ms:
+            problems.append("超出预算")
+        if result["forbidden"]:
+            problems.append(f"提前加载: {', '.join(result['forbidden'])}")
+
+        icon = "❌" if problems else "✅"
+        detail = f"  ({'; '.join(problems)})" if problems else ""
+        print(f"  {icon} {label:<36} {result['import_ms']:>7.1f}ms{detail}")
+        failures += bool(problems)
+
+    if failures:
+        print(f"\n❌ {failures} 个命令未通过启动检查")
+        sys.exit(1)
+    print("\n✅ 全部命令通过启动检查")
+
+
+if __name__ == '__main__':
+    main()
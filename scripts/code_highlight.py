@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+代码块高亮缓存
+codehilite 每次转换都会用 Pygments 重新词法分析全部代码块；分页探测会把同一段代码反复转换，
+技术类笔记的大部分转换时间都花在这里。这里在 fenced_code 之前接管普通围栏代码块，
+按（代码, 语言, 样式）缓存高亮结果，输出与 codehilite 完全相同
+
+高亮结果只包含 CSS 类名，配色 CSS 由卡片模板按主题生成（见 card_styles.code_highlight_css）
+
+使用方法:
+    from code_highlight import markdown_to_html
+
+    html = markdown_to_html(body)
+"""
+
+import threading
+from functools import lru_cache
+
+import markdown
+from markdown.extensions import Extension
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+
+MARKDOWN_EXTENSIONS = ['extra', 'codehilite', 'tables', 'nl2br']
+HIGHLIGHT_CACHE_SIZE = 2048
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=1)
+def _hilite_options() -> dict:
+    """codehilite 的默认配置（与 fenced_code 传给 CodeHilite 的参数相同）"""
+    options = CodeHiliteExtension().getConfigs()
+    options.pop('pygments_style', None)
+    return options
+
+
+@lru_cache(maxsize=HIGHLIGHT_CACHE_SIZE)
+def highlight_code(code: str, lang: str = '', style: str = 'default') -> str:
+    """高亮一个代码块，返回 codehilite 格式的 HTML（按代码、语言与样式缓存）"""
+    return CodeHilite(code, lang=lang or None, style=style, **_hilite_options()).hilite(shebang=False)
+
+
+class CachedFencedBlockPreprocessor(FencedBlockPreprocessor):
+    """
+    只处理 ```lang 形式的普通围栏（无 {attrs} / hl_lines），结果存入 htmlStash；
+    其余围栏留给随后运行的 fenced_code 原样处理
+    """
+
+    def run(self, lines):
+        def replace(match):
+            if match.group('attrs') or match.group('hl_lines'):
+                return match.group(0)
+            html = highlight_code(match.group('code'), match.group('lang') or '')
+            return f'\n{self.md.htmlStash.store(html)}\n'
+
+        return self.FENCED_BLOCK_RE.sub(replace, '\n'.join(lines)).split('\n')
+
+
+class CachedHighlightExtension(Extension):
+    def extendMarkdown(self, md):
+        # fenced_code 的优先级为 25，这里先于它运行
+        md.preprocessors.register(CachedFencedBlockPreprocessor(md, {}), 'cached_fenced_code', 26)
+
+
+def markdown_to_html(text: str) -> str:
+    """与 markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS) 输出相同；转换器按线程复用"""
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS + [CachedHighlightExtension()])
+        _local.converter = converter
+    return converter.reset().convert(text)
+
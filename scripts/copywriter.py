@@ -4,10 +4,17 @@
 基于用户输入内容，自动生成高质量的小红书文案
 """
 
+import json
 import re
 import random
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+import string
+from collections import deque
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 
 @dataclass
 class ContentAnalysis:
@@ -18,126 +25,332 @@ class ContentAnalysis:
     target_audience: str  # 目标受众
     content_type: str  # 内容类型
 
-class XiaohongshuCopywriter:
-    """小红书文案生成器"""
+# 内置模板表（模块加载时只构建一次）
+_DEFAULT_HOOK_TEMPLATES = {
+    "shock": [
+        "卧槽！{content}居然{result}？！",
+        "震惊！{content}竟然能{result}！",
+        "不敢相信！{content}的{result}太离谱了！",
+        "天哪！{content}的{result}刷新了我的认知！"
+    ],
+    "curiosity": [
+        "你知道{content}的{secret}吗？",
+        "为什么{content}能{result}？答案让人意外！",
+        "关于{content}，99%的人都不知道这个{secret}！",
+        "揭秘：{content}背后的{secret}！"
+    ],
+    "urgency": [
+        "趁着{content}还没{limitation}，赶紧{action}！",
+        "最后{time}！{content}的{opportunity}即将结束！",
+        "错过就没了！{content}的{benefit}限时{action}！",
+        "手慢无！{content}这个{opportunity}不等人！"
+    ],
+    "benefit": [
+        "用了{content}，我的{aspect}提升了{degree}！",
+        "{content}让我{achievement}，太爽了！",
+        "自从发现{content}，我再也不用{pain_point}了！",
+        "{content}解决了我{time}的{problem}！"
+    ]
+}
+
+_DEFAULT_TITLE_PATTERNS = {
+    "list": [
+        "{number}个{category}神器，{benefit}！",
+        "盘点{number}个{category}，个个都是{quality}！",
+        "{number}款{category}测评，第{rank}个太{emotion}了！",
+        "推荐{number}个{category}，{target_user}必备！"
+    ],
+    "how_to": [
+        "如何{action}？{method}方法超简单！",
+        "{action}的{number}个技巧，{benefit}！",
+        "教你{action}，{time}就能{result}！",
+        "{action}攻略：{method}让你{benefit}！"
+    ],
+    "comparison": [
+        "{item1} VS {item2}，差距竟然这么大？！",
+        "用了{time}的{item1}和{item2}，终于知道选哪个了！",
+        "{item1}还是{item2}？实测告诉你答案！",
+        "别再纠结{item1}和{item2}了，看完这篇就懂了！"
+    ],
+    "story": [
+        "从{before}到{after}，我只用了{method}！",
+        "分享一个{category}的{story}，太{emotion}了！",
+        "我的{journey}：{method}改变了我的{aspect}！",
+        "{time}前的我{before}，现在{after}！"
+    ]
+}
+
+_DEFAULT_CONTENT_FRAMEWORKS = {
+    "problem_solution": {
+        "structure": ["痛点描述", "解决方案", "使用体验", "效果展示", "推荐理由"],
+        "templates": {
+            "痛点描述": "你是不是也遇到过{pain_point}？真的太{emotion}了！",
+            "解决方案": "直到我发现了{solution}，这个问题终于解决了！",
+            "使用体验": "用了{time}，体验真的{quality}：{details}",
+            "效果展示": "效果立竿见影：{results}",
+            "推荐理由": "强烈推荐给{target_user}，因为{reasons}！"
+        }
+    },
+    "tutorial": {
+        "structure": ["引入话题", "准备工作", "详细步骤", "注意事项", "总结收获"],
+        "templates": {
+            "引入话题": "今天分享一个{category}的{method}，{benefit}！",
+            "准备工作": "开始前需要准备：{requirements}",
+            "详细步骤": "具体操作：{steps}",
+            "注意事项": "重要提醒：{warnings}",
+            "总结收获": "掌握这个方法，你就能{achievement}！"
+        }
+    },
+    "review": {
+        "structure": ["产品介绍", "使用场景", "优缺点分析", "对比评价", "购买建议"],
+        "templates": {
+            "产品介绍": "今天测评{product}，{brief_intro}",
+            "使用场景": "适合{scenarios}的{target_user}",
+            "优缺点分析": "优点：{pros} 缺点：{cons}",
+            "对比评价": "和{competitor}相比，{comparison}",
+            "购买建议": "推荐指数{rating}，{recommendation}"
+        }
+    },
+    "lifestyle": {
+        "structure": ["生活场景", "个人感受", "具体细节", "心得体会", "生活态度"],
+        "templates": {
+            "生活场景": "最近{time}，我{activity}，感觉{emotion}",
+            "个人感受": "这种{feeling}让我{realization}",
+            "具体细节": "特别是{details}，真的{quality}",
+            "心得体会": "通过这次{experience}，我明白了{insight}",
+            "生活态度": "生活就是要{attitude}，{encouragement}！"
+        }
+    }
+}
+
+_DEFAULT_EMOTION_WORDS = {
+    "positive": ["绝了", "太爽了", "爱了", "yyds", "神仙", "宝藏", "治愈", "惊艳", "完美"],
+    "negative": ["崩溃", "绝望", "心累", "无语", "抓狂", "头疼", "烦躁", "郁闷", "焦虑"],
+    "surprise": ["震惊", "意外", "没想到", "居然", "竟然", "原来", "发现", "惊喜", "神奇"],
+    "emphasis": ["真的", "超级", "特别", "非常", "极其", "相当", "十分", "格外", "异常"]
+}
+
+# 正文文案框架
+FRAMEWORK_NAMES = ("problem_solution", "tutorial", "review", "lifestyle")
+
+# 各类模板可用的占位字段（与 _fill_hook_template / _fill_title_template / _fill_content_template 的 placeholders 一致）
+HOOK_FIELDS = frozenset({
+    "content", "result", "secret", "limitation", "action", "time", "opportunity", "benefit",
+    "aspect", "degree", "achievement", "pain_point", "problem",
+})
+TITLE_FIELDS = frozenset({
+    "number", "category", "benefit", "quality", "emotion", "target_user", "action", "method", "time",
+    "result", "rank", "item1", "item2", "before", "after", "story", "aspect", "journey",
+})
+CONTENT_FIELDS = frozenset({
+    "pain_point", "emotion", "solution", "time", "quality", "details", "results", "target_user",
+    "reasons", "category", "method", "benefit", "requirements", "steps", "warnings", "achievement",
+    "product", "brief_intro", "scenarios", "pros", "cons", "competitor", "comparison", "rating",
+    "recommendation", "activity", "feeling", "realization", "experience", "insight", "attitude",
+    "encouragement",
+})
+
+# 模板包可覆盖的分类
+TEMPLATE_PACK_KEYS = ("hook_templates", "title_patterns", "content_frameworks", "emotion_words")
+
+# 模板字段解析器（只用于预编译，避免每次填充时重复解析）
+_FORMATTER = string.Formatter()
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """预编译模板：原始文本 + 解析出的占位字段"""
+    text: str
+    fields: FrozenSet[str]
+
+    def render(self, placeholders: Mapping[str, str]) -> str:
+        """用占位符填充模板"""
+        return self.text.format_map(placeholders)
+
+
+@dataclass(frozen=True)
+class TemplateRegistry:
+    """只读的模板注册表，所有文案生成器实例共享"""
+    hook_templates: Mapping[str, Tuple[CompiledTemplate, ...]]
+    title_patterns: Mapping[str, Tuple[CompiledTemplate, ...]]
+    content_frameworks: Mapping[str, Mapping[str, Any]]
+    emotion_words: Mapping[str, Tuple[str, ...]]
+
+
+def compile_template(text: str) -> CompiledTemplate:
+    """解析模板中的 {field} 占位符"""
+    fields = frozenset(name for _, name, _, _ in _FORMATTER.parse(text) if name)
+    return CompiledTemplate(text=text, fields=fields)
+
+
+def _compile_template_groups(groups: Dict[str, List[str]]) -> Mapping[str, Tuple[CompiledTemplate, ...]]:
+    return MappingProxyType({
+        key: tuple(compile_template(t) for t in templates)
+        for key, templates in groups.items()
+    })
+
+
+def _compile_frameworks(frameworks: Dict[str, Dict]) -> Mapping[str, Mapping[str, Any]]:
+    compiled = {}
+    for name, framework in frameworks.items():
+        compiled[name] = MappingProxyType({
+            "structure": tuple(framework["structure"]),
+            "templates": MappingProxyType({
+                section: compile_template(t)
+                for section, t in framework["templates"].items()
+            })
+        })
+    return MappingProxyType(compiled)
+
+
+def build_template_registry(hook_templates: Dict[str, List[str]],
+                            title_patterns: Dict[str, List[str]],
+                            content_frameworks: Dict[str, Dict],
+                            emotion_words: Dict[str, List[str]]) -> TemplateRegistry:
+    """由原始模板表构建只读注册表"""
+    return TemplateRegistry(
+        hook_templates=_compile_template_groups(hook_templates),
+        title_patterns=_compile_template_groups(title_patterns),
+        content_frameworks=_compile_frameworks(content_frameworks),
+        emotion_words=MappingProxyType({k: tuple(v) for k, v in emotion_words.items()})
+    )
+
+
+DEFAULT_REGISTRY = build_template_registry(
+    _DEFAULT_HOOK_TEMPLATES,
+    _DEFAULT_TITLE_PATTERNS,
+    _DEFAULT_CONTENT_FRAMEWORKS,
+    _DEFAULT_EMOTION_WORDS
+)
+
+
+def _read_template_pack(path: Path) -> Dict[str, Any]:
+    """读取 JSON / YAML 模板包"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("读取 YAML 模板包需要 PyYAML: pip install pyyaml")
+            try:
+                data = yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"模板包格式错误: {path}: {e}")
+        else:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"模板包格式错误: {path}: {e}")
 
-    def __init__(self):
-        self.hook_templates = self._load_hook_templates()
-        self.title_patterns = self._load_title_patterns()
-        self.content_frameworks = self._load_content_frameworks()
-        self.emotion_words = self._load_emotion_words()
+    if not isinstance(data, dict):
+        raise ValueError(f"模板包格式错误: {path}")
+    return data
 
-    def _load_hook_templates(self) -> Dict[str, List[str]]:
-        """加载情绪钩子模板"""
-        return {
-            "shock": [
-                "卧槽！{content}居然{result}？！",
-                "震惊！{content}竟然能{result}！",
-                "不敢相信！{content}的{result}太离谱了！",
-                "天哪！{content}的{result}刷新了我的认知！"
-            ],
-            "curiosity": [
-                "你知道{content}的{secret}吗？",
-                "为什么{content}能{result}？答案让人意外！",
-                "关于{content}，99%的人都不知道这个{secret}！",
-                "揭秘：{content}背后的{secret}！"
-            ],
-            "urgency": [
-                "趁着{content}还没{limitation}，赶紧{action}！",
-                "最后{time}！{content}的{opportunity}即将结束！",
-                "错过就没了！{content}的{benefit}限时{action}！",
-                "手慢无！{content}这个{opportunity}不等人！"
-            ],
-            "benefit": [
-                "用了{content}，我的{aspect}提升了{degree}！",
-                "{content}让我{achievement}，太爽了！",
-                "自从发现{content}，我再也不用{pain_point}了！",
-                "{content}解决了我{time}的{problem}！"
-            ]
-        }
 
-    def _load_title_patterns(self) -> Dict[str, List[str]]:
-        """加载标题模板"""
-        return {
-            "list": [
-                "{number}个{category}神器，{benefit}！",
-                "盘点{number}个{category}，个个都是{quality}！",
-                "{number}款{category}测评，第{rank}个太{emotion}了！",
-                "推荐{number}个{category}，{target_user}必备！"
-            ],
-            "how_to": [
-                "如何{action}？{method}方法超简单！",
-                "{action}的{number}个技巧，{benefit}！",
-                "教你{action}，{time}就能{result}！",
-                "{action}攻略：{method}让你{benefit}！"
-            ],
-            "comparison": [
-                "{item1} VS {item2}，差距竟然这么大？！",
-                "用了{time}的{item1}和{item2}，终于知道选哪个了！",
-                "{item1}还是{item2}？实测告诉你答案！",
-                "别再纠结{item1}和{item2}了，看完这篇就懂了！"
-            ],
-            "story": [
-                "从{before}到{after}，我只用了{method}！",
-                "分享一个{category}的{story}，太{emotion}了！",
-                "我的{journey}：{method}改变了我的{aspect}！",
-                "{time}前的我{before}，现在{after}！"
-            ]
-        }
+def _validate_template_pack(pack: Dict[str, Any], path: Path) -> None:
+    """检查模板包的结构与占位字段，不合法时抛出 ValueError（指明文件与出错的键）"""
+    def fail(key: str, message: str):
+        raise ValueError(f"模板包格式错误: {path}: {key} {message}")
 
-    def _load_content_frameworks(self) -> Dict[str, Dict]:
-        """加载内容框架"""
-        return {
-            "problem_solution": {
-                "structure": ["痛点描述", "解决方案", "使用体验", "效果展示", "推荐理由"],
-                "templates": {
-                    "痛点描述": "你是不是也遇到过{pain_point}？真的太{emotion}了！",
-                    "解决方案": "直到我发现了{solution}，这个问题终于解决了！",
-                    "使用体验": "用了{time}，体验真的{quality}：{details}",
-                    "效果展示": "效果立竿见影：{results}",
-                    "推荐理由": "强烈推荐给{target_user}，因为{reasons}！"
-                }
-            },
-            "tutorial": {
-                "structure": ["引入话题", "准备工作", "详细步骤", "注意事项", "总结收获"],
-                "templates": {
-                    "引入话题": "今天分享一个{category}的{method}，{benefit}！",
-                    "准备工作": "开始前需要准备：{requirements}",
-                    "详细步骤": "具体操作：{steps}",
-                    "注意事项": "重要提醒：{warnings}",
-                    "总结收获": "掌握这个方法，你就能{achievement}！"
-                }
-            },
-            "review": {
-                "structure": ["产品介绍", "使用场景", "优缺点分析", "对比评价", "购买建议"],
-                "templates": {
-                    "产品介绍": "今天测评{product}，{brief_intro}",
-                    "使用场景": "适合{scenarios}的{target_user}",
-                    "优缺点分析": "优点：{pros} 缺点：{cons}",
-                    "对比评价": "和{competitor}相比，{comparison}",
-                    "购买建议": "推荐指数{rating}，{recommendation}"
-                }
-            },
-            "lifestyle": {
-                "structure": ["生活场景", "个人感受", "具体细节", "心得体会", "生活态度"],
-                "templates": {
-                    "生活场景": "最近{time}，我{activity}，感觉{emotion}",
-                    "个人感受": "这种{feeling}让我{realization}",
-                    "具体细节": "特别是{details}，真的{quality}",
-                    "心得体会": "通过这次{experience}，我明白了{insight}",
-                    "生活态度": "生活就是要{attitude}，{encouragement}！"
-                }
-            }
-        }
+    def check_template(key: str, text: Any, fields: FrozenSet[str]) -> None:
+        if not isinstance(text, str):
+            fail(key, "应为字符串")
+        try:
+            names = {name for _, name, _, _ in _FORMATTER.parse(text) if name is not None}
+        except ValueError as e:
+            fail(key, f"模板语法错误（{e}）")
+        unknown = sorted(names - fields)
+        if unknown:
+            fail(key, f"包含未知占位字段: {', '.join('{' + name + '}' for name in unknown)}")
+
+    def check_groups(key: str, groups: Any, fields: Optional[FrozenSet[str]]) -> None:
+        if not isinstance(groups, dict):
+            fail(key, "应为 {分类: [文本, ...]} 映射")
+        for name, items in groups.items():
+            if not isinstance(items, list):
+                fail(f"{key}.{name}", "应为字符串列表")
+            # 情绪词用于随机抽取，不能为空
+            if fields is None and not items:
+                fail(f"{key}.{name}", "不能为空列表")
+            for i, item in enumerate(items):
+                if fields is None:
+                    if not isinstance(item, str):
+                        fail(f"{key}.{name}[{i}]", "应为字符串")
+                else:
+                    check_template(f"{key}.{name}[{i}]", item, fields)
+
+    unknown_keys = sorted(set(pack) - set(TEMPLATE_PACK_KEYS))
+    if unknown_keys:
+        fail(", ".join(unknown_keys), f"不是模板分类（可选: {', '.join(TEMPLATE_PACK_KEYS)}）")
+
+    for key, fields in (("hook_templates", HOOK_FIELDS), ("title_patterns", TITLE_FIELDS),
+                        ("emotion_words", None)):
+        if pack.get(key) is not None:
+            check_groups(key, pack[key], fields)
+
+    frameworks = pack.get("content_frameworks")
+    if frameworks is None:
+        return
+    if not isinstance(frameworks, dict):
+        fail("content_frameworks", "应为 {框架: {structure, templates}} 映射")
+    for name, framework in frameworks.items():
+        key = f"content_frameworks.{name}"
+        if not isinstance(framework, dict):
+            fail(key, "应为包含 structure 与 templates 的映射")
+        structure = framework.get("structure")
+        if not isinstance(structure, list) or not all(isinstance(section, str) for section in structure):
+            fail(f"{key}.structure", "应为字符串列表")
+        templates = framework.get("templates")
+        if not isinstance(templates, dict):
+            fail(f"{key}.templates", "应为 {段落: 模板} 映射")
+        for section, text in templates.items():
+            check_template(f"{key}.templates.{section}", text, CONTENT_FIELDS)
+
+
+@lru_cache(maxsize=None)
+def _load_template_pack_cached(path: str, mtime_ns: int) -> TemplateRegistry:
+    pack = _read_template_pack(Path(path))
+    _validate_template_pack(pack, Path(path))
+
+    # 模板包按分类覆盖内置模板，未提供的分类沿用默认值
+    def merged(defaults: Dict, key: str) -> Dict:
+        return {**defaults, **(pack.get(key) or {})}
+
+    return build_template_registry(
+        merged(_DEFAULT_HOOK_TEMPLATES, "hook_templates"),
+        merged(_DEFAULT_TITLE_PATTERNS, "title_patterns"),
+        merged(_DEFAULT_CONTENT_FRAMEWORKS, "content_frameworks"),
+        merged(_DEFAULT_EMOTION_WORDS, "emotion_words")
+    )
+
+
+def load_template_pack(path: Optional[str] = None) -> TemplateRegistry:
+    """加载外部模板包（JSON 或 YAML），同一文件只解析一次
+
+    Args:
+        path: 模板包路径，为空时返回内置模板
+    """
+    if not path:
+        return DEFAULT_REGISTRY
+    resolved = Path(path).expanduser().resolve()
+    return _load_template_pack_cached(str(resolved), resolved.stat().st_mtime_ns)
+
+
+def _derived_rng(seed: Optional[int], name: str) -> random.Random:
+    """由种子与固定名称派生独立的随机数生成器；seed 为 None 时不固定"""
+    return random.Random(None if seed is None else f"{seed}:{name}")
 
-    def _load_emotion_words(self) -> Dict[str, List[str]]:
-        """加载情绪词汇"""
-        return {
-            "positive": ["绝了", "太爽了", "爱了", "yyds", "神仙", "宝藏", "治愈", "惊艳", "完美"],
-            "negative": ["崩溃", "绝望", "心累", "无语", "抓狂", "头疼", "烦躁", "郁闷", "焦虑"],
-            "surprise": ["震惊", "意外", "没想到", "居然", "竟然", "原来", "发现", "惊喜", "神奇"],
-            "emphasis": ["真的", "超级", "特别", "非常", "极其", "相当", "十分", "格外", "异常"]
-        }
+
+class XiaohongshuCopywriter:
+    """小红书文案生成器"""
+
+    def __init__(self, template_pack: Optional[str] = None):
+        # 模板表在模块级只构建一次，实例只持有共享的只读引用
+        self.registry = load_template_pack(template_pack)
+        self.hook_templates = self.registry.hook_templates
+        self.title_patterns = self.registry.title_patterns
+        self.content_frameworks = self.registry.content_frameworks
+        self.emotion_words = self.registry.emotion_words
 
     def analyze_content(self, content: str) -> ContentAnalysis:
         """分析输入内容"""
@@ -181,44 +394,51 @@ class XiaohongshuCopywriter:
             content_type="sharing"
         )
 
-    def generate_titles(self, content: str, analysis: ContentAnalysis, count: int = 5) -> List[str]:
-        """生成标题候选"""
-        titles = []
+    def generate_titles(self, content: str, analysis: ContentAnalysis, count: int = 5,
+                        seed: Optional[int] = None) -> List[str]:
+        """生成标题候选
+
+        Args:
+            count: 需要的标题数量，凑够后立即停止生成
+            seed: 随机种子，相同种子得到相同结果
+        """
+        return list(islice(self.iter_titles(content, analysis, seed), count))
+
+    def iter_titles(self, content: str, analysis: ContentAnalysis,
+                    seed: Union[int, random.Random, None] = None) -> Iterator[str]:
+        """按优先级惰性产出去重后的有效标题（不超过20字）"""
+        rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+        seen = set()
+
+        for title in self._iter_title_candidates(content, analysis, rng):
+            if title and len(title) <= 20 and title not in seen:
+                seen.add(title)
+                yield title
 
+    def _iter_title_candidates(self, content: str, analysis: ContentAnalysis,
+                               rng: random.Random) -> Iterator[str]:
         # 基于不同模板生成标题
         for pattern_type, templates in self.title_patterns.items():
             for template in templates[:2]:  # 每种类型取2个模板
-                try:
-                    # 根据内容和分析结果填充模板
-                    title = self._fill_title_template(template, content, analysis)
-                    if title and len(title) <= 20:
-                        titles.append(title)
-                except:
-                    continue
+                # 根据内容和分析结果填充模板
+                yield self._fill_title_template(template, content, analysis, rng)
 
         # 基于情绪钩子生成标题
         for hook_type, templates in self.hook_templates.items():
             for template in templates[:1]:  # 每种钩子取1个模板
-                try:
-                    title = self._fill_hook_template(template, content, analysis)
-                    if title and len(title) <= 20:
-                        titles.append(title)
-                except:
-                    continue
-
-        # 去重并返回指定数量
-        unique_titles = list(dict.fromkeys(titles))
-        return unique_titles[:count]
-
-    def _fill_title_template(self, template: str, content: str, analysis: ContentAnalysis) -> str:
-        """填充标题模板"""
+                yield self._fill_hook_template(template, content, analysis)
+
+    def _fill_title_template(self, template: CompiledTemplate, content: str, analysis: ContentAnalysis,
+                             rng: Optional[random.Random] = None) -> str:
+        """填充标题模板，模板字段无法填充时返回空字符串"""
+        rng = rng or random
         # 简化的模板填充逻辑
         placeholders = {
-            "number": random.choice(["3", "5", "7", "10"]),
+            "number": rng.choice(["3", "5", "7", "10"]),
             "category": analysis.keywords[0] if analysis.keywords else "好物",
             "benefit": "效率翻倍",
             "quality": "神器",
-            "emotion": random.choice(self.emotion_words["positive"]),
+            "emotion": rng.choice(self.emotion_words["positive"]),
             "target_user": "打工人",
             "action": "提升效率",
             "method": "这个方法",
@@ -234,13 +454,12 @@ class XiaohongshuCopywriter:
             "journey": "效率提升之路"
         }
 
-        try:
-            return template.format(**placeholders)
-        except:
+        if not template.fields <= placeholders.keys():
             return ""
+        return template.render(placeholders)
 
-    def _fill_hook_template(self, template: str, content: str, analysis: ContentAnalysis) -> str:
-        """填充钩子模板"""
+    def _fill_hook_template(self, template: CompiledTemplate, content: str, analysis: ContentAnalysis) -> str:
+        """填充钩子模板，模板字段无法填充时返回空字符串"""
         placeholders = {
             "content": analysis.keywords[0] if analysis.keywords else "这个工具",
             "result": "这么好用",
@@ -257,13 +476,13 @@ class XiaohongshuCopywriter:
             "problem": "效率问题"
         }
 
-        try:
-            return template.format(**placeholders)
-        except:
+        if not template.fields <= placeholders.keys():
             return ""
+        return template.render(placeholders)
 
     def generate_content(self, original_content: str, analysis: ContentAnalysis,
-                        framework: str = "problem_solution") -> str:
+                        framework: str = "problem_solution",
+                        rng: Optional[random.Random] = None) -> str:
         """生成正文内容"""
 
         if framework not in self.content_frameworks:
@@ -278,7 +497,7 @@ class XiaohongshuCopywriter:
         for section in structure:
             if section in templates:
                 template = templates[section]
-                filled_content = self._fill_content_template(template, original_content, analysis)
+                filled_content = self._fill_content_template(template, original_content, analysis, rng)
                 if filled_content:
                     content_parts.append(filled_content)
 
@@ -289,15 +508,17 @@ class XiaohongshuCopywriter:
 
         return content
 
-    def _fill_content_template(self, template: str, original_content: str, analysis: ContentAnalysis) -> str:
-        """填充内容模板"""
+    def _fill_content_template(self, template: CompiledTemplate, original_content: str, analysis: ContentAnalysis,
+                               rng: Optional[random.Random] = None) -> str:
+        """填充内容模板，模板字段无法填充时原样返回模板文本"""
+        rng = rng or random
         # 基于原始内容和分析结果填充模板
         placeholders = {
             "pain_point": "工作效率低下",
-            "emotion": random.choice(self.emotion_words["negative"]),
+            "emotion": rng.choice(self.emotion_words["negative"]),
             "solution": analysis.keywords[0] if analysis.keywords else "这个方法",
             "time": "一周",
-            "quality": random.choice(self.emotion_words["positive"]),
+            "quality": rng.choice(self.emotion_words["positive"]),
             "details": "操作简单，效果明显",
             "results": "工作效率提升了一倍",
             "target_user": "职场人",
@@ -327,10 +548,9 @@ class XiaohongshuCopywriter:
             "encouragement": "一起加油"
         }
 
-        try:
-            return template.format(**placeholders)
-        except:
-            return template
+        if not template.fields <= placeholders.keys():
+            return template.text
+        return template.render(placeholders)
 
     def _add_emojis(self, content: str, analysis: ContentAnalysis) -> str:
         """添加表情符号"""
@@ -433,32 +653,40 @@ class XiaohongshuCopywriter:
 
         return f"{content}\n\n{tag_string}"
 
-    def optimize_content(self, original_content: str, content_type: str = "post") -> Dict[str, any]:
+    def optimize_content(self, original_content: str, content_type: str = "post",
+                         frameworks: Optional[Iterable[str]] = None,
+                         seed: Optional[int] = None) -> Dict[str, any]:
         """优化内容的主入口
 
         Args:
             original_content: 原始内容
             content_type: 内容类型 ("post" 正文文案, "card" 图片文案)
+            frameworks: 正文模式下需要生成的框架，为空时生成全部框架
+            seed: 随机种子，相同输入和种子得到相同结果；标题与各框架使用各自派生的随机数生成器，
+                  某个框架的结果不受同时请求了哪些框架影响
         """
+        rng = random.Random(seed)  # 只用于标题，与 generate_titles(seed=...) 结果一致
+
         # 分析原始内容
         analysis = self.analyze_content(original_content)
 
         # 生成标题候选
-        titles = self.generate_titles(original_content, analysis)
+        titles = list(islice(self.iter_titles(original_content, analysis, rng), 5))
 
         # 根据内容类型生成不同的内容版本
         if content_type == "card":
             # 图片文案模式：生成适合卡片渲染的内容
             content_versions = self._generate_card_content(original_content, analysis)
         else:
-            # 正文文案模式：生成完整的小红书笔记内容
-            frameworks = ["problem_solution", "tutorial", "review", "lifestyle"]
+            # 正文文案模式：只生成调用方需要的框架
+            if frameworks is None:
+                frameworks = FRAMEWORK_NAMES
             content_versions = {}
 
             for framework in frameworks:
                 if framework in self.content_frameworks:
                     content_versions[framework] = self.generate_content(
-                        original_content, analysis, framework
+                        original_content, analysis, framework, _derived_rng(seed, framework)
                     )
 
         return {
@@ -676,6 +904,99 @@ subtitle: "值得收藏的好内容"
                 f"💪 强烈推荐，值得每个人拥有"
             ]
 
+# 批量处理时每个工作进程持有一个文案生成器
+_WORKER_COPYWRITER: Optional[XiaohongshuCopywriter] = None
+
+
+def _normalize_draft(index: int, draft: Union[str, Mapping[str, Any]]) -> Tuple[Any, str]:
+    """统一草稿格式为 (id, content)"""
+    if isinstance(draft, str):
+        return index, draft
+    return draft.get("id", index), draft.get("content", "")
+
+
+def result_to_record(draft_id: Any, result: Dict[str, Any]) -> Dict[str, Any]:
+    """将 optimize_content 的结果转换为可 JSON 序列化的记录"""
+    return {
+        "id": draft_id,
+        "analysis": asdict(result["analysis"]),
+        "titles": result["titles"],
+        "content_versions": result["content_versions"]
+    }
+
+
+def _init_batch_worker(template_pack: Optional[str]) -> None:
+    global _WORKER_COPYWRITER
+    _WORKER_COPYWRITER = XiaohongshuCopywriter(template_pack)
+
+
+def _optimize_chunk(chunk: List[Tuple[Any, str]], content_type: str,
+                    frameworks: Optional[Tuple[str, ...]],
+                    seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """在工作进程中处理一批草稿"""
+    copywriter = _WORKER_COPYWRITER or XiaohongshuCopywriter()
+    records = []
+    for draft_id, content in chunk:
+        result = copywriter.optimize_content(content, content_type, frameworks, seed)
+        records.append(result_to_record(draft_id, result))
+    return records
+
+
+def _chunked(items: Iterable[Tuple[Any, str]], size: int) -> Iterator[List[Tuple[Any, str]]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def optimize_batch(drafts: Iterable[Union[str, Mapping[str, Any]]],
+                   frameworks: Optional[Iterable[str]] = None,
+                   content_type: str = "post",
+                   workers: int = 1,
+                   chunksize: int = 32,
+                   template_pack: Optional[str] = None,
+                   seed: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """批量优化文案，按输入顺序逐条产出结果记录
+
+    Args:
+        drafts: 草稿序列，元素为字符串或 {"id": ..., "content": ...}
+        frameworks: 正文模式下需要生成的框架，为空时生成全部框架
+        content_type: 内容类型 ("post" 正文文案, "card" 图片文案)
+        workers: 进程数，<= 1 时在当前进程中处理
+        chunksize: 每个任务包含的草稿数，用于摊薄进程间通信开销
+        template_pack: 自定义模板包路径
+        seed: 随机种子，指定后结果可复现
+    """
+    if frameworks is not None:
+        frameworks = tuple(frameworks)
+    items = (_normalize_draft(i, d) for i, d in enumerate(drafts))
+    chunks = _chunked(items, max(1, chunksize))
+
+    if workers <= 1:
+        _init_batch_worker(template_pack)
+        for chunk in chunks:
+            yield from _optimize_chunk(chunk, content_type, frameworks, seed)
+        return
+
+    # 多进程模块导入较慢，只在并行时加载
+    from concurrent.futures import ProcessPoolExecutor
+
+    # 限制在途任务数量，避免一次性读入整个语料
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_batch_worker,
+                             initargs=(template_pack,)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_optimize_chunk, chunk, content_type, frameworks, seed))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
 def main():
     """测试函数"""
     copywriter = XiaohongshuCopywriter()
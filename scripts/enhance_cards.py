@@ -9,14 +9,17 @@ import json
 import os
 import sys
 import time
-import requests
 from pathlib import Path
 from typing import List, Dict, Optional
 import base64
-from io import BytesIO
-from PIL import Image
 import re
 
+from metrics import (
+    API_POLLS, BYTES_WRITTEN, IMAGE_BYTES, QUEUE_DEPTH,
+    add_metrics_arguments, metrics_from_args, status_label, track_api_call
+)
+from tracing import add_trace_arguments, set_attributes, span, traced, tracing_from_args
+
 # 配置文件路径
 CONFIG_FILE = Path(__file__).parent.parent / "config.json"
 
@@ -232,6 +235,9 @@ class ImageEnhancer:
         self.api_key = api_key or self._load_api_key()
         self.content_analyzer = ContentAnalyzer()
         self.prompt_generator = PromptGenerator()
+        # requests 只在真正调用 API 时需要，--help 等路径不加载
+        import requests
+        self.requests = requests
 
     def _load_api_key(self) -> str:
         """加载 API Key"""
@@ -248,6 +254,7 @@ class ImageEnhancer:
 
         raise Exception("未找到 Replicate API Key，请配置后重试")
 
+    @traced()
     def enhance_image(self, image_path: str, style: str = "illustration",
                      intensity: str = "medium", output_path: str = None) -> str:
         """美化单张图片"""
@@ -256,9 +263,11 @@ class ImageEnhancer:
             raise Exception(f"图片文件不存在: {image_path}")
 
         print(f"🎨 开始美化图片: {Path(image_path).name}")
+        set_attributes(image=image_path, style=style, intensity=intensity)
 
         # 分析图片内容
-        content_info = self.content_analyzer.analyze_image_content(image_path)
+        with span('analyze'):
+            content_info = self.content_analyzer.analyze_image_content(image_path)
         print(f"📊 识别主题: {content_info['theme']}")
 
         # 生成提示词
@@ -289,13 +298,16 @@ class ImageEnhancer:
         print(f"✅ 图片美化完成: {Path(output_path).name}")
         return output_path
 
+    @traced()
     def enhance_multiple_images(self, image_paths: List[str], style: str = "illustration",
                                intensity: str = "medium", output_dir: str = None) -> List[str]:
         """批量美化图片"""
         enhanced_paths = []
+        queue_depth = QUEUE_DEPTH.labels(queue='enhance')
 
         for i, image_path in enumerate(image_paths, 1):
             print(f"\n🔄 处理第 {i}/{len(image_paths)} 张图片")
+            queue_depth.set(len(image_paths) - i + 1)
 
             try:
                 if output_dir:
@@ -309,19 +321,23 @@ class ImageEnhancer:
                 # 避免 API 限制，添加延迟
                 if i < len(image_paths):
                     print("⏳ 等待 3 秒...")
-                    time.sleep(3)
+                    with span('rate_limit_wait'):
+                        time.sleep(3)
 
             except Exception as e:
                 print(f"❌ 图片美化失败: {e}")
                 continue
 
+        queue_depth.set(0)
         return enhanced_paths
 
+    @traced('encode_base64')
     def _image_to_base64(self, image_path: str) -> str:
         """将图片转换为 base64 编码"""
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
 
+    @traced('replicate')
     def _call_nano_banana_pro(self, prompt: str, negative_prompt: str,
                              image_base64: str) -> str:
         """调用 Nano Banana Pro API"""
@@ -345,7 +361,12 @@ class ImageEnhancer:
             }
         }
 
-        response = requests.post(create_url, headers=headers, json=payload)
+        with span('replicate.create') as create_span, \
+                track_api_call('replicate', 'create') as call:
+            response = self.requests.post(create_url, headers=headers, json=payload)
+            call['status'] = status_label(response.status_code)
+            if create_span:
+                create_span.set(status_code=response.status_code)
         if response.status_code != 201:
             raise Exception(f"API 调用失败: {response.status_code} - {response.text}")
 
@@ -358,9 +379,14 @@ class ImageEnhancer:
 
         print("🔄 正在生成图片...")
         for attempt in range(max_attempts):
-            response = requests.get(get_url, headers=headers)
-            prediction = response.json()
-            status = prediction["status"]
+            API_POLLS.labels(service='replicate').inc()
+            with span('replicate.poll', attempt=attempt), \
+                    track_api_call('replicate', 'poll') as call:
+                response = self.requests.get(get_url, headers=headers)
+                call['status'] = status_label(response.status_code)
+                prediction = response.json()
+                status = prediction["status"]
+                set_attributes(status=status)
 
             if status == "succeeded":
                 output = prediction["output"]
@@ -377,17 +403,25 @@ class ImageEnhancer:
 
         raise Exception("图片生成超时")
 
+    @traced('download')
     def _download_image(self, url: str, output_path: str) -> None:
         """下载图片"""
-        response = requests.get(url, stream=True)
+        with track_api_call('replicate', 'download') as call:
+            response = self.requests.get(url, stream=True)
+            call['status'] = status_label(response.status_code)
         response.raise_for_status()
 
         # 确保输出目录存在
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
+        written = 0
         with open(output_path, "wb") as f:
             for chunk in response.iter_content(chunk_size=8192):
                 f.write(chunk)
+                written += len(chunk)
+        set_attributes(bytes=written)
+        BYTES_WRITTEN.labels(component='enhance').inc(written)
+        IMAGE_BYTES.labels(component='enhance').observe(written)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -442,56 +476,60 @@ def main():
         help="强制覆盖已存在的输出文件"
     )
 
+    add_trace_arguments(parser)
+    add_metrics_arguments(parser)
+
     args = parser.parse_args()
 
-    try:
-        # 初始化美化器
-        enhancer = ImageEnhancer(args.api_key)
+    with metrics_from_args(args), tracing_from_args(args, 'enhance_cards'):
+        try:
+            # 初始化美化器
+            enhancer = ImageEnhancer(args.api_key)
+
+            # 检查输出文件是否已存在
+            if not args.force:
+                existing_files = []
+                for image_path in args.images:
+                    if args.output_dir:
+                        output_path = Path(args.output_dir) / f"{Path(image_path).stem}_enhanced{Path(image_path).suffix}"
+                    else:
+                        path_obj = Path(image_path)
+                        output_path = path_obj.parent / f"{path_obj.stem}_enhanced{path_obj.suffix}"
+
+                    if output_path.exists():
+                        existing_files.append(str(output_path))
+
+                if existing_files:
+                    print("⚠️ 以下文件已存在，将跳过:")
+                    for file in existing_files:
+                        print(f"  - {file}")
+                    print("使用 --force 参数强制覆盖")
+
+            # 创建输出目录
+            if args.output_dir:
+                Path(args.output_dir).mkdir(parents=True, exist_ok=True)
 
-        # 检查输出文件是否已存在
-        if not args.force:
-            existing_files = []
-            for image_path in args.images:
+            # 美化图片
+            if len(args.images) == 1:
+                output_path = None
                 if args.output_dir:
-                    output_path = Path(args.output_dir) / f"{Path(image_path).stem}_enhanced{Path(image_path).suffix}"
-                else:
-                    path_obj = Path(image_path)
-                    output_path = path_obj.parent / f"{path_obj.stem}_enhanced{path_obj.suffix}"
+                    output_path = str(Path(args.output_dir) / f"{Path(args.images[0]).stem}_enhanced{Path(args.images[0]).suffix}")
+
+                enhanced_path = enhancer.enhance_image(
+                    args.images[0], args.style, args.intensity, output_path
+                )
+                print(f"\n🎉 美化完成: {enhanced_path}")
+            else:
+                enhanced_paths = enhancer.enhance_multiple_images(
+                    args.images, args.style, args.intensity, args.output_dir
+                )
+                print(f"\n🎉 批量美化完成，共处理 {len(enhanced_paths)} 张图片")
+                for path in enhanced_paths:
+                    print(f"  ✅ {path}")
 
-                if output_path.exists():
-                    existing_files.append(str(output_path))
-
-            if existing_files:
-                print("⚠️ 以下文件已存在，将跳过:")
-                for file in existing_files:
-                    print(f"  - {file}")
-                print("使用 --force 参数强制覆盖")
-
-        # 创建输出目录
-        if args.output_dir:
-            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
-
-        # 美化图片
-        if len(args.images) == 1:
-            output_path = None
-            if args.output_dir:
-                output_path = str(Path(args.output_dir) / f"{Path(args.images[0]).stem}_enhanced{Path(args.images[0]).suffix}")
-
-            enhanced_path = enhancer.enhance_image(
-                args.images[0], args.style, args.intensity, output_path
-            )
-            print(f"\n🎉 美化完成: {enhanced_path}")
-        else:
-            enhanced_paths = enhancer.enhance_multiple_images(
-                args.images, args.style, args.intensity, args.output_dir
-            )
-            print(f"\n🎉 批量美化完成，共处理 {len(enhanced_paths)} 张图片")
-            for path in enhanced_paths:
-                print(f"  ✅ {path}")
-
-    except Exception as e:
-        print(f"❌ 错误: {e}")
-        sys.exit(1)
+        except Exception as e:
+            print(f"❌ 错误: {e}")
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+内容块高度的持久缓存
+同一段 Markdown 在同样的样式、宽度、设备像素比与浏览器下渲染出的高度不变，
+分页时先查缓存，只把新增或改动过的块交给浏览器测量；修改笔记后重新分页只测量变化的部分
+
+缓存为 SQLite 单表键值存储，键为（块原文, 布局指纹）的 SHA-1，布局指纹由空卡片 HTML
+（包含主题 CSS、字体与尺寸）、布局模式、设备像素比与浏览器版本计算得出，样式或字体变化后自动失效
+
+存储位置:
+    $XHS_CACHE_DIR/heights.sqlite3（默认 ~/.cache/rednote-visual-studio/）
+    设置 XHS_HEIGHT_CACHE=0 可关闭缓存
+
+使用方法:
+    from height_cache import get_height_cache, layout_fingerprint
+
+    cache = get_height_cache()
+    layout = layout_fingerprint(style.card_html('', 1, 1, mode), mode, dpr, browser_version)
+    heights = cache.get_many([cache.key(text, layout) for text in texts])
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from metrics import HEIGHT_CACHE_LOOKUPS
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'rednote-visual-studio'
+CACHE_FILE = 'heights.sqlite3'
+MAX_ENTRIES = 50000  # 超出后按最近使用时间淘汰
+
+_CACHES: Dict[str, 'HeightCache'] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def cache_dir() -> str:
+    """本地缓存根目录（$XHS_CACHE_DIR，默认 ~/.cache/rednote-visual-studio/）"""
+    return os.environ.get('XHS_CACHE_DIR') or str(DEFAULT_CACHE_DIR)
+
+
+def layout_fingerprint(empty_card_html: str, mode: str, dpr: int, browser_version: str = '') -> str:
+    """影响块高度的全部因素（样式 CSS、字体、尺寸、模式、像素比、浏览器）的摘要"""
+    digest = hashlib.sha1()
+    for part in (empty_card_html, mode, str(dpr), browser_version, sys.platform):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class HeightCache:
+    """SQLite 键值存储：key -> 高度（像素）"""
+
+    def __init__(self, path: str):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS heights ('
+            ' key TEXT PRIMARY KEY, height REAL NOT NULL, used_at INTEGER NOT NULL'
+            ') WITHOUT ROWID'
+        )
+
+    @staticmethod
+    def key(text: str, layout: str) -> str:
+        return hashlib.sha1(f'{layout}\0{text}'.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        """批量查询，返回命中的 {key: 高度}"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found: Dict[str, float] = {}
+        with self._lock:
+            # SQLite 默认最多 999 个绑定参数
+            for i in range(0, len(keys), 900):
+                chunk = keys[i:i + 900]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self._db.execute(
+                    f'SELECT key, height FROM heights WHERE key IN ({placeholders})', chunk
+                ).fetchall())
+            if found:
+                self._db.executemany(
+                    'UPDATE heights SET used_at = ? WHERE key = ?',
+                    [(int(time.time()), key) for key in found]
+                )
+        HEIGHT_CACHE_LOOKUPS.labels(result='hit').inc(len(found))
+        HEIGHT_CACHE_LOOKUPS.labels(result='miss').inc(len(keys) - len(found))
+        return found
+
+    def put_many(self, heights: Dict[str, float]) -> None:
+        """批量写入，超出容量时淘汰最久未使用的条目"""
+        if not heights:
+            return
+        now = int(time.time())
+        with self._lock:
+            self._db.execute('BEGIN')
+            self._db.executemany(
+                'INSERT OR REPLACE INTO heights (key, height, used_at) VALUES (?, ?, ?)',
+                [(key, float(height), now) for key, height in heights.items()]
+            )
+            self._db.execute(
+                'DELETE FROM heights WHERE key IN ('
+                ' SELECT key FROM heights ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+                (MAX_ENTRIES,)
+            )
+            self._db.execute('COMMIT')
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def get_height_cache() -> Optional[HeightCache]:
+    """返回进程内共享的默认缓存；已关闭或无法打开时返回 None（分页照常全部实测）"""
+    if os.environ.get('XHS_HEIGHT_CACHE', '1') == '0':
+        return None
+    path = os.path.join(cache_dir(), CACHE_FILE)
+    with _CACHES_LOCK:
+        if path not in _CACHES:
+            try:
+                _CACHES[path] = HeightCache(path)
+            except Exception as e:
+                print(f"⚠️ 高度缓存不可用，将全部实测: {e}")
+                _CACHES[path] = None
+        return _CACHES[path]
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+本地图片预处理
+笔记中引用的本地照片往往是数千像素宽的原图，浏览器每次渲染都要完整解码后再缩小到卡片宽度。
+渲染前先把图片缩小到（内容宽度 × 设备像素比），并记录显示尺寸，正文中的图片带上明确的
+width / height：浏览器解码量大幅减少，分页测量时图片高度也无需等待加载即可确定
+
+缩放在进程池中并行执行（每张图片一个任务），结果按（文件内容哈希, 目标宽度）缓存在
+$XHS_CACHE_DIR/images/ 下，同一张图片再次渲染时直接复用
+
+图片尺寸直接从文件头读取（PNG / GIF / JPEG / WebP），不依赖 Pillow；
+缩放需要 Pillow，未安装时使用原图（仍会带上显示尺寸）
+
+使用方法:
+    from image_assets import prepare_images
+
+    prepared = prepare_images(['photo.jpg'], content_width=860, dpr=2)
+    image = prepared['photo.jpg']
+    print(image.path, image.width, image.height)
+"""
+
+import hashlib
+import os
+import struct
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from height_cache import cache_dir
+
+# 动图与矢量图保持原样（缩放会丢失动画 / 清晰度）
+RESIZABLE_FORMATS = ('png', 'jpeg', 'webp')
+JPEG_QUALITY = 90
+
+# JPEG 中表示帧尺寸的 SOF 标记（不含 DHT / JPG / DAC）
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+_pillow_warned = False
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """预处理后的图片：实际使用的文件与显示尺寸（CSS 像素）"""
+    path: str
+    width: int
+    height: int
+
+
+def _jpeg_orientation(exif: bytes) -> int:
+    """从 APP1 段的 EXIF 数据中读取方向标记（缺省为 1）"""
+    if not exif.startswith(b'Exif\0\0') or len(exif) < 14:
+        return 1
+    tiff = exif[6:]
+    endian = '<' if tiff[:2] == b'II' else '>'
+    try:
+        ifd = struct.unpack(endian + 'I', tiff[4:8])[0]
+        count = struct.unpack(endian + 'H', tiff[ifd:ifd + 2])[0]
+        for i in range(count):
+            entry = ifd + 2 + i * 12
+            tag, _, _, value = struct.unpack(endian + 'HHIH', tiff[entry:entry + 10])
+            if tag == 0x0112:
+                return value
+    except struct.error:
+        pass
+    return 1
+
+
+def _jpeg_size(f) -> Optional[Tuple[int, int]]:
+    f.seek(2)
+    orientation = 1
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue  # 无长度字段的标记
+        length = struct.unpack('>H', f.read(2))[0]
+        if marker[1] == 0xE1 and orientation == 1:
+            orientation = _jpeg_orientation(f.read(length - 2))
+        elif marker[1] in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>xHH', f.read(5))
+            # 方向 5-8 表示旋转 90°，浏览器按 EXIF 方向显示
+            return (height, width) if orientation >= 5 else (width, height)
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def image_size(path: str) -> Optional[Tuple[str, int, int]]:
+    """读取文件头，返回（格式, 宽, 高）；不支持的格式返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(30)
+            if head.startswith(b'\x89PNG\r\n\x1a\n'):
+                return ('png',) + struct.unpack('>II', head[16:24])
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return ('gif',) + struct.unpack('<HH', head[6:10])
+            if head.startswith(b'\xff\xd8'):
+                size = _jpeg_size(f)
+                return ('jpeg',) + size if size else None
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                chunk = head[12:16]
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', head[26:30])
+                    return 'webp', width & 0x3FFF, height & 0x3FFF
+                if chunk == b'VP8L':
+                    bits = int.from_bytes(head[21:25], 'little')
+                    return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b'VP8X':
+                    return ('webp', int.from_bytes(head[24:27], 'little') + 1,
+                            int.from_bytes(head[27:30], 'little') + 1)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def _resize_job(source: str, target: str, width: int) -> str:
+    """进程池任务：按 EXIF 方向摆正后缩放到指定宽度，原子写入 target"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+
+    tmp = f'{target}.{os.getpid()}.tmp'
+    if target.endswith('.jpg'):
+        resized.convert('RGB').save(tmp, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    else:
+        resized.save(tmp, 'PNG')
+    os.replace(tmp, target)
+    return target
+
+
+def _pillow_available() -> bool:
+    global _pillow_warned
+    try:
+        import PIL  # noqa: F401
+        return True
+    except ImportError:
+        if not _pillow_warned:
+            print("⚠️ 未安装 Pillow，图片将按原图渲染: pip install pillow")
+            _pillow_warned = True
+        return False
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _run_jobs(jobs: List[Tuple[str, str, int]], workers: Optional[int], executor=None) -> List[str]:
+    """执行缩放任务，返回成功生成的文件；单个任务直接在当前进程执行，传入 executor 时使用该进程池"""
+    done = []
+    if len(jobs) == 1 or (workers == 1 and executor is None):
+        for job in jobs:
+            try:
+                done.append(_resize_job(*job))
+            except Exception as e:
+                print(f"⚠️ 图片缩放失败，使用原图: {job[0]} ({e})")
+        return done
+
+    if executor is not None:
+        return _collect(jobs, executor)
+
+    from render_pool import process_pool
+
+    with process_pool(min(len(jobs), workers or os.cpu_count() or 1)) as executor:
+        return _collect(jobs, executor)
+
+
+def _collect(jobs: List[Tuple[str, str, int]], executor) -> List[str]:
+    done = []
+    futures = [(job, executor.submit(_resize_job, *job)) for job in jobs]
+    for job, future in futures:
+        try:
+            done.append(future.result())
+        except Exception as e:
+            print(f"⚠️ 图片缩放失败，使用原图: {job[0]} ({e})")
+    return done
+
+
+def prepare_images(paths: Sequence[str], content_width: int, dpr: int = 2,
+                   workers: Optional[int] = None, executor=None) -> Dict[str, PreparedImage]:
+    """
+    预处理一组本地图片，返回 {原路径: PreparedImage}；无法识别尺寸的文件不在结果中
+    显示宽度不超过内容宽度，文件宽度不超过显示宽度 × 设备像素比（小图保持原样）；
+    executor 为调用方已有的进程池（如渲染流程的 CpuPool），省略时按需临时创建
+    """
+    prepared: Dict[str, PreparedImage] = {}
+    jobs: List[Tuple[str, str, int]] = []
+    pending: Dict[str, List[str]] = {}  # 缩放结果路径 -> 内容相同的原路径
+    images_dir = os.path.join(cache_dir(), 'images')
+
+    for path in dict.fromkeys(paths):
+        info = image_size(path)
+        if not info or info[1] <= 0 or info[2] <= 0:
+            continue
+        fmt, width, height = info
+        display_width = min(width, content_width)
+        display_height = max(1, round(height * display_width / width))
+        prepared[path] = PreparedImage(path, display_width, display_height)
+
+        target_width = display_width * dpr
+        if fmt not in RESIZABLE_FORMATS or target_width >= width:
+            continue
+        ext = 'jpg' if fmt == 'jpeg' else 'png'
+        target = os.path.join(images_dir, f'{_file_digest(path)}-{target_width}.{ext}')
+        if os.path.exists(target):
+            prepared[path] = PreparedImage(target, display_width, display_height)
+        else:
+            if target not in pending:
+                jobs.append((path, target, target_width))
+            pending.setdefault(target, []).append(path)
+
+    if jobs and _pillow_available():
+        os.makedirs(images_dir, exist_ok=True)
+        print(f"  🖼️ 缩放 {len(jobs)} 张图片...")
+        for target in _run_jobs(jobs, workers, executor):
+            for path in pending[target]:
+                image = prepared[path]
+                prepared[path] = PreparedImage(target, image.width, image.height)
+    return prepared
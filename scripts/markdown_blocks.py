@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Markdown 块级解析
+按行状态机把正文切成不可再分的内容块（标题 / 段落 / 列表 / 代码 / 表格 / 引用 / 分隔线 / 标签），
+每个块带类型与在原文中的起止位置。围栏代码、表格、列表不会在结构中间被切开
+
+各分页模式共用同一份解析结果：parse_blocks 以正文为键缓存，同一篇笔记只解析一次，
+切分卡片时直接按块的起止位置截取原文
+
+说明: markdown 库的 BlockParser 输出的是元素树，不保留源码位置，且围栏代码由预处理器
+替换为占位符，因此这里按与其相同的块规则单独扫描
+
+使用方法:
+    from markdown_blocks import parse_blocks, split_sections
+
+    blocks = parse_blocks(body)
+    for section in split_sections(blocks):
+        print(section_text(body, section))
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+HEADING_PATTERN = re.compile(r'^#{1,6}\s')
+FENCE_PATTERN = re.compile(r'^(\s{0,3})(`{3,}|~{3,})')
+SEPARATOR_PATTERN = re.compile(r'^-{3,}\s*$')
+LIST_ITEM_PATTERN = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+')
+TABLE_DELIMITER_PATTERN = re.compile(r'^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$')
+TAGS_PATTERN = re.compile(r'^(?:#[\w\u4e00-\u9fa5]+\s*)+$')
+
+# 块类型
+HEADING = 'heading'
+PARAGRAPH = 'paragraph'
+LIST = 'list'
+CODE = 'code'
+TABLE = 'table'
+QUOTE = 'quote'
+SEPARATOR = 'separator'
+TAGS = 'tags'
+IMAGE = 'image'
+
+
+@dataclass(frozen=True)
+class Block:
+    """一个内容块：类型、原文，以及在被解析文本中的起止位置 [start, end)"""
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+def _is_table_start(lines: Sequence[str], i: int) -> bool:
+    return ('|' in lines[i] and i + 1 < len(lines)
+            and '|' in lines[i + 1] and bool(TABLE_DELIMITER_PATTERN.match(lines[i + 1])))
+
+
+def _starts_block(lines: Sequence[str], i: int) -> bool:
+    """该行是否开始一个新的非段落块（会打断当前段落）"""
+    line = lines[i]
+    return bool(
+        HEADING_PATTERN.match(line) or FENCE_PATTERN.match(line) or SEPARATOR_PATTERN.match(line)
+        or LIST_ITEM_PATTERN.match(line) or line.lstrip().startswith('>')
+        or _is_table_start(lines, i)
+    )
+
+
+def _scan(lines: Sequence[str]) -> List[Tuple[str, int, int]]:
+    """返回 [(类型, 起始行, 结束行)]，结束行不含"""
+    spans = []
+    n = len(lines)
+    i = 0
+    while i < n:
+        line = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+
+        start = i
+        fence = FENCE_PATTERN.match(line)
+        if fence:
+            # 围栏代码：直到同类且不短于开头的闭合围栏，未闭合则到文末
+            marker = fence.group(2)
+            i += 1
+            while i < n and not lines[i].strip().startswith(marker[0] * len(marker)):
+                i += 1
+            i = min(i + 1, n)
+            spans.append((CODE, start, i))
+        elif SEPARATOR_PATTERN.match(line):
+            i += 1
+            spans.append((SEPARATOR, start, i))
+        elif HEADING_PATTERN.match(line):
+            i += 1
+            spans.append((HEADING, start, i))
+        elif _is_table_start(lines, i):
+            i += 2
+            while i < n and lines[i].strip() and '|' in lines[i]:
+                i += 1
+            spans.append((TABLE, start, i))
+        elif line.lstrip().startswith('>'):
+            # 引用：连续的 > 行及其懒惰续行
+            i += 1
+            while i < n and lines[i].strip() and (
+                    lines[i].lstrip().startswith('>') or not _starts_block(lines, i)):
+                i += 1
+            spans.append((QUOTE, start, i))
+        elif LIST_ITEM_PATTERN.match(line):
+            # 列表：列表项、缩进续行，以及空行后紧跟的列表项 / 缩进内容
+            i += 1
+            while i < n:
+                current = lines[i]
+                if current.strip():
+                    if LIST_ITEM_PATTERN.match(current) or current[:1] in (' ', '\t'):
+                        i += 1
+                        continue
+                    if _starts_block(lines, i):
+                        break
+                    i += 1  # 懒惰续行
+                    continue
+                j = i
+                while j < n and not lines[j].strip():
+                    j += 1
+                if j < n and (LIST_ITEM_PATTERN.match(lines[j]) or lines[j][:1] in (' ', '\t')):
+                    i = j
+                    continue
+                break
+            spans.append((LIST, start, i))
+        else:
+            i += 1
+            while i < n and lines[i].strip() and not _starts_block(lines, i):
+                i += 1
+            spans.append((PARAGRAPH, start, i))
+    return spans
+
+
+@lru_cache(maxsize=64)
+def parse_blocks(text: str) -> Tuple[Block, ...]:
+    """将 Markdown 正文解析为内容块（结果按正文缓存，返回不可变元组）"""
+    lines = text.split('\n')
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+
+    blocks = []
+    for kind, first, last in _scan(lines):
+        start = offsets[first]
+        end = offsets[last] - 1  # 不含最后一行的换行符
+        block_text = text[start:end]
+        blocks.append(Block(_refine_kind(kind, block_text), block_text, start, end))
+    return tuple(blocks)
+
+
+def _refine_kind(kind: str, text: str) -> str:
+    """段落中细分出标签行与独立图片"""
+    if kind != PARAGRAPH:
+        return kind
+    stripped = text.strip()
+    if TAGS_PATTERN.match(stripped):
+        return TAGS
+    if stripped.startswith('![') and '\n' not in stripped:
+        return IMAGE
+    return kind
+
+
+def block_kind(text: str) -> str:
+    """单段文本（如拆分超高块得到的一行）的块类型，取其第一个块（不进缓存）"""
+    spans = _scan(text.split('\n'))
+    return _refine_kind(spans[0][0], text) if spans else PARAGRAPH
+
+
+def split_sections(blocks: Sequence[Block]) -> List[List[Block]]:
+    """按分隔线（---）把块分组，空分组被丢弃"""
+    sections, current = [], []
+    for block in blocks:
+        if block.kind == SEPARATOR:
+            if current:
+                sections.append(current)
+            current = []
+        else:
+            current.append(block)
+    if current:
+        sections.append(current)
+    return sections
+
+
+def section_text(source: str, blocks: Sequence[Block]) -> str:
+    """截取一组连续块在原文中的文本（保留块之间原有的空行）"""
+    return source[blocks[0].start:blocks[-1].end].strip()
+
+
+# ============ 超高块拆分 ============
+
+# 避头 / 避尾标点：不能出现在行首 / 行尾的字符（中文禁则，兼顾英文标点）
+NO_LINE_START = set('，。、；：！？）」』》〉】〕’”…—·%,.;:!?)]}')
+NO_LINE_END = set('（「『《〈【〔‘“([{')
+
+# 成对出现的行内标记，断点落在其中时后退到开标记之前
+INLINE_MARKERS = ('**', '__', '`', '~~')
+# 单个 * 表示的斜体（排除 ** 与列表项、乘号等两侧有空白的 *）
+SINGLE_STAR_PATTERN = re.compile(r'(?<![*\\])\*(?![*\s])|(?<![*\s\\])\*(?!\*)')
+
+
+def align_visible_offsets(source: str, visible: str, offsets: Sequence[int]) -> List[int]:
+    """
+    将渲染后可见文本中的字符位置映射回 Markdown 原文位置
+    逐个匹配非空白字符（原文多出的标记符号被跳过），空白字符不参与对齐以免跨越表格单元格等结构
+    """
+    targets = sorted(offsets)
+    result = []
+    t = 0
+    pos = 0
+    for i, ch in enumerate(visible):
+        if t >= len(targets):
+            break
+        if ch.isspace():
+            continue
+        found = source.find(ch, pos)
+        if found == -1:
+            continue
+        while t < len(targets) and targets[t] <= i:
+            result.append(found)
+            t += 1
+        pos = found + 1
+    result.extend([len(source)] * (len(targets) - t))
+    return result
+
+
+def _line_start(source: str, offset: int) -> int:
+    return source.rfind('\n', 0, offset) + 1
+
+
+def _balance_markers(source: str, start: int, offset: int) -> int:
+    """成对标记或链接未闭合时退到开标记之前"""
+    for marker in INLINE_MARKERS:
+        prefix = source[start:offset]
+        if prefix.count(marker) % 2:
+            offset = start + prefix.rfind(marker)
+    stars = [m.start() for m in SINGLE_STAR_PATTERN.finditer(source, start, offset)]
+    if len(stars) % 2:
+        offset = stars[-1]
+    prefix = source[start:offset]
+    if prefix.rfind('[') > prefix.rfind(')'):
+        offset = start + prefix.rfind('[')
+    return offset
+
+
+def _snap_inline(source: str, start: int, offset: int) -> int:
+    """段落内断点：避开单词中间、行内标记内部与中文禁则"""
+    # 英文单词中间时退到前一个空白
+    if offset < len(source) and source[offset].isascii() and source[offset].isalnum():
+        space = max(source.rfind(' ', start, offset), source.rfind('\n', start, offset))
+        if space > start and offset - space < 40:
+            offset = space + 1
+
+    # 禁则后退可能跨进行内标记，标记后退又可能停在避头 / 避尾标点旁，交替调整直到不再变化
+    while True:
+        snapped = offset
+        # 禁则：下一段不以避头标点开头，本段不以避尾标点结尾
+        while offset > start + 1 and (source[offset] in NO_LINE_START or source[offset - 1] in NO_LINE_END):
+            offset -= 1
+        offset = _balance_markers(source, start, offset)
+        if offset == snapped:
+            return offset
+
+
+def snap_break(source: str, blocks: Sequence[Block], offset: int) -> int:
+    """
+    把原文中的断点调整到所在块允许断开的位置:
+    代码按行、表格按数据行、列表与引用按行首，段落按字符（遵守禁则），其余块整体移到下一张
+    """
+    for block in blocks:
+        if not block.start < offset < block.end:
+            continue
+        line = _line_start(source, offset)
+        if block.kind == CODE:
+            first_row = source.find('\n', block.start) + 1  # 围栏行之后
+            return line if line > first_row else block.start
+        if block.kind == TABLE:
+            first_row = source.find('\n', source.find('\n', block.start) + 1) + 1  # 表头与分隔行之后
+            return line if line > first_row else block.start
+        if block.kind in (LIST, QUOTE):
+            return line if line > block.start else _snap_inline(source, block.start, offset)
+        if block.kind == PARAGRAPH:
+            return _snap_inline(source, block.start, offset)
+        return block.start
+    return offset
+
+
+def breaks_from_visible(source: str, visible: str, visible_offsets: Sequence[int]) -> List[int]:
+    """由可见文本中的断点得出原文切点（已按块结构调整，保证递增）"""
+    blocks = parse_blocks(source)
+    cuts = []
+    last = 0
+    for raw in align_visible_offsets(source, visible, visible_offsets):
+        cut = snap_break(source, blocks, raw)
+        if cut <= last:
+            # 结构边界上无法前进（如整张卡片只放得下半个块），退回按原位置断开
+            cut = raw
+        if last < cut < len(source):
+            cuts.append(cut)
+            last = cut
+    return cuts
+
+
+def cut_source(source: str, offsets: Sequence[int]) -> List[str]:
+    """
+    在给定原文位置处切开，返回各部分文本
+    切点落在围栏代码内时两侧分别补上闭合 / 开头围栏，落在表格内时后半部分补上表头
+    """
+    blocks = parse_blocks(source)
+    cuts = sorted({o for o in offsets if 0 < o < len(source)})
+    parts = []
+    start, prefix = 0, ''
+    for cut in cuts:
+        suffix, next_prefix = '', ''
+        for block in blocks:
+            if block.start < cut < block.end:
+                if block.kind == CODE:
+                    fence_line = source[block.start:source.find('\n', block.start)]
+                    fence = FENCE_PATTERN.match(fence_line).group(2)
+                    suffix, next_prefix = '\n' + fence, fence_line + '\n'
+                elif block.kind == TABLE:
+                    header_end = source.find('\n', source.find('\n', block.start) + 1)
+                    next_prefix = source[block.start:header_end] + '\n'
+                break
+        part = (prefix + source[start:cut].rstrip() + suffix).strip()
+        if part:
+            parts.append(part)
+        start, prefix = cut, next_prefix
+    part = (prefix + source[start:]).strip()
+    if part:
+        parts.append(part)
+    return parts
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+渲染 / 美化工作进程的运行指标
+提供 Counter / Gauge / Histogram 三种指标，按 Prometheus 文本格式导出，
+可通过本地 HTTP 端点暴露，也可定期写入文件（配合 node_exporter textfile collector）
+
+使用方法:
+    from metrics import REGISTRY, serve_metrics, write_metrics
+
+    RENDERS = REGISTRY.counter('xhs_renders_total', '渲染任务数', ('renderer',))
+    RENDERS.labels(renderer='render_xhs').inc()
+
+    serve_metrics(9108)                 # http://127.0.0.1:9108/metrics
+    write_metrics('/tmp/xhs.prom')      # 原子写入文件
+
+命令行:
+    python render_xhs.py note.md --metrics-port 9108
+    python render_xhs_v2.py note.md --metrics-file /var/lib/node_exporter/xhs.prom
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 默认直方图分桶（秒）：覆盖单次探测（几十毫秒）到整篇渲染（几十秒）
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 字节数分桶：卡片 PNG 通常在 100KB ~ 5MB
+BYTES_BUCKETS = (16e3, 64e3, 256e3, 512e3, 1e6, 2e6, 4e6, 8e6)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """指标基类：按标签值维护子序列"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """返回指定标签值对应的子序列"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} 带有标签 {self.labelnames}，请先调用 labels()")
+        return self.labels()
+
+    def collect(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("Counter 只能增加")
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self, name, labelnames, values) -> List[str]:
+        return [f'{name}{_format_labels(labelnames, values)} {_format_value(self._value)}']
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        """进入时 +1，退出时 -1（用于并发页面数、进行中的任务数）"""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self, name, labelnames, values) -> List[str]:
+        return [f'{name}{_format_labels(labelnames, values)} {_format_value(self._value)}']
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default().dec(amount)
+
+    def track_inprogress(self):
+        return self._default().track_inprogress()
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = len(self._buckets)
+        for i, bound in enumerate(self._buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """观测代码块耗时（秒）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self, name, labelnames, values) -> List[str]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._buckets + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labelnames, values)} {_format_value(total)}')
+        lines.append(f'{name}_count{_format_labels(labelnames, values)} {cumulative}')
+        return lines
+
+
+class Histogram(_Metric):
+    """分桶统计（累计分布 + 总和 + 次数）"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class MetricsRegistry:
+    """指标注册表：同名指标只注册一次，重复注册返回已有对象"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同类型或标签注册")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def exposition(self) -> str:
+        """生成 Prometheus 文本格式"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ============ 公共指标 ============
+
+RENDERS = REGISTRY.counter(
+    'xhs_renders_total', '完成的渲染任务数（按渲染器与分页模式）', ('renderer', 'mode', 'status'))
+RENDER_SECONDS = REGISTRY.histogram(
+    'xhs_render_duration_seconds', '单篇笔记渲染耗时（秒）', ('renderer', 'mode'))
+IMAGES = REGISTRY.counter(
+    'xhs_images_rendered_total', '已生成的卡片图片数', ('renderer',))
+PROBES = REGISTRY.counter(
+    'xhs_measure_probes_total', '为测量/切分而进行的页面加载次数', ('renderer',))
+BROWSER_PAGES = REGISTRY.gauge(
+    'xhs_browser_pages_active', '当前打开的浏览器页面数', ('renderer',))
+BYTES_WRITTEN = REGISTRY.counter(
+    'xhs_bytes_written_total', '写出的文件字节数', ('component',))
+IMAGE_BYTES = REGISTRY.histogram(
+    'xhs_image_bytes', '单张输出图片大小（字节）', ('component',), buckets=BYTES_BUCKETS)
+API_CALLS = REGISTRY.counter(
+    'xhs_api_requests_total', '外部 API 请求数', ('service', 'endpoint', 'status'))
+API_SECONDS = REGISTRY.histogram(
+    'xhs_api_request_duration_seconds', '外部 API 请求耗时（秒）', ('service', 'endpoint'))
+API_POLLS = REGISTRY.counter(
+    'xhs_api_polls_total', '异步任务结果轮询次数', ('service',))
+QUEUE_DEPTH = REGISTRY.gauge(
+    'xhs_queue_depth', '等待处理的任务数', ('queue',))
+HEIGHT_CACHE_LOOKUPS = REGISTRY.counter(
+    'xhs_height_cache_lookups_total', '内容块高度缓存查询次数（hit / miss）', ('result',))
+
+
+def status_label(status_code: int) -> str:
+    """HTTP 状态码归并为 2xx / 4xx / 5xx，控制标签基数"""
+    return f'{status_code // 100}xx'
+
+
+@contextmanager
+def track_render(renderer: str, mode: str) -> Iterator[None]:
+    """记录一次渲染任务的耗时与结果"""
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        yield
+        status = 'ok'
+    finally:
+        RENDER_SECONDS.labels(renderer=renderer, mode=mode).observe(time.perf_counter() - start)
+        RENDERS.labels(renderer=renderer, mode=mode, status=status).inc()
+
+
+@contextmanager
+def track_api_call(service: str, endpoint: str) -> Iterator[Dict[str, str]]:
+    """记录一次外部 API 请求；调用方把响应状态写入 yield 出的 dict 的 'status'"""
+    start = time.perf_counter()
+    result = {'status': 'error'}
+    try:
+        yield result
+    finally:
+        API_SECONDS.labels(service=service, endpoint=endpoint).observe(time.perf_counter() - start)
+        API_CALLS.labels(service=service, endpoint=endpoint, status=result['status']).inc()
+
+
+def record_image_written(renderer: str, size: int) -> None:
+    """记录一张输出图片"""
+    IMAGES.labels(renderer=renderer).inc()
+    BYTES_WRITTEN.labels(component=renderer).inc(size)
+    IMAGE_BYTES.labels(component=renderer).observe(size)
+
+
+# ============ 导出 ============
+
+def write_metrics(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """原子写入指标文件（先写临时文件再替换，避免采集到半截内容）"""
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics_', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(registry.exposition())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def serve_metrics(port: int, host: str = '127.0.0.1', registry: MetricsRegistry = REGISTRY):
+    """在后台线程中启动 /metrics HTTP 端点，返回 server（调用 shutdown() 停止）"""
+    # http.server 导入较慢，只在开启端点时加载
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.exposition().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='xhs-metrics', daemon=True)
+    thread.start()
+    return server
+
+
+class _PeriodicWriter(threading.Thread):
+    """定期把指标写入文件"""
+
+    def __init__(self, path: str, interval: float):
+        super().__init__(name='xhs-metrics-writer', daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            write_metrics(self.path)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        write_metrics(self.path)
+
+
+def add_metrics_arguments(parser) -> None:
+    """为命令行添加 --metrics-port / --metrics-file 参数"""
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=None,
+        help='在本地端口暴露 Prometheus 指标（/metrics）'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        default=None,
+        help='定期将 Prometheus 指标写入文件'
+    )
+    parser.add_argument(
+        '--metrics-interval',
+        type=float,
+        default=15.0,
+        help='写入指标文件的间隔秒数（默认: 15）'
+    )
+
+
+@contextmanager
+def metrics_from_args(args) -> Iterator[None]:
+    """根据命令行参数启动指标端点 / 文件写出，退出时写出最终结果"""
+    server = None
+    writer: Optional[_PeriodicWriter] = None
+
+    if getattr(args, 'metrics_port', None):
+        server = serve_metrics(args.metrics_port)
+        print(f"📈 指标端点: http://127.0.0.1:{args.metrics_port}/metrics")
+    if getattr(args, 'metrics_file', None):
+        writer = _PeriodicWriter(args.metrics_file, args.metrics_interval)
+        writer.start()
+
+    try:
+        yield
+    finally:
+        if writer is not None:
+            writer.stop()
+            print(f"📈 指标已写入: {args.metrics_file}")
+        if server is not None:
+            server.shutdown()
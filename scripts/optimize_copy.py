@@ -5,8 +5,57 @@
 """
 
 import argparse
+import json
 import sys
 from pathlib import Path
+from typing import Any, Iterator
+
+def read_drafts(path: str) -> Iterator[Any]:
+    """逐行读取 JSONL 草稿：每行为 JSON 字符串、{"id", "content"} 对象或纯文本"""
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def run_batch(args) -> None:
+    """批量模式：流式读取草稿，逐条输出 JSONL 结果"""
+    sys.path.insert(0, str(Path(__file__).parent))
+    from copywriter import optimize_batch
+
+    frameworks = args.frameworks if args.content_type == 'post' else None
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+
+    count = 0
+    try:
+        for record in optimize_batch(
+            read_drafts(args.batch),
+            frameworks=frameworks,
+            content_type=args.content_type,
+            workers=args.workers,
+            template_pack=args.template_pack,
+            seed=args.seed
+        ):
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    # 输出到 stdout 时进度信息写到 stderr，避免污染 JSONL
+    print(f"✅ 批量优化完成: {count} 条", file=sys.stderr)
+    if args.output:
+        print(f"📄 结果已保存到: {args.output}", file=sys.stderr)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -28,6 +77,12 @@ def main():
 
   # 保存到文件
   python optimize_copy.py "内容" --output optimized.md
+
+  # 批量优化 JSONL 草稿（每行一个字符串或 {"id", "content"}）
+  python optimize_copy.py --batch drafts.jsonl --frameworks tutorial --workers 8 -o out.jsonl
+
+  # 使用团队自定义模板包
+  python optimize_copy.py "内容" --template-pack templates/team.yaml
         '''
     )
 
@@ -61,6 +116,36 @@ def main():
         help='输出文件路径'
     )
 
+    parser.add_argument(
+        '--batch', '-b',
+        help='批量模式：从 JSONL 文件读取草稿（- 表示标准输入），结果以 JSONL 输出'
+    )
+
+    parser.add_argument(
+        '--frameworks',
+        nargs='+',
+        choices=['problem_solution', 'tutorial', 'review', 'lifestyle'],
+        help='批量模式下需要生成的框架（默认: 全部）'
+    )
+
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        default=1,
+        help='批量模式的进程数（默认: 1）'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        help='随机种子，指定后输出可复现'
+    )
+
+    parser.add_argument(
+        '--template-pack',
+        help='自定义模板包路径（JSON/YAML，按分类覆盖内置模板）'
+    )
+
     parser.add_argument(
         '--show-analysis',
         action='store_true',
@@ -69,6 +154,25 @@ def main():
 
     args = parser.parse_args()
 
+    if args.template_pack:
+        # 模板包先行加载校验，格式错误时直接报错退出（批量模式的提示写到 stderr，避免污染 JSONL）
+        sys.path.insert(0, str(Path(__file__).parent))
+        from copywriter import load_template_pack
+
+        try:
+            load_template_pack(args.template_pack)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"❌ 模板包加载失败: {e}", file=sys.stderr if args.batch else sys.stdout)
+            sys.exit(1)
+
+    if args.batch:
+        try:
+            run_batch(args)
+        except Exception as e:
+            print(f"❌ 批量优化失败: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
     # 获取输入内容
     if args.file:
         try:
@@ -94,8 +198,13 @@ def main():
 
         # 优化文案
         print("📝 正��优化文案...")
-        copywriter = XiaohongshuCopywriter()
-        result = copywriter.optimize_content(content, content_type=args.content_type)
+        copywriter = XiaohongshuCopywriter(args.template_pack)
+        result = copywriter.optimize_content(
+            content,
+            content_type=args.content_type,
+            frameworks=[args.framework],
+            seed=args.seed
+        )
 
         # 显示分析结果
         if args.show_analysis:
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+PNG 分块纵向拼接（流式写出）
+超高卡片按固定高度分块截图，再把各块的扫描线依次解压、重新压缩写入同一个 PNG，
+不需要 PIL，也不需要在内存中保留整张图片：内存占用只与单个分块有关
+
+PNG 每行扫描线自带过滤类型，Up / Average / Paeth 依赖上一行；分块拼接后只有每块的第一行
+会错误地引用上一块的最后一行，因此只需把每块第一行还原为原始像素（过滤类型 None），其余字节原样保留
+
+使用方法:
+    with open('card.png', 'wb') as f:
+        writer = StreamingPNGWriter(f)
+        for tile in tiles:
+            writer.add(tile)
+        writer.close()
+
+    # 分块已写入临时文件时（如在进程池中拼接）
+    size = stitch_png_files('card.png', ['card.png.tile0', 'card.png.tile1'])
+"""
+
+import os
+import struct
+import zlib
+from typing import BinaryIO, Iterator, Optional, Sequence, Tuple
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 颜色类型 -> 每像素通道数（不支持调色板：各分块的调色板互不相同）
+CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+
+IDAT_CHUNK_SIZE = 1 << 16
+
+
+def iter_chunks(png: bytes) -> Iterator[Tuple[bytes, bytes]]:
+    """依次返回 PNG 中的（块类型, 数据）"""
+    if not png.startswith(PNG_SIGNATURE):
+        raise ValueError("不是有效的 PNG 数据")
+    pos = len(PNG_SIGNATURE)
+    while pos < len(png):
+        length, kind = struct.unpack('>I4s', png[pos:pos + 8])
+        yield kind, png[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def _write_chunk(out: BinaryIO, kind: bytes, data: bytes) -> None:
+    out.write(struct.pack('>I', len(data)))
+    out.write(kind)
+    out.write(data)
+    out.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+
+def _unfilter_first_row(row: bytes, bpp: int) -> bytes:
+    """把分块第一行（上一行视为全零）还原为原始像素，返回过滤类型为 None 的扫描线"""
+    filter_type, line = row[0], bytearray(row[1:])
+    if filter_type in (1, 4):
+        # Sub；上一行全零时 Paeth 的预测值恒为左侧像素，与 Sub 相同
+        for i in range(bpp, len(line)):
+            line[i] = (line[i] + line[i - bpp]) & 0xFF
+    elif filter_type == 3:
+        # Average：上一行全零时只取左侧像素的一半
+        for i in range(bpp, len(line)):
+            line[i] = (line[i] + (line[i - bpp] >> 1)) & 0xFF
+    # None / Up（上一行全零）无需处理
+    return b'\x00' + bytes(line)
+
+
+class StreamingPNGWriter:
+    """把等宽的 PNG 分块自上而下拼接写入可随机访问的文件，close 时回填总高度"""
+
+    def __init__(self, out: BinaryIO, level: int = 6):
+        self.out = out
+        self.height = 0
+        self._header: Optional[Tuple[int, int, int]] = None
+        self._ihdr_pos = 0
+        self._compressor = zlib.compressobj(level)
+        self._pending = bytearray()
+
+    def add(self, png: bytes) -> None:
+        """追加一个分块（宽度、位深与颜色类型须与第一个分块一致，且不能隔行扫描）"""
+        chunks = iter_chunks(png)
+        kind, ihdr = next(chunks)
+        if kind != b'IHDR':
+            raise ValueError("PNG 缺少 IHDR")
+        width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', ihdr)
+        if interlace or color_type not in CHANNELS:
+            raise ValueError(f"不支持的 PNG 格式（颜色类型 {color_type}，隔行 {interlace}）")
+        if self._header is None:
+            self._start(ihdr)
+            self._header = (width, bit_depth, color_type)
+        elif self._header != (width, bit_depth, color_type):
+            raise ValueError(f"分块格式不一致: {self._header} != {(width, bit_depth, color_type)}")
+
+        bits = CHANNELS[color_type] * bit_depth
+        bpp = max(1, bits // 8)
+        row_bytes = 1 + (width * bits + 7) // 8
+
+        # 逐个 IDAT 解压，第一行凑齐后还原，其余数据直接送入压缩器
+        decompressor = zlib.decompressobj()
+        first_row = bytearray()
+        for kind, data in chunks:
+            if kind != b'IDAT':
+                continue
+            raw = decompressor.decompress(data)
+            if len(first_row) < row_bytes:
+                take = row_bytes - len(first_row)
+                first_row += raw[:take]
+                raw = raw[take:]
+                if len(first_row) == row_bytes:
+                    self._feed(_unfilter_first_row(bytes(first_row), bpp))
+            if raw:
+                self._feed(raw)
+        tail = decompressor.flush()
+        if tail:
+            self._feed(tail)
+        self.height += height
+
+    def close(self) -> None:
+        """写出剩余数据与 IEND，并回填 IHDR 中的总高度"""
+        if self._header is None:
+            raise ValueError("没有任何分块")
+        self._pending += self._compressor.flush()
+        self._flush_pending(force=True)
+        _write_chunk(self.out, b'IEND', b'')
+
+        end = self.out.tell()
+        self.out.seek(self._ihdr_pos)
+        ihdr = bytearray(self._ihdr)
+        ihdr[4:8] = struct.pack('>I', self.height)
+        _write_chunk(self.out, b'IHDR', bytes(ihdr))
+        self.out.seek(end)
+
+    def _start(self, ihdr: bytes) -> None:
+        self.out.write(PNG_SIGNATURE)
+        self._ihdr_pos = self.out.tell()
+        self._ihdr = ihdr
+        _write_chunk(self.out, b'IHDR', ihdr)  # 高度在 close 时回填
+
+    def _feed(self, data: bytes) -> None:
+        self._pending += self._compressor.compress(data)
+        self._flush_pending()
+
+    def _flush_pending(self, force: bool = False) -> None:
+        while len(self._pending) >= IDAT_CHUNK_SIZE or (force and self._pending):
+            _write_chunk(self.out, b'IDAT', bytes(self._pending[:IDAT_CHUNK_SIZE]))
+            del self._pending[:IDAT_CHUNK_SIZE]
+
+
+def stitch_png_files(output_path: str, tile_paths: Sequence[str]) -> int:
+    """把分块文件依次拼接写入 output_path 并删除分块，返回写出的字节数（可在子进程中执行）"""
+    try:
+        with open(output_path, 'wb') as out:
+            writer = StreamingPNGWriter(out)
+            for path in tile_paths:
+                with open(path, 'rb') as f:
+                    writer.add(f.read())
+            writer.close()
+            return out.tell()
+    finally:
+        for path in tile_paths:
+            if os.path.exists(path):
+                os.remove(path)
@@ -24,6 +24,7 @@
 """
 
 import argparse
+import importlib
 import os
 import sys
 import json
@@ -31,17 +32,23 @@ import re
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
-try:
-    from dotenv import load_dotenv
-    import requests
-except ImportError as e:
-    print(f"缺少依赖: {e}")
-    print("请运行: pip install python-dotenv requests")
-    sys.exit(1)
+from tracing import add_trace_arguments, set_attributes, traced, tracing_from_args
+
+
+def require(module: str):
+    """按需导入依赖（dotenv / requests），缺失时提示安装并退出"""
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        print(f"缺少依赖: {e}")
+        print("请运行: pip install python-dotenv requests")
+        sys.exit(1)
 
 
 def load_cookie() -> str:
     """从 .env 文件加载 Cookie"""
+    load_dotenv = require('dotenv').load_dotenv
+
     # 尝试从多个位置加载 .env
     env_paths = [
         Path.cwd() / '.env',
@@ -101,6 +108,7 @@ def get_api_url() -> str:
     return os.getenv('XHS_API_URL', 'http://localhost:5005')
 
 
+@traced()
 def validate_images(image_paths: List[str]) -> List[str]:
     """验证图片文件是否存在"""
     valid_images = []
@@ -124,6 +132,7 @@ class LocalPublisher:
         self.cookie = cookie
         self.client = None
         
+    @traced('publish.init_client')
     def init_client(self):
         """初始化 xhs 客户端"""
         try:
@@ -156,9 +165,11 @@ class LocalPublisher:
             print(f"⚠️ 无法获取用户信息: {e}")
             return None
     
+    @traced('publish')
     def publish(self, title: str, desc: str, images: List[str], 
                 is_private: bool = False, post_time: str = None) -> Dict[str, Any]:
         """发布图文笔记"""
+        set_attributes(mode='local', images=len(images), private=is_private)
         print(f"\n🚀 准备发布笔记（本地模式）...")
         print(f"  📌 标题: {title}")
         print(f"  📝 描述: {desc[:50]}..." if len(desc) > 50 else f"  📝 描述: {desc}")
@@ -208,17 +219,20 @@ class ApiPublisher:
         self.cookie = cookie
         self.api_url = api_url or get_api_url()
         self.session_id = 'md2redbook_session'
+        # requests 只有 API 模式需要，本地模式不加载
+        self.requests = require('requests')
         
+    @traced('publish.init_client')
     def init_client(self):
         """初始化 API 客户端"""
         print(f"📡 连接 API 服务: {self.api_url}")
         
         # 健康检查
         try:
-            resp = requests.get(f"{self.api_url}/health", timeout=5)
+            resp = self.requests.get(f"{self.api_url}/health", timeout=5)
             if resp.status_code != 200:
                 raise Exception("API 服务不可用")
-        except requests.exceptions.RequestException as e:
+        except self.requests.exceptions.RequestException as e:
             print(f"❌ 无法连接到 API 服务: {e}")
             print(f"\n💡 请确保 xhs-api 服务已启动：")
             print(f"   cd xhs-api && python app_full.py")
@@ -226,7 +240,7 @@ class ApiPublisher:
         
         # 初始化 session
         try:
-            resp = requests.post(
+            resp = self.requests.post(
                 f"{self.api_url}/init",
                 json={
                     "session_id": self.session_id,
@@ -253,7 +267,7 @@ class ApiPublisher:
     def get_user_info(self) -> Optional[Dict[str, Any]]:
         """获取当前登录用户信息"""
         try:
-            resp = requests.post(
+            resp = self.requests.post(
                 f"{self.api_url}/user/info",
                 json={"session_id": self.session_id},
                 timeout=10
@@ -269,9 +283,11 @@ class ApiPublisher:
             print(f"⚠️ 无法获取用户信息: {e}")
             return None
     
+    @traced('publish')
     def publish(self, title: str, desc: str, images: List[str], 
                 is_private: bool = False, post_time: str = None) -> Dict[str, Any]:
         """发布图文笔记"""
+        set_attributes(mode='api', images=len(images), private=is_private)
         print(f"\n🚀 准备发布笔记（API 模式）...")
         print(f"  📌 标题: {title}")
         print(f"  📝 描述: {desc[:50]}..." if len(desc) > 50 else f"  📝 描述: {desc}")
@@ -288,7 +304,7 @@ class ApiPublisher:
             if post_time:
                 payload["post_time"] = post_time
             
-            resp = requests.post(
+            resp = self.requests.post(
                 f"{self.api_url}/publish/image",
                 json=payload,
                 timeout=120
@@ -373,6 +389,7 @@ def main():
         action='store_true',
         help='仅验证，不实际发布'
     )
+    add_trace_arguments(parser)
     
     args = parser.parse_args()
     
@@ -401,26 +418,27 @@ def main():
         print("\n✅ 验证通过，可以发布")
         return
     
-    # 选择发布方式
-    if args.api_mode:
-        publisher = ApiPublisher(cookie, args.api_url)
-    else:
-        publisher = LocalPublisher(cookie)
-    
-    # 初始化客户端
-    publisher.init_client()
-    
-    # 发布笔记
-    try:
-        publisher.publish(
-            title=args.title,
-            desc=args.desc,
-            images=valid_images,
-            is_private=args.private,
-            post_time=args.post_time
-        )
-    except Exception as e:
-        sys.exit(1)
+    with tracing_from_args(args, 'publish_xhs'):
+        # 选择发布方式
+        if args.api_mode:
+            publisher = ApiPublisher(cookie, args.api_url)
+        else:
+            publisher = LocalPublisher(cookie)
+        
+        # 初始化客户端
+        publisher.init_client()
+        
+        # 发布笔记
+        try:
+            publisher.publish(
+                title=args.title,
+                desc=args.desc,
+                images=valid_images,
+                is_private=args.private,
+                post_time=args.post_time
+            )
+        except Exception as e:
+            sys.exit(1)
 
 
 if __name__ == '__main__':
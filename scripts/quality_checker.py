@@ -5,11 +5,168 @@
 """
 
 import os
+import io
 import json
+import importlib.util
+import struct
+import sys
+from collections import deque
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple, Optional, TextIO, Union
 import re
 
+# 图片来源：文件路径、bytes 或二进制文件对象（如 BytesIO）
+ImageSource = Union[str, os.PathLike, bytes, bytearray, BinaryIO]
+
+# 批量检查默认线程数
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# 每个线程最多排队的任务数：输入再多，同时持有的图片也只有 线程数 × 该值 张
+QUEUE_PER_WORKER = 2
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 渲染 / 美化流程依赖的第三方模块
+REQUIRED_MODULES = ('markdown', 'yaml', 'playwright', 'requests', 'PIL')
+
+
+def _image_name(image: ImageSource) -> str:
+    if isinstance(image, (str, os.PathLike)):
+        return Path(image).name
+    return getattr(image, 'name', None) or '<buffer>'
+
+
+def _ordered_map(executor, fn, items: Iterable, window: int) -> Iterator:
+    """有界的 executor.map：最多 window 个任务在排队或执行，按输入顺序产出结果"""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _parse_png_header(head: bytes) -> Optional[Tuple[int, int]]:
+    """从 PNG 文件头（IHDR）直接读取宽高"""
+    if len(head) >= 24 and head[:8] == PNG_SIGNATURE and head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24])
+    return None
+
+
+def _header_size(stream: BinaryIO) -> Tuple[int, int]:
+    """读取文件对象中的图片尺寸，PNG 走快速路径，其它格式交给 PIL（只解析头部）"""
+    start = stream.tell()
+    size = _parse_png_header(stream.read(24))
+    stream.seek(start)
+    if size:
+        return size
+
+    from PIL import Image
+    with Image.open(stream) as img:
+        return img.size
+
+
+def read_image_header(image: ImageSource) -> Tuple[int, int, int]:
+    """只读取图片头部，返回 (宽, 高, 字节数)"""
+    if isinstance(image, (bytes, bytearray)):
+        width, height = _header_size(io.BytesIO(image))
+        return width, height, len(image)
+
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, 'rb') as f:
+            size_bytes = os.fstat(f.fileno()).st_size
+            width, height = _header_size(f)
+        return width, height, size_bytes
+
+    # 文件对象：通过 seek 获取长度，检查后恢复原位置
+    start = image.tell()
+    size_bytes = image.seek(0, io.SEEK_END) - start
+    image.seek(start)
+    width, height = _header_size(image)
+    image.seek(start)
+    return width, height, size_bytes
+
+
+# 像素检查：统一降采样到固定尺寸（宽, 高）后做向量化分析
+PIXEL_SAMPLE_SIZE = (270, 360)
+PIXEL_BATCH_SIZE = 64
+# 相邻像素亮度差超过该值视为边缘（文字笔画）
+EDGE_THRESHOLD = 0.08
+# 一行中边缘像素占比超过该值视为有内容
+ROW_CONTENT_RATIO = 0.005
+# 分析区域：横向裁掉卡片圆角和右下角页码，底部条带用于检测溢出
+CROP_LEFT = 0.08
+CROP_RIGHT = 0.80
+BOTTOM_BAND = 0.08
+# 告警阈值
+CONTRAST_PERCENTILE = 99.5
+BLANK_RATIO_THRESHOLD = 0.97
+LOW_CONTRAST_THRESHOLD = 0.25
+
+
+def load_gray_pixels(image: ImageSource, size: Tuple[int, int] = PIXEL_SAMPLE_SIZE):
+    """解码图片并降采样为灰度数组（float32，取值 0~1）"""
+    import numpy as np
+    from PIL import Image
+
+    if isinstance(image, (bytes, bytearray)):
+        image = io.BytesIO(image)
+    start = None if isinstance(image, (str, os.PathLike)) else image.tell()
+
+    try:
+        with Image.open(image) as img:
+            # JPEG 可在解码阶段直接缩小，避免解出全尺寸像素
+            img.draft('L', size)
+            gray = img.convert('L').resize(size, Image.BOX)
+            return np.asarray(gray, dtype=np.float32) / 255.0
+    finally:
+        if start is not None:
+            image.seek(start)
+
+
+def analyze_pixel_batch(batch) -> List[Dict[str, Any]]:
+    """对一批灰度图 (N, H, W) 做向量化检查：空白比例、底部溢出、对比度"""
+    import numpy as np
+
+    n, h, w = batch.shape
+    region = batch[:, :, int(w * CROP_LEFT):int(w * CROP_RIGHT)]
+
+    # 只用水平方向亮度差判断内容，平滑渐变背景和卡片上下边框不会被误判
+    dx = np.abs(np.diff(region, axis=2))
+    edges = dx > EDGE_THRESHOLD
+    content_rows = edges.mean(axis=2) > ROW_CONTENT_RATIO
+
+    whitespace_ratio = 1.0 - content_rows.mean(axis=1)
+    band = max(1, int(h * BOTTOM_BAND))
+    bottom_rows = content_rows[:, h - band:].sum(axis=1)
+
+    # 对比度：文字笔画处的亮度阶跃，取水平亮度差的高分位数，
+    # 只反映文字与其局部背景的差异，不受大面积背景色影响
+    contrast = np.percentile(dx.reshape(n, -1), CONTRAST_PERCENTILE, axis=1)
+
+    results = []
+    for i in range(n):
+        issues = []
+        # 空白卡片与底部截断是渲染失败，对比度偏低只作提示
+        blank = bool(whitespace_ratio[i] > BLANK_RATIO_THRESHOLD)
+        clipped = not blank and bool(bottom_rows[i] >= 2)
+        if blank:
+            issues.append(f"🫥 卡片内容几乎为空: 空白比例 {whitespace_ratio[i]:.0%}")
+        else:
+            if clipped:
+                issues.append(f"✂️ 底部边缘检测到内容（{int(bottom_rows[i])} 行），可能被截断")
+            if contrast[i] < LOW_CONTRAST_THRESHOLD:
+                issues.append(f"🌫️ 文字对比度偏低: {contrast[i]:.2f}")
+        results.append({
+            "ok": not (blank or clipped),
+            "whitespace_ratio": round(float(whitespace_ratio[i]), 3),
+            "bottom_content_rows": int(bottom_rows[i]),
+            "contrast": round(float(contrast[i]), 3),
+            "issues": issues
+        })
+    return results
+
 class QualityChecker:
     """质量检查器"""
 
@@ -38,15 +195,10 @@ class QualityChecker:
             if key not in config or not config[key]:
                 issues.append(f"❌ 缺少必要配置: {key}")
 
-        # 检查依赖模块
-        try:
-            import markdown
-            import yaml
-            from playwright.async_api import async_playwright
-            import requests
-            from PIL import Image
-        except ImportError as e:
-            issues.append(f"❌ 缺少依赖模块: {e}")
+        # 检查依赖模块（只查找不导入，避免加载 playwright 等重量级模块）
+        missing = [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+        if missing:
+            issues.append(f"❌ 缺少依赖模块: {', '.join(missing)}")
 
         if not issues:
             issues.append("✅ 配置检查通过")
@@ -117,17 +269,34 @@ class QualityChecker:
 
         return max(0, score), suggestions
 
-    def check_image_quality(self, image_path: str) -> Tuple[bool, List[str]]:
+    def check_image_quality(self, image_path: ImageSource) -> Tuple[bool, List[str]]:
         """检查图片质量"""
-        issues = []
-
-        if not os.path.exists(image_path):
-            return False, ["❌ 图片文件不存在"]
+        result = self.check_image(image_path)
+        return result["ok"], result["issues"]
+
+    def check_image(self, image: ImageSource, name: Optional[str] = None) -> Dict[str, Any]:
+        """检查单张图片（路径、bytes 或文件对象），返回结构化结果
+
+        只读取图片头部获取尺寸，不解码像素数据
+        """
+        result = {
+            "name": name or _image_name(image),
+            "ok": False,
+            "width": None,
+            "height": None,
+            "size_kb": None,
+            "issues": []
+        }
+        issues = result["issues"]
+
+        if isinstance(image, (str, os.PathLike)) and not os.path.exists(image):
+            issues.append("❌ 图片文件不存在")
+            return result
 
         try:
-            from PIL import Image
-            img = Image.open(image_path)
-            width, height = img.size
+            width, height, size_bytes = read_image_header(image)
+            file_size = size_bytes / 1024  # KB
+            result.update(width=width, height=height, size_kb=round(file_size, 1))
 
             # 检查尺寸比例
             ratio = width / height
@@ -141,7 +310,6 @@ class QualityChecker:
                 issues.append(f"📱 分辨率过低: {width}x{height}, 建议: 1080x1440")
 
             # 检查文件大小
-            file_size = os.path.getsize(image_path) / 1024  # KB
             if file_size > 2048:  # 2MB
                 issues.append(f"💾 文件过大: {file_size:.1f}KB, 建议压缩")
             elif file_size < 50:  # 50KB
@@ -152,43 +320,163 @@ class QualityChecker:
 
         except Exception as e:
             issues.append(f"❌ 图片检查失败: {e}")
-            return False, issues
-
-        return len([i for i in issues if i.startswith("❌")]) == 0, issues
-
-    def generate_quality_report(self, content_file: str, image_files: List[str]) -> str:
-        """生成质量报告"""
-        report = ["=" * 50]
-        report.append("📊 小红书内容质量报告")
-        report.append("=" * 50)
-
-        # 配置检查
+            return result
+
+        result["ok"] = len([i for i in issues if i.startswith("❌")]) == 0
+        return result
+
+    def iter_image_checks(self, images: Iterable[ImageSource],
+                          workers: int = DEFAULT_WORKERS) -> Iterator[Dict[str, Any]]:
+        """在线程池中并行检查图片，按输入顺序逐条产出结果"""
+        if workers <= 1:
+            for image in images:
+                yield self.check_image(image)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from _ordered_map(executor, self.check_image, images, workers * QUEUE_PER_WORKER)
+
+    def iter_quality_report(self, content_file: str, image_files: Iterable[ImageSource],
+                            workers: int = DEFAULT_WORKERS,
+                            pixel_checks: bool = False) -> Iterator[Dict[str, Any]]:
+        """逐段产出结构化的质量报告记录（config / content / image / summary）"""
         config_ok, config_issues = self.check_configuration()
-        report.append("\n🔧 配置检查:")
-        report.extend([f"  {issue}" for issue in config_issues])
+        yield {"type": "config", "ok": config_ok, "issues": config_issues}
 
-        # 内容质量检查
         if os.path.exists(content_file):
             with open(content_file, 'r', encoding='utf-8') as f:
                 content = f.read()
             score, suggestions = self.check_content_quality(content)
+            yield {"type": "content", "exists": True, "score": score, "suggestions": suggestions}
+        else:
+            yield {"type": "content", "exists": False, "score": None, "suggestions": []}
 
-            report.append(f"\n📝 内容质量评分: {score}/100")
-            if suggestions:
-                report.append("💡 优化建议:")
-                report.extend([f"  {suggestion}" for suggestion in suggestions])
+        if pixel_checks:
+            checks = self.iter_image_checks_with_pixels(image_files, workers)
         else:
-            report.append("\n❌ 内容文件不存在")
+            checks = self.iter_image_checks(image_files, workers)
+
+        total = 0
+        failed = 0
+        for index, check in enumerate(checks, 1):
+            total += 1
+            if not check["ok"]:
+                failed += 1
+            yield {"type": "image", "index": index, **check}
+
+        yield {"type": "summary", "images": total, "failed": failed}
+
+    def _check_with_pixels(self, image: ImageSource) -> Tuple[Dict[str, Any], Any]:
+        """在同一个任务中依次读取头部并解码像素，同一图片来源不会被两个线程交错读取"""
+        check = self.check_image(image)
+        if not check["ok"]:
+            # 基础检查失败（文件不存在、无法读取）时不再解码
+            return check, None
+        try:
+            return check, load_gray_pixels(image)
+        except Exception as e:
+            return check, e
+
+    def iter_image_checks_with_pixels(self, images: Iterable[ImageSource],
+                                      workers: int = DEFAULT_WORKERS,
+                                      batch_size: int = PIXEL_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """基础检查与像素检查合并为一轮：每张图片只打开一次，分批做向量化分析，按输入顺序逐条产出"""
+        from concurrent.futures import ThreadPoolExecutor
+        import numpy as np
+
+        iterator = iter(images)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            while True:
+                chunk = list(islice(iterator, batch_size))
+                if not chunk:
+                    return
+                loaded = list(executor.map(self._check_with_pixels, chunk))
+                valid = [a for _, a in loaded if a is not None and not isinstance(a, Exception)]
+                analyzed = iter(analyze_pixel_batch(np.stack(valid)) if valid else [])
+                for check, array in loaded:
+                    if isinstance(array, Exception):
+                        self._merge_pixels(check, {"ok": False, "error": str(array),
+                                                   "issues": [f"❌ 像素检查失败: {array}"]})
+                    elif array is not None:
+                        self._merge_pixels(check, next(analyzed))
+                    yield check
+
+    @staticmethod
+    def _merge_pixels(check: Dict[str, Any], pixels: Dict[str, Any]) -> None:
+        """把像素检查结果合并进基础检查记录：空白、截断或无法解码的图片判为未通过"""
+        issues = pixels.get("issues", [])
+        if issues:
+            check["issues"] = [i for i in check["issues"] if not i.startswith("✅")] + issues
+        if not pixels.get("ok", True):
+            check["ok"] = False
+        check["pixels"] = {k: v for k, v in pixels.items() if k not in ("issues", "ok")}
+
+    def iter_report_lines(self, records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """将结构化记录格式化为文本报告行"""
+        yield "=" * 50
+        yield "📊 小红书内容质量报告"
+        yield "=" * 50
+
+        image_header_done = False
+        for record in records:
+            kind = record["type"]
+            if kind == "config":
+                yield "\n🔧 配置检查:"
+                for issue in record["issues"]:
+                    yield f"  {issue}"
+            elif kind == "content":
+                if not record["exists"]:
+                    yield "\n❌ 内容文件不存在"
+                    continue
+                yield f"\n📝 内容质量评分: {record['score']}/100"
+                if record["suggestions"]:
+                    yield "💡 优化建议:"
+                    for suggestion in record["suggestions"]:
+                        yield f"  {suggestion}"
+            elif kind == "image":
+                if not image_header_done:
+                    yield "\n🖼️ 图片质量检查:"
+                    image_header_done = True
+                yield f"  图片 {record['index']}: {record['name']}"
+                for issue in record["issues"]:
+                    yield f"    {issue}"
+            elif kind == "summary":
+                yield f"\n📈 共检查 {record['images']} 张图片，{record['failed']} 张未通过"
+
+        yield "\n" + "=" * 50
+
+    def write_quality_report(self, out: TextIO, content_file: str,
+                             image_files: Iterable[ImageSource],
+                             fmt: str = "text", workers: int = DEFAULT_WORKERS,
+                             pixel_checks: bool = False) -> None:
+        """流式写出质量报告，fmt 为 text 或 json（JSON Lines）"""
+        records = self.iter_quality_report(content_file, image_files, workers, pixel_checks)
+        if fmt == "json":
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            for line in self.iter_report_lines(records):
+                out.write(line + "\n")
+
+    def generate_quality_report(self, content_file: str, image_files: List[ImageSource],
+                                workers: int = DEFAULT_WORKERS,
+                                pixel_checks: bool = False) -> str:
+        """生成质量报告"""
+        records = self.iter_quality_report(content_file, image_files, workers, pixel_checks)
+        return "\n".join(self.iter_report_lines(records))
+
 
-        # 图片质量检查
-        report.append(f"\n🖼️ 图片质量检查 ({len(image_files)} 张):")
-        for i, img_file in enumerate(image_files, 1):
-            img_ok, img_issues = self.check_image_quality(img_file)
-            report.append(f"  图片 {i}: {Path(img_file).name}")
-            report.extend([f"    {issue}" for issue in img_issues])
+class _Tee:
+    """同时写入多个文本流"""
+
+    def __init__(self, *streams: TextIO):
+        self.streams = streams
+
+    def write(self, text: str) -> None:
+        for stream in self.streams:
+            stream.write(text)
 
-        report.append("\n" + "=" * 50)
-        return "\n".join(report)
 
 def main():
     """命令行工具"""
@@ -198,19 +486,36 @@ def main():
     parser.add_argument('--content', help='内容文件路径')
     parser.add_argument('--images', nargs='+', help='图片文件路径列表')
     parser.add_argument('--output', help='报告输出文件路径')
+    parser.add_argument('--format', choices=['text', 'json'], default='text',
+                        help='报告格式：text 文本，json 为 JSON Lines（默认: text）')
+    parser.add_argument('--workers', '-j', type=int, default=DEFAULT_WORKERS,
+                        help=f'图片检查线程数（默认: {DEFAULT_WORKERS}）')
+    parser.add_argument('--pixel-checks', action='store_true',
+                        help='启用像素级检查：空白卡片、底部内容截断、低对比度（需要 numpy）')
 
     args = parser.parse_args()
 
     checker = QualityChecker()
 
-    if args.content and args.images:
-        report = checker.generate_quality_report(args.content, args.images)
-        print(report)
+    if args.pixel_checks:
+        try:
+            import numpy
+        except ImportError:
+            print("❌ 像素检查需要 numpy 和 Pillow: pip install numpy pillow")
+            sys.exit(1)
 
+    if args.content and args.images:
+        # 边检查边输出，不在内存中拼接整份报告
         if args.output:
             with open(args.output, 'w', encoding='utf-8') as f:
-                f.write(report)
-            print(f"\n📄 报告已保存: {args.output}")
+                checker.write_quality_report(_Tee(sys.stdout, f), args.content, args.images,
+                                             fmt=args.format, workers=args.workers,
+                                             pixel_checks=args.pixel_checks)
+            print(f"\n📄 报告已保存: {args.output}", file=sys.stderr if args.format == 'json' else sys.stdout)
+        else:
+            checker.write_quality_report(sys.stdout, args.content, args.images,
+                                         fmt=args.format, workers=args.workers,
+                                         pixel_checks=args.pixel_checks)
     else:
         # 只检查配置
         config_ok, config_issues = checker.check_configuration()
@@ -219,4 +524,4 @@ def main():
             print(f"  {issue}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
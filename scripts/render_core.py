@@ -0,0 +1,1419 @@
+#!/usr/bin/env python3
+"""
+小红书卡片渲染核心
+render_xhs.py / render_xhs_v2.py / render_xhs_v4.py 共用的渲染引擎
+
+组成:
+    - Markdown 解析与转换: parse_markdown_file / split_content_by_separator / convert_markdown_to_html
+      （内容块解析见 markdown_blocks.py，最优分页见 paginator.py）
+    - 浏览器生命周期: BrowserSession（一篇笔记只启动一次浏览器，复用同一页面）
+    - 计算任务: 卡片 HTML 生成、PNG 分块拼接与图片缩放在进程池中执行（见 render_pool.py）
+    - 分页策略: PagingStrategy 及 separator / auto-fit / auto-split / dynamic / smart-split / fragment，
+      可通过 register_paging_strategy 扩展
+    - 样式提供者: 见 card_styles.py（StyleProvider）
+    - 渲染入口: render_note / render_variants（一篇笔记的多个样式 / 尺寸变体）/ render_html_to_image
+
+使用方法:
+    from card_styles import get_style_provider
+    from render_core import get_paging_strategy, render_note
+
+    result = asyncio.run(render_note(
+        'note.md', 'output/', get_style_provider('retro'), get_paging_strategy('auto-split')
+    ))
+    print(result.images)
+"""
+
+import hashlib
+import importlib
+import os
+import re
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from height_cache import HeightCache, get_height_cache, layout_fingerprint
+from metrics import BROWSER_PAGES, PROBES, record_image_written, track_render
+from markdown_blocks import (
+    SEPARATOR, Block, block_kind, breaks_from_visible, cut_source, parse_blocks, section_text,
+    split_sections,
+)
+from paginator import paginate_blocks
+from png_tiles import StreamingPNGWriter, stitch_png_files
+from render_pool import CpuPool
+from tracing import set_attributes, span, stage, traced
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+    from card_styles import StyleProvider
+
+
+# 获取脚本所在目录
+SCRIPT_DIR = Path(__file__).parent.parent
+ASSETS_DIR = SCRIPT_DIR / "assets"
+
+# 默认卡片尺寸配置 (3:4 比例)
+DEFAULT_WIDTH = 1080
+DEFAULT_HEIGHT = 1440
+MAX_HEIGHT = 4320  # dynamic 模式最大高度
+MAX_TILE_HEIGHT = 2160  # 截图时视口的最大高度，更高的卡片分块截取后拼接（控制每个页面的帧缓冲大小）
+
+# 卡片内容区域的上下（左右）留白：card-container padding 50*2 + card-inner padding 60*2
+CARD_PADDING = 220
+
+# 内容区域安全高度（考虑 padding 和 margin）
+# card-inner padding: 60px * 2 = 120px
+# card-container padding: 50px * 2 = 100px
+# 页码区域: ~80px
+# 安全边距: ~40px
+SAFE_HEIGHT = DEFAULT_HEIGHT - 120 - 100 - 80 - 40  # ~1100px
+
+INSTALL_HINT = "请运行: pip install markdown pyyaml playwright && playwright install chromium"
+
+# 虚拟源站：样式表、本地图片与字体由 page.route 从内存中返回（见 serve_asset），
+# 卡片文档只引用这些 URL，同一 URL 的资源在页面之间命中浏览器内存缓存，不再重复解析
+ASSET_ORIGIN = 'https://assets.xhs.local'
+FONT_ORIGINS = ('https://fonts.googleapis.com/', 'https://fonts.gstatic.com/')
+ASSET_ROUTE_PATTERN = re.compile(r'^https://(?:assets\.xhs\.local|fonts\.googleapis\.com|fonts\.gstatic\.com)/')
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Markdown 图片引用：![alt](src "title")
+IMAGE_REF_PATTERN = re.compile(r'!\[([^\]]*)\]\(\s*([^)\s]+)(\s+"[^"]*")?\s*\)')
+# prepare_local_images 写入的显示高度：{: width="W" height="H" }
+IMAGE_SIZE_PATTERN = re.compile(r'\{:[^}]*\bheight="(\d+)"')
+
+def require(module: str):
+    """
+    按需导入重量级依赖（markdown / yaml / playwright），缺失时提示安装并退出
+    命令行只在真正解析或渲染时才加载它们，--help 等路径不受影响
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        print(f"缺少依赖: {e}")
+        print(INSTALL_HINT)
+        sys.exit(1)
+
+
+# 测量脚本
+CONTAINER_HEIGHT_JS = '''() => {
+    const container = document.querySelector('.card-container');
+    return container ? container.scrollHeight : document.body.scrollHeight;
+}'''
+
+INNER_HEIGHT_JS = '''() => {
+    const inner = document.querySelector('.card-inner');
+    if (inner) {
+        return inner.scrollHeight;
+    }
+    const container = document.querySelector('.card-container');
+    return container ? container.scrollHeight : document.body.scrollHeight;
+}'''
+
+CONTENT_HEIGHT_JS = '''() => {
+    const content = document.querySelector('.card-content');
+    return content ? content.scrollHeight : 0;
+}'''
+
+# fragment 排版：根据分栏结果确定卡片数，复制后续卡片的内框并补上页码，返回卡片数
+FRAGMENT_LAYOUT_JS = '''(width) => {
+    const container = document.querySelector('.card-container');
+    const inner = document.querySelector('.card-inner');
+    const content = document.querySelector('.card-content');
+    if (!container || !inner || !content) return 1;
+
+    // n 栏总宽度 = n * 栏宽 + (n - 1) * 栏间距 = n * width - 栏间距
+    const gap = parseFloat(getComputedStyle(content).columnGap) || 0;
+    const total = Math.max(1, Math.round((content.scrollWidth + gap) / width));
+    container.style.width = (total * width) + 'px';
+
+    for (let k = 1; k < total; k++) {
+        const ghost = document.createElement('div');
+        ghost.className = 'card-inner fragment-ghost';
+        ghost.style.left = (k * width + inner.offsetLeft) + 'px';
+        ghost.style.top = inner.offsetTop + 'px';
+        ghost.style.width = inner.offsetWidth + 'px';
+        ghost.style.height = inner.offsetHeight + 'px';
+        // 保留主题给 .card-content 设置的底色
+        ghost.innerHTML = '<div class="card-content"></div>';
+        container.appendChild(ghost);
+    }
+
+    if (total > 1) {
+        for (let k = 0; k < total; k++) {
+            const number = document.createElement('div');
+            number.className = 'page-number';
+            number.textContent = `${k + 1}/${total}`;
+            number.style.right = ((total - 1 - k) * width + 80) + 'px';
+            container.appendChild(number);
+        }
+    }
+    return total;
+}'''
+
+# fragment 截图：平移容器使第 k 张卡片位于视口左上角（只触发合成，不重新排版）
+FRAGMENT_SHOW_JS = '''(offset) => {
+    const container = document.querySelector('.card-container');
+    if (container) container.style.transform = `translateX(-${offset}px)`;
+}'''
+
+# 一次测量全部内容块：相邻块顶部之差即该块在文档流中占用的高度（已计入外边距折叠）
+BLOCK_HEIGHTS_JS = '''() => {
+    const blocks = Array.from(document.querySelectorAll('.xhs-block'));
+    const heights = {};
+    blocks.forEach((block, i) => {
+        const rect = block.getBoundingClientRect();
+        const next = blocks[i + 1];
+        if (next) {
+            heights[block.dataset.block] = next.getBoundingClientRect().top - rect.top;
+        } else {
+            const last = block.lastElementChild;
+            const margin = last ? parseFloat(getComputedStyle(last).marginBottom) || 0 : 0;
+            heights[block.dataset.block] = rect.height + margin;
+        }
+    });
+    return heights;
+}'''
+
+# 超高内容的断点：遍历 root 下的文本节点，用 Range.getClientRects 二分查找第一个越过当前卡片底部的字符
+# frame 为卡片内框（其上下内边距不放内容），height 为内框允许的最大高度
+# 返回可见文本与各断点在其中的位置（由 markdown_blocks.breaks_from_visible 映射回原文），
+# tail 为最后一个断点之后剩余内容的高度
+BLOCK_BREAKS_JS = '''({root, frame, height}) => {
+    const rootEl = document.querySelector(root);
+    if (!rootEl) return {text: '', breaks: [], tail: 0};
+    const frameEl = document.querySelector(frame) || rootEl;
+    const frameStyle = getComputedStyle(frameEl);
+    const padTop = parseFloat(frameStyle.paddingTop) || 0;
+    const padBottom = parseFloat(frameStyle.paddingBottom) || 0;
+    const avail = height - padTop - padBottom;
+    let limit = frameEl.getBoundingClientRect().top + padTop + avail;
+
+    const range = document.createRange();
+    const rectsOf = (node, start, end) => {
+        range.setStart(node, start);
+        range.setEnd(node, end);
+        return Array.from(range.getClientRects());
+    };
+    const bottomOf = (node, start, end) =>
+        Math.max(-Infinity, ...rectsOf(node, start, end).map((r) => r.bottom));
+
+    const walker = document.createTreeWalker(rootEl, NodeFilter.SHOW_TEXT);
+    const breaks = [];
+    let text = '';
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        const length = node.data.length;
+        let from = 0;
+        while (from < length && bottomOf(node, from, length) > limit) {
+            let lo = from, hi = length - 1;
+            while (lo < hi) {
+                const mid = (lo + hi) >> 1;
+                if (bottomOf(node, mid, mid + 1) > limit) hi = mid; else lo = mid + 1;
+            }
+            const rect = rectsOf(node, lo, lo + 1)[0];
+            const next = (rect ? rect.top : limit) + avail;
+            if (next <= limit) break;  // 单个字符比整张卡片还高，无法再拆
+            breaks.push(text.length + lo);
+            limit = next;
+            from = lo;
+        }
+        text += node.data;
+    }
+    const tail = rootEl.getBoundingClientRect().bottom - (limit - avail);
+    return {text, breaks, tail: Math.max(0, tail)};
+}'''
+
+# 分块截图：整页上移 y 像素，使文档中 y 处位于视口顶部（不依赖滚动，body 为 overflow: hidden）
+SHIFT_PAGE_JS = '''(y) => {
+    document.documentElement.style.transform = y ? `translateY(${-y}px)` : '';
+}'''
+
+# batch 渲染：返回每个 .card-container 在文档中的位置与内容高度
+CARD_RECTS_JS = '''() => Array.from(
+    document.querySelectorAll('.card-container'),
+    (container) => ({
+        top: container.getBoundingClientRect().top + window.scrollY,
+        height: container.scrollHeight
+    })
+)'''
+
+# 自动缩放：二分查找内容块的 zoom，使内容恰好填入 .card-content（只缩小不放大）
+# zoom 在排版阶段生效，文字按缩放后的字号重新换行并直接以该字号光栅化，不会像 transform 那样发虚
+# 每次试探只写一次 zoom、读一次尺寸，不交错读写；初值按面积估算，命中 hints 时只需两三次排版
+# 对页面中每张卡片分别处理（batch 渲染时一个文档包含多张卡片），返回 [{key, scale}] 供缓存
+AUTO_FIT_JS = '''(hints) => {
+    const PRECISION = 0.01;
+    const MIN_SCALE = 0.3;
+    const keyOf = (text) => {
+        let hash = 0x811c9dc5;
+        for (let i = 0; i < text.length; i++) {
+            hash ^= text.charCodeAt(i);
+            hash = Math.imul(hash, 0x01000193);
+        }
+        return (hash >>> 0).toString(16);
+    };
+
+    const results = [];
+    for (const viewportContent of document.querySelectorAll('.card-content')) {
+        const scaleEl = viewportContent.querySelector('.card-content-scale');
+        if (!scaleEl) continue;
+        const key = keyOf(scaleEl.innerHTML);
+
+        scaleEl.style.zoom = 1;
+        const availableWidth = viewportContent.clientWidth;
+        const availableHeight = viewportContent.clientHeight;
+        const naturalWidth = viewportContent.scrollWidth;
+        const naturalHeight = viewportContent.scrollHeight;
+        if (!availableWidth || !availableHeight) continue;
+        if (naturalWidth <= availableWidth && naturalHeight <= availableHeight) {
+            results.push({key, scale: 1});
+            continue;
+        }
+
+        // 溢出在未缩放的 .card-content 坐标中读取，与 zoom 的实现细节无关
+        const fits = (scale) => {
+            scaleEl.style.zoom = scale;
+            return viewportContent.scrollHeight <= availableHeight
+                && viewportContent.scrollWidth <= availableWidth;
+        };
+
+        // 文字重排后高度约与 scale² 成正比，据此估算初值并在其附近确定区间
+        const hint = hints && hints[key];
+        const guess = Math.max(MIN_SCALE, hint || Math.min(
+            Math.sqrt(availableHeight / naturalHeight), availableWidth / naturalWidth
+        ));
+        const step = hint ? PRECISION : guess * 0.1;
+        let lo, hi;
+        if (fits(guess)) {
+            lo = guess;
+            hi = Math.min(1, guess + step);
+            if (hi > lo && fits(hi)) {
+                lo = hi;
+                hi = 1;
+            }
+        } else {
+            hi = guess;
+            lo = Math.max(MIN_SCALE, guess - step);
+            if (lo < hi && !fits(lo)) {
+                hi = lo;
+                lo = MIN_SCALE;
+            }
+        }
+        while (hi - lo > PRECISION) {
+            const mid = (lo + hi) / 2;
+            if (fits(mid)) lo = mid; else hi = mid;
+        }
+        scaleEl.style.zoom = lo;
+        results.push({key, scale: lo});
+    }
+    return results;
+}'''
+
+
+# ============ 虚拟源站（page.route） ============
+
+@dataclass(frozen=True)
+class Asset:
+    """内存中的静态资源"""
+    body: bytes
+    content_type: str
+
+
+class AssetCache:
+    """按总字节数限制的 LRU 资源表：超出上限时淘汰最久未使用的资源（刚写入的资源总会保留）"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: 'OrderedDict[str, Asset]' = OrderedDict()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, url: str) -> Optional[Asset]:
+        asset = self._items.get(url)
+        if asset is not None:
+            self._items.move_to_end(url)
+        return asset
+
+    def put(self, url: str, asset: Asset) -> Asset:
+        old = self._items.pop(url, None)
+        if old is not None:
+            self.size -= len(old.body)
+        self._items[url] = asset
+        self.size += len(asset.body)
+        while self.size > self.max_bytes and len(self._items) > 1:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted.body)
+        return asset
+
+
+# 进程内所有页面共用的资源（样式表与字体）的内存上限；长期运行的 worker 中也不会无限增长
+ASSET_CACHE_BYTES = 64 * 1024 * 1024
+# 本地文件 URL 的登记数上限（只保存 URL -> 路径，超出时淘汰最早登记的）
+MAX_ASSET_FILES = 4096
+
+# URL -> 资源：样式表与字体。样式表可能已被淘汰，卡片模板每次生成 HTML 时都会重新登记（见 card_styles.HtmlTemplate）
+ASSETS = AssetCache(ASSET_CACHE_BYTES)
+# 本地文件按需读取：URL -> 文件路径；读取的内容只缓存在所属 BrowserSession 中，会话结束即释放
+ASSET_FILES: 'OrderedDict[str, str]' = OrderedDict()
+
+# _card_html_job 执行期间登记的资源（URL -> 资源），随 HTML 一起交回主进程
+_published: Optional[Dict[str, Asset]] = None
+
+ASSET_CONTENT_TYPES = {
+    '.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.gif': 'image/gif',
+    '.webp': 'image/webp', '.svg': 'image/svg+xml', '.css': 'text/css; charset=utf-8',
+    '.woff2': 'font/woff2', '.woff': 'font/woff', '.ttf': 'font/ttf', '.otf': 'font/otf',
+}
+
+
+def publish_asset(name: str, body: bytes, content_type: str) -> str:
+    """把内容登记到虚拟源站，返回其 URL（name 应包含内容哈希，同名视为同一内容）"""
+    url = f'{ASSET_ORIGIN}/{name}'
+    asset = ASSETS.get(url) or ASSETS.put(url, Asset(body, content_type))
+    if _published is not None:
+        _published[url] = asset
+    return url
+
+
+def publish_stylesheet(css: str) -> str:
+    """把样式表登记到虚拟源站（按内容哈希命名），返回 URL"""
+    digest = hashlib.sha1(css.encode('utf-8')).hexdigest()[:16]
+    return publish_asset(f'css/{digest}.css', css.encode('utf-8'), ASSET_CONTENT_TYPES['.css'])
+
+
+def publish_file(path: str) -> str:
+    """登记本地文件（首次被请求时才读取），返回 URL"""
+    path = os.path.abspath(path)
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+    url = f'{ASSET_ORIGIN}/files/{digest}/{os.path.basename(path)}'
+    ASSET_FILES[url] = path
+    ASSET_FILES.move_to_end(url)
+    while len(ASSET_FILES) > MAX_ASSET_FILES:
+        ASSET_FILES.popitem(last=False)
+    return url
+
+
+def _is_local_reference(src: str) -> bool:
+    return not re.match(r'^(?:[a-z][a-z0-9+.-]*:|//)', src, re.IGNORECASE)
+
+
+def prepare_local_images(body: str, base_dir: str, content_width: int, dpr: int = 2,
+                         pool: Optional[CpuPool] = None) -> str:
+    """
+    预处理正文中引用的本地图片（相对路径按 Markdown 文件所在目录解析）:
+    缩小到内容宽度 × 设备像素比后改为虚拟源站 URL，并通过 attr_list 写明显示宽高，
+    浏览器无需解码原图，排版时也不必等图片加载
+    """
+    refs = {}
+    for match in IMAGE_REF_PATTERN.finditer(body):
+        src = match.group(2)
+        path = os.path.join(base_dir, src)
+        if _is_local_reference(src) and os.path.isfile(path):
+            refs[src] = path
+    if not refs:
+        return body
+
+    from image_assets import prepare_images
+
+    with stage('images'):
+        prepared = prepare_images(list(refs.values()), content_width, dpr,
+                                  executor=pool.executor() if pool else None)
+
+    def replace(match):
+        path = refs.get(match.group(2))
+        if path is None:
+            return match.group(0)
+        image = prepared.get(path)
+        if image is None:
+            return f'![{match.group(1)}]({publish_file(path)}{match.group(3) or ""})'
+        return (f'![{match.group(1)}]({publish_file(image.path)}{match.group(3) or ""})'
+                f'{{: width="{image.width}" height="{image.height}" }}')
+    return IMAGE_REF_PATTERN.sub(replace, body)
+
+
+async def serve_asset(route, files: Optional[Dict[str, Asset]] = None) -> None:
+    """
+    page.route 处理函数：从内存返回资源；字体首次请求时从网络获取后缓存在内存中
+    files 为调用方持有的本地文件内容缓存（BrowserSession 的缓存随会话释放），省略时每次读取文件
+    """
+    url = route.request.url
+    asset = ASSETS.get(url)
+    if asset is None and files is not None:
+        asset = files.get(url)
+    if asset is None and url in ASSET_FILES:
+        path = ASSET_FILES[url]
+        content_type = ASSET_CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), 'application/octet-stream')
+        try:
+            with open(path, 'rb') as f:
+                asset = Asset(f.read(), content_type)
+        except OSError:
+            asset = None
+        if asset is not None and files is not None:
+            files[url] = asset
+    if asset is None and url.startswith(FONT_ORIGINS):
+        try:
+            response = await route.fetch()
+        except Exception:
+            # 离线时放弃字体，使用本机后备字体，避免 networkidle 一直等待
+            await route.abort()
+            return
+        asset = Asset(await response.body(), response.headers.get('content-type', 'application/octet-stream'))
+        if response.ok:
+            ASSETS.put(url, asset)
+    if asset is None:
+        await route.fulfill(status=404, body=b'')
+        return
+    await route.fulfill(status=200, body=asset.body, headers={
+        'Content-Type': asset.content_type,
+        'Cache-Control': ASSET_CACHE_CONTROL,
+        'Access-Control-Allow-Origin': '*',  # 字体按 CORS 方式加载
+    })
+
+
+# ============ Markdown 解析 ============
+
+@traced()
+def parse_markdown_file(file_path: str) -> dict:
+    """解析 Markdown 文件，提取 YAML 头部和正文内容"""
+    yaml = require('yaml')
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    # 解析 YAML 头部
+    yaml_pattern = r'^---\s*\n(.*?)\n---\s*\n'
+    yaml_match = re.match(yaml_pattern, content, re.DOTALL)
+
+    metadata = {}
+    body = content
+
+    if yaml_match:
+        try:
+            metadata = yaml.safe_load(yaml_match.group(1)) or {}
+        except yaml.YAMLError:
+            metadata = {}
+        body = content[yaml_match.end():]
+
+    return {
+        'metadata': metadata,
+        'body': body.strip()
+    }
+
+
+def split_content_by_separator(body: str) -> List[str]:
+    """按照 --- 分隔符拆分正文为多张卡片内容（代码块中的 --- 不会被当作分隔符）"""
+    return [section_text(body, section) for section in split_sections(parse_blocks(body))]
+
+
+@traced()
+def convert_markdown_to_html(md_content: str, accent_color: Optional[str] = None) -> str:
+    """将 Markdown 转换为 HTML，accent_color 指定时标签使用该背景色（结果按内容缓存，多个样式变体共用）"""
+    return _convert_markdown(md_content, accent_color)
+
+
+@lru_cache(maxsize=512)
+def _convert_markdown(md_content: str, accent_color: Optional[str]) -> str:
+    # 处理 tags（以 # 开头的标签）
+    tags_pattern = r'((?:#[\w\u4e00-\u9fa5]+\s*)+)$'
+    tags_match = re.search(tags_pattern, md_content, re.MULTILINE)
+    tags_html = ""
+
+    if tags_match:
+        tags_str = tags_match.group(1)
+        md_content = md_content[:tags_match.start()].strip()
+        tags = re.findall(r'#([\w\u4e00-\u9fa5]+)', tags_str)
+        if tags:
+            tag_style = f' style="background: {accent_color};"' if accent_color else ''
+            tags_html = '<div class="tags-container">'
+            for tag in tags:
+                tags_html += f'<span class="tag"{tag_style}>#{tag}</span>'
+            tags_html += '</div>'
+
+    # 转换 Markdown 为 HTML（代码块高亮结果按代码与语言缓存，见 code_highlight）
+    require('markdown')
+    from code_highlight import markdown_to_html
+
+    html = markdown_to_html(md_content)
+
+    return html + tags_html
+
+
+# ============ 高度预估（smart-split 使用） ============
+
+def estimate_content_height(content: str) -> int:
+    """预估内容高度（基于字数和元素类型）"""
+    lines = content.split('\n')
+    total_height = 0
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            total_height += 20  # 空行
+            continue
+
+        # 标题
+        if line.startswith('# '):
+            total_height += 130  # h1: font-size 72 + margin
+        elif line.startswith('## '):
+            total_height += 110  # h2
+        elif line.startswith('### '):
+            total_height += 90   # h3
+        # 代码块
+        elif line.startswith('```'):
+            total_height += 80   # 代码块起始/结束
+        # 列表
+        elif line.startswith(('- ', '* ', '+ ')):
+            total_height += 85   # li: line-height ~1.6, font-size 42
+        # 引用
+        elif line.startswith('>'):
+            total_height += 100  # blockquote padding
+        # 图片
+        elif line.startswith('!['):
+            size = IMAGE_SIZE_PATTERN.search(line)
+            # 预处理过的本地图片带有显示高度（另加上下外边距），其余按 300 估计
+            total_height += int(size.group(1)) + 70 if size else 300
+        # 普通段落
+        else:
+            # 估算字数
+            char_count = len(line)
+            # 一行约25-30个中文字，行高1.7，字体42px
+            lines_needed = max(1, char_count / 28)
+            total_height += int(lines_needed * 42 * 1.7) + 35  # + margin-bottom
+
+    return total_height
+
+
+def _paginate(parts: List[str], kinds: List[str], heights: List[float],
+              capacity: float, joiner: str) -> List[str]:
+    """按最优分页方案合并内容块"""
+    groups = paginate_blocks(heights, capacity, kinds, parts)
+    return [joiner.join(parts[start:end]) for start, end in groups]
+
+
+async def split_rendered(session: 'BrowserSession', source: str, root: str, frame: str,
+                         height: float) -> Tuple[List[str], float]:
+    """
+    在已加载的页面上一次找出超高内容的全部断点（BLOCK_BREAKS_JS），按块结构调整后切开原文
+    段落按字符断开并遵守中文禁则，代码与表格按行断开并补上围栏 / 表头；找不到断点时原样返回
+    返回（切开的各部分, 最后一部分的实测高度）
+    """
+    with stage('measure'):
+        result = await session.evaluate(
+            BLOCK_BREAKS_JS, {"root": root, "frame": frame, "height": height}
+        ) or {}
+    cuts = breaks_from_visible(source, result.get("text", ""), result.get("breaks", []))
+    return (cut_source(source, cuts) if cuts else [source]), result.get("tail", 0)
+
+
+def blocks_to_measure_markdown(blocks: Sequence[Block], indices: Optional[Sequence[int]] = None) -> str:
+    """
+    将内容块逐个包进 <div class="xhs-block" markdown="1">，供 BLOCK_HEIGHTS_JS 一次测量全部块高度
+    indices 指定只测量其中部分块（data-block 保持原下标）；标签块保持原样（convert_markdown_to_html 会把它提取到末尾）
+    """
+    parts = []
+    for i in (range(len(blocks)) if indices is None else indices):
+        block = blocks[i]
+        if block.kind == 'tags':
+            parts.append(block.text)
+        else:
+            parts.append(f'<div class="xhs-block" data-block="{i}" markdown="1">\n\n{block.text}\n\n</div>')
+    return '\n\n'.join(parts)
+
+
+def smart_split_blocks(blocks: Sequence[Block], max_height: int = SAFE_HEIGHT) -> List[str]:
+    """
+    按预估高度对已解析的内容块做最优分页（见 paginator.py），尽量保持段落完整、避免孤立标题
+    单个块超过限制时按行分页后在行首切开（代码与表格补上围栏 / 表头）；分隔线处强制分页，分隔线本身不进入卡片
+    """
+    cards = []
+    run: List[Block] = []
+    run_heights: List[float] = []
+
+    def flush():
+        cards.extend(_paginate([b.text for b in run], [b.kind for b in run],
+                               run_heights, max_height, '\n\n'))
+        run.clear()
+        run_heights.clear()
+
+    for block in blocks:
+        if block.kind == SEPARATOR:
+            flush()
+            continue
+        block_height = estimate_content_height(block.text)
+
+        # 如果单个块就超过限制，需要按行拆分
+        if block_height > max_height:
+            # 之前累积的块先分页
+            flush()
+            lines = block.text.split('\n')
+            line_starts = [0]
+            for line in lines[:-1]:
+                line_starts.append(line_starts[-1] + len(line) + 1)
+            groups = paginate_blocks(
+                [estimate_content_height(line) for line in lines], max_height,
+                [block_kind(line) for line in lines], lines
+            )
+            cards.extend(cut_source(block.text, [line_starts[start] for start, _ in groups[1:]]))
+        else:
+            run.append(block)
+            run_heights.append(block_height)
+
+    flush()
+    return cards
+
+
+def smart_split_content(content: str, max_height: int = SAFE_HEIGHT) -> List[str]:
+    """
+    智能拆分内容到多张卡片
+    基于预估高度进行最优分页，尽量保持段落、代码块、表格与列表完整
+    """
+    return smart_split_blocks(parse_blocks(content), max_height) or [content]
+
+
+def _card_html_job(style, content: str, page_number: int, total_pages: int,
+                   mode: str) -> Tuple[str, Dict[str, Asset]]:
+    """进程池任务：生成一张卡片的 HTML，连同生成过程中登记的虚拟源站资源（如共享样式表）一并返回"""
+    global _published
+    _published = published = {}
+    try:
+        html = style.card_html(content, page_number, total_pages, mode)
+    finally:
+        _published = None
+    return html, published
+
+
+async def _card_html(pool: CpuPool, style, content: str, page_number: int, total_pages: int,
+                     mode: str) -> str:
+    html, assets = await pool.run(_card_html_job, style, content, page_number, total_pages, mode)
+    for url, asset in assets.items():
+        if url not in ASSETS:
+            ASSETS.put(url, asset)
+    return html
+
+
+def card_htmls(pool: CpuPool, style, card_contents: Sequence[str], mode: str) -> List['asyncio.Future']:
+    """
+    提交全部正文卡片的 HTML 生成任务，按卡片顺序返回可等待对象
+    进程池可用时各卡片并行生成，浏览器截取前一张卡片的同时后面的卡片已在生成
+    """
+    import asyncio
+
+    total = len(card_contents)
+    if total < 2 or not pool.parallel or not pool.shippable(style):
+        pool = CpuPool(1)
+    return [asyncio.ensure_future(_card_html(pool, style, content, i, total, mode))
+            for i, content in enumerate(card_contents, 1)]
+
+
+def cancel_pending(futures: Sequence['asyncio.Future']) -> None:
+    """渲染中途失败时取消尚未完成的卡片 HTML 任务（未开始的进程池任务随之取消），并取回已完成任务的异常"""
+    for future in futures:
+        if not future.done():
+            future.cancel()
+        elif not future.cancelled():
+            future.exception()
+
+
+def stack_card_documents(card_htmls: List[str]) -> str:
+    """
+    将多张卡片 HTML 合并为一个文档：沿用第一张的 <head>，各卡片 <body> 内容纵向堆叠
+    同一样式、同一布局模式下各卡片的 <head> 完全相同，CSS 解析与字体加载只需一次
+    """
+    head, _, _ = card_htmls[0].partition('<body>')
+    bodies = [html.partition('<body>')[2].rpartition('</body>')[0] for html in card_htmls]
+    return head + '<body>' + ''.join(bodies) + '</body>\n</html>'
+
+
+# ============ 浏览器会话 ============
+
+class BrowserSession:
+    """
+    一次渲染任务共用的浏览器与页面
+    视口尺寸变化时原地调整，设备像素比变化时才重建页面；
+    pool 为计算任务的进程池（由调用方持有，默认在当前进程中执行）。
+    derive 得到共用同一浏览器、使用独立页面的会话，用于在一个浏览器中并发渲染
+    """
+
+    def __init__(self, renderer: str = 'render_core', dpr: int = 1, pool: Optional[CpuPool] = None,
+                 browser=None):
+        self.renderer = renderer
+        self.dpr = dpr
+        self.pool = pool or CpuPool(1)
+        self.page: Optional['Page'] = None
+        self._playwright = None
+        self._browser = browser
+        self._owns_browser = browser is None
+        self._viewport = None
+        self._shifted = False  # 页面是否仍处于分块截图的平移状态
+        # 本地文件内容（URL -> 资源），派生会话共用；会话结束时释放
+        self.files: Dict[str, Asset] = {}
+
+    @property
+    def browser_version(self) -> str:
+        return getattr(self._browser, 'version', '') or ''
+
+    def derive(self, dpr: Optional[int] = None) -> 'BrowserSession':
+        """共用本会话浏览器的新会话（独立页面，可使用不同的设备像素比），退出时只关闭自己的页面"""
+        session = BrowserSession(self.renderer, dpr or self.dpr, self.pool, self._browser)
+        session.files = self.files
+        return session
+
+    async def __aenter__(self) -> 'BrowserSession':
+        if not self._owns_browser:
+            return self
+        async_playwright = require('playwright.async_api').async_playwright
+        self._playwright = await async_playwright().start()
+        try:
+            with stage('launch'):
+                self._browser = await self._playwright.chromium.launch()
+        except BaseException:
+            await self._playwright.stop()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if not self._owns_browser:
+            if self.page is not None:
+                BROWSER_PAGES.labels(renderer=self.renderer).dec()
+                page, self.page = self.page, None
+                await page.close()
+            return
+        try:
+            if self.page is not None:
+                BROWSER_PAGES.labels(renderer=self.renderer).dec()
+                self.page = None
+            await self._browser.close()
+        finally:
+            self.files.clear()
+            await self._playwright.stop()
+
+    async def prepare(self, width: int, height: int) -> 'Page':
+        """返回视口为 width x height 的页面"""
+        if self.page is None:
+            self.page = await self._browser.new_page(
+                viewport={'width': width, 'height': height},
+                device_scale_factor=self.dpr
+            )
+            BROWSER_PAGES.labels(renderer=self.renderer).inc()
+            await self.page.route(ASSET_ROUTE_PATTERN, self._serve_asset)
+        elif self._viewport != (width, height):
+            await self.page.set_viewport_size({'width': width, 'height': height})
+        self._viewport = (width, height)
+        return self.page
+
+    async def _serve_asset(self, route) -> None:
+        await serve_asset(route, self.files)
+
+    async def load(self, html_content: str, settle_ms: int = 300) -> None:
+        """加载 HTML 并等待字体渲染"""
+        self._shifted = False
+        with stage('load'):
+            await self.page.set_content(html_content, wait_until='networkidle')
+        with stage('font_wait'):
+            await self.page.wait_for_timeout(settle_ms)
+
+    async def evaluate(self, script: str, arg=None):
+        """在页面中执行测量脚本"""
+        with stage('measure'):
+            return await self.page.evaluate(script, arg)
+
+    async def probe(self, html_content: str, script: str, settle_ms: int = 300) -> int:
+        """仅为测量而加载一次页面（计入 xhs_measure_probes_total）"""
+        PROBES.labels(renderer=self.renderer).inc()
+        await self.load(html_content, settle_ms)
+        return await self.evaluate(script)
+
+    async def capture(self, output_path: str, width: int, height: int, top: Optional[int] = None) -> int:
+        """
+        截取文档中 (0, top) 起 width x height 区域并写出 PNG，返回字节数
+        视口按需增高到能容纳整张卡片（不超过 MAX_TILE_HEIGHT），更高的卡片按视口高度分块截取，
+        由 StreamingPNGWriter 逐块拼接写出，帧缓冲与内存都不随卡片高度增长；
+        启用进程池时分块先写入临时文件，由子进程重新压缩拼接
+        """
+        top = top or 0
+        view_width, view_height = self._viewport
+        if view_height < min(height, MAX_TILE_HEIGHT):
+            await self.prepare(view_width, min(height, MAX_TILE_HEIGHT))
+            view_height = self._viewport[1]
+
+        if height <= view_height:
+            png = await self._capture_tile(width, top, height)
+            with stage('write', bytes=len(png)):
+                with open(output_path, 'wb') as f:
+                    f.write(png)
+            size = len(png)
+        elif self.pool.parallel:
+            tiles = []
+            try:
+                for n, y in enumerate(range(top, top + height, view_height)):
+                    png = await self._capture_tile(width, y, min(view_height, top + height - y))
+                    tiles.append(f'{output_path}.tile{n}')
+                    with open(tiles[-1], 'wb') as f:
+                        f.write(png)
+                with stage('write'):
+                    size = await self.pool.run(stitch_png_files, output_path, tiles)
+            finally:
+                # 拼接成功时分块已由 stitch_png_files 删除；截取或提交失败时在这里清理
+                for tile in tiles:
+                    if os.path.exists(tile):
+                        os.remove(tile)
+        else:
+            with open(output_path, 'wb') as f:
+                writer = StreamingPNGWriter(f)
+                for y in range(top, top + height, view_height):
+                    png = await self._capture_tile(width, y, min(view_height, top + height - y))
+                    with stage('write', bytes=len(png)):
+                        writer.add(png)
+                writer.close()
+                size = f.tell()
+        record_image_written(self.renderer, size)
+        return size
+
+    async def _capture_tile(self, width: int, y: int, height: int) -> bytes:
+        """截取文档中 y 处起 height 高的一块（先把该位置移到视口顶部）"""
+        if y or self._shifted:
+            await self.page.evaluate(SHIFT_PAGE_JS, y)
+            self._shifted = bool(y)
+        with stage('screenshot'):
+            return await self.page.screenshot(
+                clip={'x': 0, 'y': 0, 'width': width, 'height': height},
+                type='png'
+            )
+
+
+async def measure_content_height(page: 'Page', html_content: str, settle_ms: int = 300) -> int:
+    """使用 Playwright 测量实际内容高度（.card-inner）"""
+    with stage('load'):
+        await page.set_content(html_content, wait_until='networkidle')
+    with stage('font_wait'):
+        await page.wait_for_timeout(settle_ms)  # 等待字体渲染
+
+    with stage('measure'):
+        return await page.evaluate(INNER_HEIGHT_JS)
+
+
+# ============ 分页策略 ============
+
+class PagingStrategy:
+    """
+    分页策略：决定正文如何切分成卡片、卡片以何种布局生成，以及截图高度
+    子类按需覆盖 paginate / viewport_height / measure，
+    需要一次排版产出全部卡片时覆盖 render_cards
+    """
+    name = ''
+    card_mode = 'separator'  # 传给 StyleProvider.card_html 的布局模式
+    settle_ms = 300          # 加载后等待字体渲染的时间（毫秒）
+    single_layout = False    # 为 True 时卡片数在 render_cards 排版后才确定
+
+    async def paginate(self, body: str, style, session: BrowserSession) -> List[str]:
+        """将正文切分为每张卡片的 Markdown"""
+        with stage('parse'):
+            return split_content_by_separator(body)
+
+    def viewport_height(self, style, max_height: int) -> int:
+        return style.height
+
+    def card_height(self, style, content_height: int, max_height: int) -> int:
+        """由 .card-container 实测高度得出截图高度"""
+        return style.height
+
+    async def measure(self, session: BrowserSession, style, max_height: int) -> int:
+        """卡片加载完成后返回截图高度"""
+        return style.height
+
+    async def layout(self, session: BrowserSession) -> None:
+        """batch 文档加载完成后、测量之前的页面内处理"""
+
+    def pagination_key(self, session: BrowserSession, style) -> str:
+        """分页结果相同的样式共用的键：默认按 --- 切分，与样式无关"""
+        return self.name
+
+    def layout_key(self, session: BrowserSession, style) -> str:
+        """高度缓存的布局指纹：由空卡片 HTML（样式 CSS、字体、尺寸）、模式、像素比与浏览器版本得出"""
+        with stage('html'):
+            empty_card = style.card_html('', 1, 1, self.card_mode)
+        return layout_fingerprint(empty_card, self.card_mode, session.dpr, session.browser_version)
+
+    async def render_cards(self, session: BrowserSession, card_contents: List[str], style,
+                           output_dir: str, max_height: int, batch: bool = False) -> List[str]:
+        """逐张加载并截图，返回图片路径列表；batch 为 True 时全部卡片只加载一次"""
+        if batch and card_contents:
+            return await self.render_cards_batch(session, card_contents, style, output_dir, max_height)
+
+        paths = []
+        total_cards = len(card_contents)
+        pending_htmls = card_htmls(session.pool, style, card_contents, self.card_mode)
+        try:
+            for i, pending_html in enumerate(pending_htmls, 1):
+                print(f"  📷 生成卡片 {i}/{total_cards}...")
+                with stage('html'):
+                    card_html = await pending_html
+                card_path = os.path.join(output_dir, f'card_{i}.png')
+                await _render_card(session, card_html, card_path, style, self, max_height)
+                paths.append(card_path)
+        finally:
+            cancel_pending(pending_htmls)
+        return paths
+
+    async def render_cards_batch(self, session: BrowserSession, card_contents: List[str], style,
+                                 output_dir: str, max_height: int) -> List[str]:
+        """全部卡片纵向堆叠在一个文档中，加载一次后按位置逐张截取"""
+        pending_htmls = card_htmls(session.pool, style, card_contents, self.card_mode)
+        try:
+            with stage('html'):
+                html = stack_card_documents([await pending_html for pending_html in pending_htmls])
+        finally:
+            cancel_pending(pending_htmls)
+
+        await session.prepare(style.width, style.height)
+        await session.load(html, self.settle_ms)
+        await self.layout(session)
+        rects = await session.evaluate(CARD_RECTS_JS)
+
+        paths = []
+        for i, rect in enumerate(rects, 1):
+            height = self.card_height(style, rect['height'], max_height)
+            card_path = os.path.join(output_dir, f'card_{i}.png')
+            await session.capture(card_path, style.width, height, top=int(rect['top']))
+            print(f"  ✅ 已生成: {card_path} ({style.width}x{height})")
+            paths.append(card_path)
+        return paths
+
+
+class SeparatorPaging(PagingStrategy):
+    """按 --- 分隔符手动分页，内容超出时图片随之变高"""
+    name = 'separator'
+    settle_ms = 500
+
+    def card_height(self, style, content_height, max_height):
+        return max(style.height, content_height)
+
+    async def measure(self, session, style, max_height):
+        content_height = await session.evaluate(CONTAINER_HEIGHT_JS)
+        return self.card_height(style, content_height, max_height)
+
+
+class AutoFitPaging(PagingStrategy):
+    """固定尺寸，求解内容的缩放比例使其恰好填入卡片（文字按缩放后字号重排）"""
+    name = 'auto-fit'
+    card_mode = 'auto-fit'
+    settle_ms = 500
+
+    max_cached_scales = 256
+
+    def __init__(self):
+        # 内容哈希 -> 上次求得的缩放比例，作为下次求解的初值
+        self.scales: Dict[str, float] = {}
+
+    async def layout(self, session):
+        results = await session.evaluate(AUTO_FIT_JS, self.scales) or []
+        for result in results:
+            if len(self.scales) >= self.max_cached_scales:
+                self.scales.pop(next(iter(self.scales)))
+            self.scales[result['key']] = result['scale']
+        if results:
+            set_attributes(scale=min(result['scale'] for result in results))
+
+    async def measure(self, session, style, max_height):
+        await self.layout(session)
+        return style.height
+
+
+class DynamicPaging(PagingStrategy):
+    """
+    图片高度随内容变化，介于卡片高度与 max_height 之间
+    视口从卡片高度起按实测内容增高，超过 MAX_TILE_HEIGHT 的卡片分块截图（见 BrowserSession.capture）
+    """
+    name = 'dynamic'
+    card_mode = 'dynamic'
+    settle_ms = 500
+
+    def card_height(self, style, content_height, max_height):
+        # 确保高度在合理范围内
+        return max(style.height, min(content_height, max_height))
+
+    async def measure(self, session, style, max_height):
+        content_height = await session.evaluate(CONTAINER_HEIGHT_JS)
+        return self.card_height(style, content_height, max_height)
+
+
+class AutoSplitPaging(SeparatorPaging):
+    """一次加载实测各内容块高度，再按最优分页方案（见 paginator.py）组合成卡片"""
+    name = 'auto-split'
+    card_mode = 'auto-split'
+    probe_settle_ms = 200
+
+    def pagination_key(self, session, style):
+        # 按实测高度分页：布局指纹（样式、尺寸、像素比）相同的变体分页结果相同
+        return self.layout_key(session, style)
+
+    async def paginate(self, body, style, session):
+        # 按内容块分割（代码块、表格、列表保持完整）
+        with stage('parse'):
+            blocks = parse_blocks(body)
+        if not blocks:
+            return []
+
+        # 内容区域的可用高度（去除 padding 等）
+        available_height = style.height - CARD_PADDING
+
+        # 先查高度缓存，其余块放在同一页面中一次测量，未测到的（如标签）按预估高度计
+        # 超高块需要在页面上找断点，缓存中的超高块同样重新加载
+        cache = get_height_cache()
+        keys = []
+        measured: Dict[str, float] = {}
+        if cache is not None:
+            layout = self.layout_key(session, style)
+            keys = [HeightCache.key(block.text, layout) for block in blocks]
+            cached = cache.get_many(keys)
+            measured = {
+                str(i): cached[key] for i, key in enumerate(keys)
+                if cached.get(key, available_height + 1) <= available_height
+            }
+        missing = [i for i, block in enumerate(blocks)
+                   if str(i) not in measured and block.kind != 'tags']
+        if missing:
+            await session.prepare(style.width, style.height * 2)
+            with stage('html'):
+                html = style.card_html(blocks_to_measure_markdown(blocks, missing), 1, 1, self.card_mode)
+            fresh = await session.probe(html, BLOCK_HEIGHTS_JS, self.probe_settle_ms) or {}
+            measured.update(fresh)
+            if cache is not None:
+                cache.put_many({keys[int(i)]: height for i, height in fresh.items()})
+        set_attributes(measured_blocks=len(missing), cached_blocks=len(blocks) - len(missing))
+
+        # 超高块在同一页面上按实测断点拆开，各部分作为独立的块参与分页
+        parts, kinds, heights = [], [], []
+        for i, block in enumerate(blocks):
+            height = measured.get(str(i), estimate_content_height(block.text))
+            if height <= available_height:
+                parts.append(block.text)
+                kinds.append(block.kind)
+                heights.append(height)
+                continue
+            selector = f'.xhs-block[data-block="{i}"]'
+            pieces, tail = await split_rendered(session, block.text, selector, selector, available_height)
+            parts.extend(pieces)
+            kinds.extend(block_kind(piece) for piece in pieces)
+            heights.extend([available_height] * (len(pieces) - 1) + [tail if len(pieces) > 1 else height])
+
+        with stage('parse'):
+            return _paginate(parts, kinds, heights, available_height, '\n\n')
+
+
+class SmartSplitPaging(PagingStrategy):
+    """先按字数预估拆分，再实测 .card-inner 高度，仍超出时按实测断点拆分；图片固定尺寸"""
+    name = 'smart-split'
+    overflow_margin = 100  # 实测高度超过 卡片高度 - overflow_margin 时继续拆分
+
+    def pagination_key(self, session, style):
+        return self.layout_key(session, style)
+
+    async def paginate(self, body, style, session):
+        # 整篇只解析一次，按分隔线分组后直接复用各组的内容块
+        with stage('parse'):
+            sections = [
+                (section_text(body, section), section)
+                for section in split_sections(parse_blocks(body))
+            ]
+        return await self._split_sections(sections, style, session)
+
+    async def split_blocks(self, card_contents: List[str], style, session: BrowserSession) -> List[str]:
+        """处理卡片内容，检测高度并自动分页"""
+        return await self._split_sections(
+            [(content, parse_blocks(content)) for content in card_contents], style, session
+        )
+
+    async def _split_sections(self, sections, style, session: BrowserSession) -> List[str]:
+        limit = style.height - self.overflow_margin
+        safe_height = style.height - (DEFAULT_HEIGHT - SAFE_HEIGHT)
+        all_cards = []
+
+        # 预估内容高度，超过安全高度时尝试拆分
+        split_contents = []
+        for content, blocks in sections:
+            if estimate_content_height(content) > safe_height:
+                split_contents.extend(smart_split_blocks(blocks, safe_height) or [content])
+            else:
+                split_contents.append(content)
+
+        # 先查高度缓存，未命中或超高的内容才加载页面实测
+        cache = get_height_cache()
+        keys: List[str] = []
+        cached: Dict[str, float] = {}
+        fresh: Dict[str, float] = {}
+        if cache is not None:
+            layout = self.layout_key(session, style)
+            keys = [HeightCache.key(content, layout) for content in split_contents]
+            cached = cache.get_many(keys)
+
+        # 验证每个拆分后的内容
+        for i, split_content in enumerate(split_contents):
+            if keys and cached.get(keys[i], limit + 1) <= limit:
+                all_cards.append(split_content)
+                continue
+
+            await session.prepare(style.width, style.height)
+            with stage('html'):
+                temp_html = style.card_html(split_content, 1, 1, self.card_mode)
+            actual_height = await session.probe(temp_html, INNER_HEIGHT_JS, self.settle_ms)
+            if keys:
+                fresh[keys[i]] = actual_height
+
+            if actual_height <= limit:
+                all_cards.append(split_content)
+                continue
+
+            # 如果仍然超出，在当前页面上一次找出全部断点并切开
+            pieces, _ = await split_rendered(
+                session, split_content, '.card-content', '.card-inner', limit
+            )
+            all_cards.extend(pieces)
+
+        if cache is not None:
+            cache.put_many(fresh)
+        set_attributes(measured_cards=len(fresh), cached_cards=len(split_contents) - len(fresh))
+        return all_cards
+
+
+class FragmentPaging(PagingStrategy):
+    """
+    整篇正文在一个页面中排成多栏，由浏览器分栏决定断点，逐张平移截图
+    只需一次加载与排版；--- 分隔符处强制换到下一张卡片，图片固定尺寸
+    """
+    name = 'fragment'
+    card_mode = 'fragment'
+    settle_ms = 500
+    single_layout = True
+    break_html = '\n\n<div class="fragment-break"></div>\n\n'
+
+    async def render_cards(self, session, card_contents, style, output_dir, max_height, batch=False):
+        # 本身就是一次排版，batch 参数无需处理
+        with stage('html'):
+            html = style.card_html(self.break_html.join(card_contents), 1, 1, self.card_mode)
+
+        await session.prepare(style.width, style.height)
+        await session.load(html, self.settle_ms)
+        total_cards = await session.evaluate(FRAGMENT_LAYOUT_JS, style.width)
+        set_attributes(cards=total_cards)
+        print(f"  📄 分栏排版得到 {total_cards} 张正文卡片")
+
+        paths = []
+        for i in range(total_cards):
+            print(f"  📷 生成卡片 {i + 1}/{total_cards}...")
+            await session.evaluate(FRAGMENT_SHOW_JS, i * style.width)
+            card_path = os.path.join(output_dir, f'card_{i + 1}.png')
+            await session.capture(card_path, style.width, style.height)
+            print(f"  ✅ 已生成: {card_path} ({style.width}x{style.height})")
+            paths.append(card_path)
+        return paths
+
+
+PAGING_STRATEGIES: Dict[str, PagingStrategy] = {}
+
+
+def register_paging_strategy(strategy: PagingStrategy) -> PagingStrategy:
+    """注册分页策略（同名覆盖）"""
+    PAGING_STRATEGIES[strategy.name] = strategy
+    return strategy
+
+
+def get_paging_strategy(name: str) -> PagingStrategy:
+    if name not in PAGING_STRATEGIES:
+        raise ValueError(f"未知的分页模式: {name}（可选: {', '.join(PAGING_STRATEGIES)}）")
+    return PAGING_STRATEGIES[name]
+
+
+for _strategy in (SeparatorPaging(), AutoFitPaging(), AutoSplitPaging(),
+                  DynamicPaging(), SmartSplitPaging(), FragmentPaging()):
+    register_paging_strategy(_strategy)
+
+
+# ============ 渲染入口 ============
+
+@dataclass
+class RenderedNote:
+    """一篇笔记的渲染结果"""
+    cover: Optional[str] = None
+    cards: List[str] = field(default_factory=list)
+
+    @property
+    def images(self) -> List[str]:
+        """全部图片路径（封面在前）"""
+        return ([self.cover] if self.cover else []) + self.cards
+
+
+async def _render_card(session: BrowserSession, html_content: str, output_path: str,
+                       style, paging: PagingStrategy, max_height: int) -> int:
+    """在已打开的会话中渲染一张卡片，返回图片高度"""
+    await session.prepare(style.width, paging.viewport_height(style, max_height))
+    await session.load(html_content, paging.settle_ms)
+    actual_height = await paging.measure(session, style, max_height)
+    set_attributes(height=actual_height)
+    await session.capture(output_path, style.width, actual_height)
+    print(f"  ✅ 已生成: {output_path} ({style.width}x{actual_height})")
+    return actual_height
+
+
+@traced()
+async def render_html_to_image(html_content: str, output_path: str, style,
+                               paging: PagingStrategy, max_height: int = MAX_HEIGHT,
+                               dpr: int = 1, renderer: str = 'render_core') -> int:
+    """单独渲染一段 HTML 为图片（启动独立浏览器），返回图片高度"""
+    set_attributes(output=output_path, mode=paging.name)
+    async with BrowserSession(renderer, dpr) as session:
+        return await _render_card(session, html_content, output_path, style, paging, max_height)
+
+
+async def _render_in_session(session: BrowserSession, body: str, metadata: dict, output_dir: str,
+                            style, paging: PagingStrategy, max_height: int, batch: bool,
+                            card_contents: Optional[List[str]] = None) -> RenderedNote:
+    """在已打开的会话中生成封面与正文卡片；card_contents 为已有的分页结果（省略时在此分页）"""
+    result = RenderedNote()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 根据分页策略切分内容
+    if card_contents is None:
+        print("  ⏳ 分析内容并分页...")
+        card_contents = await paging.paginate(body, style, session)
+    if not paging.single_layout:
+        set_attributes(cards=len(card_contents))
+        print(f"  📄 将生成 {len(card_contents)} 张正文卡片")
+
+    # 生成封面
+    if metadata.get('emoji') or metadata.get('title'):
+        print("  📷 生成封面...")
+        with stage('html'):
+            cover_html = style.cover_html(metadata)
+        cover_path = os.path.join(output_dir, 'cover.png')
+        await session.prepare(style.width, style.height)
+        await session.load(cover_html, paging.settle_ms)
+        await session.capture(cover_path, style.width, style.height)
+        print(f"  ✅ 已生成: {cover_path}")
+        result.cover = cover_path
+
+    # 生成正文卡片
+    result.cards = await paging.render_cards(
+        session, card_contents, style, output_dir, max_height, batch
+    )
+    return result
+
+
+@traced()
+async def render_note(md_file: str, output_dir: str, style, paging: PagingStrategy,
+                      max_height: int = MAX_HEIGHT, dpr: int = 2,
+                      renderer: str = 'render_core', batch: bool = False) -> RenderedNote:
+    """
+    将 Markdown 文件渲染为封面 + 正文卡片，整篇笔记共用一个浏览器会话
+    batch 为 True 时正文卡片合并为一个文档加载，再按位置逐张截图
+    """
+    set_attributes(file=md_file, style=style.name, mode=paging.name,
+                   width=style.width, height=style.height, batch=batch)
+
+    with track_render(renderer, paging.name):
+        # 解析 Markdown 文件
+        with stage('parse'):
+            data = parse_markdown_file(md_file)
+
+        # 浏览器由当前事件循环独占，计算任务交给进程池
+        with CpuPool() as pool:
+            body = prepare_local_images(data['body'], os.path.dirname(os.path.abspath(md_file)),
+                                        style.width - CARD_PADDING, dpr, pool)
+            async with BrowserSession(renderer, dpr, pool) as session:
+                return await _render_in_session(session, body, data['metadata'], output_dir,
+                                                style, paging, max_height, batch)
+
+
+# ============ 多变体渲染 ============
+
+DEFAULT_VARIANT_CONCURRENCY = 4
+
+
+@dataclass(frozen=True)
+class Variant:
+    """一个渲染变体：样式提供者（含尺寸）与设备像素比；name 为输出子目录名"""
+    style: 'StyleProvider'
+    dpr: int = 2
+    name: str = ''
+
+    @property
+    def label(self) -> str:
+        return self.name or f'{self.style.name}_{self.style.width}x{self.style.height}@{self.dpr}x'
+
+
+def validate_variants(variants: Sequence[Variant], paging: PagingStrategy) -> None:
+    """检查变体能否一起渲染：变体名不能重复，固定布局的样式（预设配色）只能用于 separator 分页"""
+    labels = [variant.label for variant in variants]
+    duplicates = sorted({label for label in labels if labels.count(label) > 1})
+    if duplicates:
+        raise ValueError(f"变体名重复: {', '.join(duplicates)}")
+    fixed = [variant.label for variant in variants if getattr(variant.style, 'fixed_layout', False)]
+    if fixed and paging.name != 'separator':
+        raise ValueError(f"预设配色只支持 separator 分页模式（当前: {paging.name}）: {', '.join(fixed)}")
+
+
+@traced()
+async def render_variants(md_file: str, output_dir: str, variants: Sequence[Variant],
+                          paging: PagingStrategy, max_height: int = MAX_HEIGHT,
+                          renderer: str = 'render_core', batch: bool = False,
+                          concurrency: int = DEFAULT_VARIANT_CONCURRENCY) -> Dict[str, RenderedNote]:
+    """
+    将一篇笔记渲染为多个变体，各变体输出到 output_dir/<变体名>/，返回 {变体名: 渲染结果}
+    解析只做一次，本地图片按（内容宽度, 像素比）各预处理一次，Markdown 转换结果在变体间复用；
+    分页键（见 PagingStrategy.pagination_key）相同的变体共用一次分页。全部变体共用一个浏览器，
+    各自使用独立页面，最多 concurrency 个同时渲染。失败的变体打印错误后不出现在结果中
+    """
+    import asyncio
+
+    validate_variants(variants, paging)
+    set_attributes(file=md_file, mode=paging.name, variants=len(variants), batch=batch)
+
+    results: Dict[str, RenderedNote] = {}
+    with track_render(renderer, paging.name):
+        with stage('parse'):
+            data = parse_markdown_file(md_file)
+        base_dir = os.path.dirname(os.path.abspath(md_file))
+
+        with CpuPool() as pool:
+            bodies: Dict[Tuple[int, int], str] = {}
+            for variant in variants:
+                key = (variant.style.width - CARD_PADDING, variant.dpr)
+                if key not in bodies:
+                    bodies[key] = prepare_local_images(data['body'], base_dir, key[0], key[1], pool)
+
+            async with BrowserSession(renderer, 1, pool) as browser:
+                paginations: Dict[Tuple[str, str], 'asyncio.Future'] = {}
+                slots = asyncio.Semaphore(max(1, concurrency))
+
+                async def render_one(variant: Variant) -> None:
+                    style = variant.style
+                    body = bodies[(style.width - CARD_PADDING, variant.dpr)]
+                    async with slots, browser.derive(variant.dpr) as session:
+                        with span('variant', variant=variant.label, style=style.name,
+                                  width=style.width, height=style.height, dpr=variant.dpr):
+                            print(f"\n🎨 变体 {variant.label}")
+                            key = (body, paging.pagination_key(session, style))
+                            if key not in paginations:
+                                print(f"  ⏳ 分析内容并分页（{variant.label}）...")
+                                paginations[key] = asyncio.ensure_future(paging.paginate(body, style, session))
+                            card_contents = await paginations[key]
+                            results[variant.label] = await _render_in_session(
+                                session, body, data['metadata'], os.path.join(output_dir, variant.label),
+                                style, paging, max_height, batch, list(card_contents)
+                            )
+
+                outcomes = await asyncio.gather(*(render_one(v) for v in variants), return_exceptions=True)
+                for variant, outcome in zip(variants, outcomes):
+                    if isinstance(outcome, Exception):
+                        print(f"❌ 变体 {variant.label} 渲染失败: {outcome}")
+
+    set_attributes(rendered_variants=len(results), paginations=len(paginations))
+    return {variant.label: results[variant.label] for variant in variants if variant.label in results}
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+渲染流程中 CPU 密集任务的进程池
+浏览器与页面由 asyncio 事件循环（BrowserSession 所在的协调者）独占；卡片 HTML 生成
+（Markdown 转换、代码高亮）、PNG 分块拼接、图片缩放等纯计算任务交给子进程并行执行，
+事件循环在等待结果期间继续驱动浏览器，渲染主机的多个核心都能用上
+
+子进程在第一个任务提交时才启动；进程数为 1 时不创建进程池，任务直接在当前进程执行。
+进程池通常在浏览器启动之后才创建，子进程一律以 spawn 方式启动：fork 出的子进程会继承
+Playwright 驱动的 stdin 管道，驱动收不到 EOF，关闭浏览器时会一直阻塞
+
+进程数:
+    $XHS_CPU_WORKERS（默认 CPU 核数）
+
+使用方法:
+    from render_pool import CpuPool
+
+    with CpuPool() as pool:
+        html = await pool.run(build_html, content)
+"""
+
+import os
+import pickle
+from typing import Any, Callable, Optional
+
+
+def process_pool(max_workers: int):
+    """创建以 spawn 方式启动子进程的 ProcessPoolExecutor（不继承父进程已打开的管道）"""
+    # 多进程模块导入较慢，只在并行时加载
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def default_workers() -> int:
+    """$XHS_CPU_WORKERS 指定的进程数，未设置时为 CPU 核数"""
+    value = os.environ.get('XHS_CPU_WORKERS', '').strip()
+    if value.isdigit():
+        return max(1, int(value))
+    return os.cpu_count() or 1
+
+
+class CpuPool:
+    """按需启动的进程池，供 asyncio 协调者提交计算任务"""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or default_workers()
+        self._executor = None
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 1
+
+    def executor(self):
+        """底层 ProcessPoolExecutor（首次调用时创建；进程数为 1 时返回 None）"""
+        if self._executor is None and self.parallel:
+            self._executor = process_pool(self.workers)
+        return self._executor
+
+    @staticmethod
+    def shippable(*args: Any) -> bool:
+        """参数能否发送到子进程（如自定义样式提供者持有不可序列化的对象时为 False）"""
+        try:
+            pickle.dumps(args)
+            return True
+        except Exception:
+            return False
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """在子进程中执行 fn(*args)；未启用进程池时直接调用。fn 须为模块级函数"""
+        executor = self.executor()
+        if executor is None:
+            return fn(*args)
+        import asyncio
+
+        return await asyncio.wrap_future(executor.submit(fn, *args))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'CpuPool':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
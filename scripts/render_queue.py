@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+基于任务目录（spool）的分布式批量渲染
+协调者把批量任务（笔记 × 主题 × 尺寸）按笔记分组切成分片写入任务目录，任意数量的 worker
+（同一台机器或挂载同一共享存储的多台机器）以租约方式认领分片，逐个调用 render_markdown_to_cards
+渲染，结果原子写入。不需要消息队列或数据库服务，只依赖文件系统的原子 rename
+
+任务目录结构:
+    pending/<分片>.json    等待认领
+    claimed/<分片>.json    已认领；文件修改时间即心跳，超过租约时长未更新视为 worker 已失联，重新放回 pending
+    done/<分片>.json       全部任务完成
+    failed/<分片>.json     重试次数用尽仍有任务失败（记录错误信息）
+    results/<任务>.json    单个任务的结果（卡片数、图片列表、耗时、worker）
+
+认领即把分片从 pending 重命名到 claimed，同一分片只有一个 worker 能成功；
+单个任务的图片先渲染到临时目录，完成后整体重命名到目标目录，已有结果的任务在重新认领时跳过
+
+说明: 多台机器共享时，任务目录与笔记、输出目录须挂载在相同路径（任务中记录的是绝对路径）
+
+使用方法:
+    # 提交任务（每个分片最多 4 个任务）
+    python render_queue.py submit spool/ notes/*.md --themes default retro --sizes 1080x1440 1242x1660 \\
+        --mode auto-split --output-dir output/ --shard-size 4
+
+    # 在任意机器上启动 worker（可同时运行多个；--wait 表示队列为空时继续等待新任务）
+    python render_queue.py work spool/
+    python render_queue.py work spool/ --wait --lease 120
+
+    # 查看进度
+    python render_queue.py status spool/
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from metrics import QUEUE_DEPTH, add_metrics_arguments, metrics_from_args
+
+PENDING, CLAIMED, DONE, FAILED, RESULTS = 'pending', 'claimed', 'done', 'failed', 'results'
+
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_SHARD_SIZE = 4
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    """一个渲染任务：一篇笔记以一种主题、尺寸渲染到 output_dir"""
+    md_file: str
+    output_dir: str
+    theme: str = 'default'
+    mode: str = 'separator'
+    width: int = 1080
+    height: int = 1440
+    dpr: int = 2
+
+    @property
+    def job_id(self) -> str:
+        key = '\0'.join(str(v) for v in asdict(self).values())
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """先写临时文件再重命名，读者不会看到写了一半的文件"""
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def default_worker_id() -> str:
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+class Spool:
+    """任务目录：分片的提交、认领、心跳、回收与完成"""
+
+    def __init__(self, root: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.root = Path(root)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for name in (PENDING, CLAIMED, DONE, FAILED, RESULTS):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state: str, shard_id: str) -> Path:
+        return self.root / state / f'{shard_id}.json'
+
+    def _shards(self, state: str) -> List[Path]:
+        return sorted(p for p in (self.root / state).glob('*.json'))
+
+    # ---- 协调者 ----
+
+    def submit(self, jobs: List[RenderJob], shard_size: int = DEFAULT_SHARD_SIZE) -> List[str]:
+        """按笔记分组切成分片写入 pending，返回新分片 ID；已提交过（任一状态）的分片跳过"""
+        by_note: Dict[str, List[RenderJob]] = {}
+        for job in jobs:
+            by_note.setdefault(job.md_file, []).append(job)
+
+        created = []
+        for note_jobs in by_note.values():
+            for i in range(0, len(note_jobs), max(1, shard_size)):
+                chunk = note_jobs[i:i + shard_size]
+                shard_id = hashlib.sha1(''.join(j.job_id for j in chunk).encode()).hexdigest()[:16]
+                if any(self._path(state, shard_id).exists() for state in (PENDING, CLAIMED, DONE, FAILED)):
+                    continue
+                _write_json(self._path(PENDING, shard_id), {
+                    'shard': shard_id, 'attempts': 0, 'submitted_at': time.time(),
+                    'jobs': [asdict(job) for job in chunk],
+                })
+                created.append(shard_id)
+        return created
+
+    def status(self) -> Dict[str, int]:
+        return {state: len(self._shards(state)) for state in (PENDING, CLAIMED, DONE, FAILED)}
+
+    # ---- worker ----
+
+    def requeue_expired(self) -> int:
+        """
+        回收租约过期（心跳超时）的分片：计一次尝试后放回 pending，尝试次数用尽则移到 failed，
+        返回回收的数量。先重命名为私有文件取得所有权，避免多个 worker 重复回收
+        """
+        count = 0
+        deadline = time.time() - self.lease_seconds
+        for path in self._shards(CLAIMED):
+            taken = path.with_name(f'.{path.stem}.requeue-{os.getpid()}')
+            try:
+                if path.stat().st_mtime >= deadline:
+                    continue
+                os.rename(path, taken)
+            except FileNotFoundError:
+                continue  # 已被其他 worker 回收或刚刚完成
+            shard = _read_json(taken) or {'shard': path.stem, 'jobs': []}
+            shard['attempts'] = shard.get('attempts', 0) + 1
+            shard.setdefault('errors', {})['lease'] = f"worker {shard.get('worker')} 租约过期"
+            state = PENDING if shard['attempts'] < self.max_attempts else FAILED
+            _write_json(taken, shard)
+            os.rename(taken, self._path(state, path.stem))
+            print(f"⚠️ 分片 {path.stem} 租约过期（{shard.get('worker')}），移到 {state}")
+            count += 1
+        return count
+
+    def claim(self, worker_id: str) -> Optional[dict]:
+        """认领一个分片（rename 到 claimed 成功者得到它），没有可认领的分片时返回 None"""
+        for path in self._shards(PENDING):
+            claimed = self._path(CLAIMED, path.stem)
+            try:
+                os.rename(path, claimed)
+                os.utime(claimed)  # rename 保留了提交时的修改时间，立即刷新以免被当作过期回收
+            except FileNotFoundError:
+                continue  # 被其他 worker 抢先认领
+            shard = _read_json(claimed)
+            if shard is None:
+                continue
+            shard.update(worker=worker_id, claimed_at=time.time())
+            _write_json(claimed, shard)
+            return shard
+        return None
+
+    @contextmanager
+    def heartbeat(self, shard_id: str) -> Iterator[None]:
+        """处理分片期间按租约时长的 1/3 刷新 claimed 文件的修改时间"""
+        stop = threading.Event()
+        path = self._path(CLAIMED, shard_id)
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    print(f"⚠️ 分片 {shard_id} 已被回收，本 worker 的结果仍会保留")
+                    return
+
+        thread = threading.Thread(target=beat, name=f'lease-{shard_id}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def result(self, job: RenderJob) -> Optional[dict]:
+        return _read_json(self.root / RESULTS / f'{job.job_id}.json')
+
+    def write_result(self, job: RenderJob, result: dict) -> None:
+        _write_json(self.root / RESULTS / f'{job.job_id}.json', result)
+
+    def finish(self, shard: dict, errors: Dict[str, str]) -> Optional[str]:
+        """
+        结束分片: 全部成功移到 done；有失败任务时只保留失败任务，未超过重试次数则放回 pending，
+        否则移到 failed。返回分片的新状态；分片已不属于本 worker 时返回 None
+        """
+        claimed = self._path(CLAIMED, shard['shard'])
+        current = _read_json(claimed)
+        if current is None or current.get('worker') != shard.get('worker'):
+            # 租约已过期并被回收：结果已单独写入，下一个认领者会跳过已完成的任务
+            print(f"⚠️ 分片 {shard['shard']} 已不属于本 worker")
+            return None
+        if not errors:
+            state = DONE
+        else:
+            shard['jobs'] = [j for j in shard['jobs'] if RenderJob(**j).job_id in errors]
+            shard['attempts'] = shard.get('attempts', 0) + 1
+            shard['errors'] = errors
+            state = PENDING if shard['attempts'] < self.max_attempts else FAILED
+        shard['finished_at'] = time.time()
+        _write_json(claimed, shard)
+        os.rename(claimed, self._path(state, shard['shard']))
+        return state
+
+
+# ============ 渲染 ============
+
+def _publish_output(staging: str, target: str) -> None:
+    """把渲染好的临时目录替换为目标目录（旧结果先移开再删除）"""
+    old = None
+    if os.path.exists(target):
+        old = f'{target}.old-{os.getpid()}'
+        os.rename(target, old)
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    os.rename(staging, target)
+    if old:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def run_job(job: RenderJob, worker_id: str) -> dict:
+    """渲染单个任务：先输出到临时目录，成功后原子替换到 job.output_dir，返回结果记录"""
+    import asyncio
+
+    from render_xhs import render_markdown_to_cards
+
+    staging = f"{job.output_dir.rstrip('/')}.partial-{worker_id}"
+    shutil.rmtree(staging, ignore_errors=True)
+    started = time.time()
+    try:
+        cards = asyncio.run(render_markdown_to_cards(
+            job.md_file, staging, theme=job.theme, mode=job.mode,
+            width=job.width, height=job.height, dpr=job.dpr,
+        ))
+        _publish_output(staging, job.output_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return {
+        'job': asdict(job), 'cards': cards, 'worker': worker_id,
+        'images': sorted(p.name for p in Path(job.output_dir).glob('*.png')),
+        'seconds': round(time.time() - started, 3), 'finished_at': time.time(),
+    }
+
+
+def run_worker(spool: Spool, worker_id: str, wait: bool = False,
+               poll_seconds: float = DEFAULT_POLL_SECONDS) -> int:
+    """认领并处理分片直到队列为空（wait 为 True 时持续等待新任务），返回完成的任务数"""
+    completed = 0
+    queue_depth = QUEUE_DEPTH.labels(queue='render')
+    while True:
+        spool.requeue_expired()
+        queue_depth.set(spool.status()[PENDING])
+        shard = spool.claim(worker_id)
+        if shard is None:
+            if not wait:
+                return completed
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"\n📦 认领分片 {shard['shard']}（{len(shard['jobs'])} 个任务，第 {shard['attempts'] + 1} 次）")
+        errors: Dict[str, str] = {}
+        with spool.heartbeat(shard['shard']):
+            for data in shard['jobs']:
+                job = RenderJob(**data)
+                if spool.result(job):
+                    print(f"  ⏭️ 已有结果，跳过: {job.job_id}")
+                    continue
+                try:
+                    spool.write_result(job, run_job(job, worker_id))
+                    completed += 1
+                except Exception as e:
+                    print(f"❌ 任务失败 {job.md_file} ({job.theme} {job.width}x{job.height}): {e}")
+                    errors[job.job_id] = str(e)
+        state = spool.finish(shard, errors)
+        if state:
+            print(f"  {'✅' if state == DONE else '⚠️'} 分片 {shard['shard']} → {state}")
+
+
+# ============ 命令行 ============
+
+def _parse_size(value: str):
+    try:
+        width, height = value.lower().split('x')
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"尺寸格式应为 宽x高，例如 1080x1440: {value}")
+
+
+def build_jobs(notes: List[str], themes: List[str], sizes: List[tuple], mode: str,
+               output_dir: str, dpr: int) -> List[RenderJob]:
+    """笔记 × 主题 × 尺寸；输出目录为 <output_dir>/<笔记名>/<主题>_<宽>x<高>"""
+    jobs = []
+    for note in notes:
+        note_path = os.path.abspath(note)
+        for theme in themes:
+            for width, height in sizes:
+                target = os.path.join(os.path.abspath(output_dir), Path(note).stem, f'{theme}_{width}x{height}')
+                jobs.append(RenderJob(note_path, target, theme, mode, width, height, dpr))
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='基于任务目录的分布式批量渲染（多个 worker 共享同一目录即可协作）',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit = commands.add_parser('submit', help='提交批量任务（笔记 × 主题 × 尺寸）')
+    submit.add_argument('spool', help='任务目录')
+    submit.add_argument('notes', nargs='+', help='Markdown 笔记文件')
+    submit.add_argument('--themes', nargs='+', default=['default'], help='主题（默认: default）')
+    submit.add_argument('--sizes', nargs='+', type=_parse_size, default=[(1080, 1440)],
+                        help='尺寸，格式 宽x高（默认: 1080x1440）')
+    submit.add_argument('--mode', default='separator', help='分页模式（默认: separator）')
+    submit.add_argument('--dpr', type=int, default=2, help='设备像素比（默认: 2）')
+    submit.add_argument('--output-dir', '-o', default='output', help='输出根目录（默认: output）')
+    submit.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'每个分片最多包含的任务数（默认: {DEFAULT_SHARD_SIZE}）')
+
+    work = commands.add_parser('work', help='认领并处理任务')
+    work.add_argument('spool', help='任务目录')
+    work.add_argument('--wait', action='store_true', help='队列为空时继续等待新任务')
+    work.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                      help=f'租约时长秒数，超时未心跳的分片会被其他 worker 回收（默认: {DEFAULT_LEASE_SECONDS:.0f}）')
+    work.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                      help=f'失败任务的最多尝试次数（默认: {DEFAULT_MAX_ATTEMPTS}）')
+    work.add_argument('--worker-id', default=None, help='worker 标识（默认: 主机名-进程号）')
+    add_metrics_arguments(work)
+
+    status = commands.add_parser('status', help='查看任务进度')
+    status.add_argument('spool', help='任务目录')
+
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        missing = [note for note in args.notes if not os.path.exists(note)]
+        if missing:
+            print(f"❌ 错误: 文件不存在 - {', '.join(missing)}")
+            sys.exit(1)
+        jobs = build_jobs(args.notes, args.themes, args.sizes, args.mode, args.output_dir, args.dpr)
+        created = Spool(args.spool).submit(jobs, args.shard_size)
+        print(f"📮 已提交 {len(jobs)} 个任务，新建 {len(created)} 个分片: {args.spool}")
+
+    elif args.command == 'work':
+        worker_id = args.worker_id or default_worker_id()
+        print(f"🛠️ worker {worker_id} 开始处理: {args.spool}")
+        with metrics_from_args(args):
+            spool = Spool(args.spool, args.lease, args.max_attempts)
+            completed = run_worker(spool, worker_id, args.wait)
+        print(f"\n✨ worker {worker_id} 完成 {completed} 个任务")
+
+    else:
+        counts = Spool(args.spool).status()
+        print(f"📊 任务目录: {args.spool}")
+        for state, icon in ((PENDING, '⏳'), (CLAIMED, '🛠️'), (DONE, '✅'), (FAILED, '❌')):
+            print(f"  {icon} {state:<8} {counts[state]}")
+        if counts[FAILED]:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,7 +14,6 @@
 """
 
 import argparse
-import asyncio
 import os
 import re
 import sys
@@ -23,72 +22,16 @@ from pathlib import Path
 from typing import List, Dict, Tuple
 import subprocess
 
-try:
-    import markdown
-    import yaml
-    from playwright.async_api import async_playwright, Page
-except ImportError as e:
-    print(f"缺少依赖: {e}")
-    print("请运行: pip install markdown pyyaml playwright && playwright install chromium")
-    sys.exit(1)
-
-# 获取脚本所在目录
-SCRIPT_DIR = Path(__file__).parent.parent
-ASSETS_DIR = SCRIPT_DIR / "assets"
-
-# 卡片尺寸配置 (3:4 比例)
-CARD_WIDTH = 1080
-CARD_HEIGHT = 1440
-
-# 内容区域安全高度
-SAFE_HEIGHT = CARD_HEIGHT - 120 - 100 - 80 - 40  # ~1100px
-
-# 样式配置
-STYLES = {
-    "purple": {
-        "name": "紫韵",
-        "cover_bg": "linear-gradient(180deg, #3450E4 0%, #D266DA 100%)",
-        "card_bg": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)",
-        "accent_color": "#6366f1",
-    },
-    "xiaohongshu": {
-        "name": "小红书红",
-        "cover_bg": "linear-gradient(180deg, #FF2442 0%, #FF6B81 100%)",
-        "card_bg": "linear-gradient(135deg, #FF2442 0%, #FF6B81 100%)",
-        "accent_color": "#FF2442",
-    },
-    "mint": {
-        "name": "清新薄荷",
-        "cover_bg": "linear-gradient(180deg, #43e97b 0%, #38f9d7 100%)",
-        "card_bg": "linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)",
-        "accent_color": "#43e97b",
-    },
-    "sunset": {
-        "name": "日落橙",
-        "cover_bg": "linear-gradient(180deg, #fa709a 0%, #fee140 100%)",
-        "card_bg": "linear-gradient(135deg, #fa709a 0%, #fee140 100%)",
-        "accent_color": "#fa709a",
-    },
-    "ocean": {
-        "name": "深海蓝",
-        "cover_bg": "linear-gradient(180deg, #4facfe 0%, #00f2fe 100%)",
-        "card_bg": "linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)",
-        "accent_color": "#4facfe",
-    },
-    "elegant": {
-        "name": "优雅白",
-        "cover_bg": "linear-gradient(180deg, #f5f5f5 0%, #e0e0e0 100%)",
-        "card_bg": "linear-gradient(135deg, #f5f5f5 0%, #e8e8e8 100%)",
-        "accent_color": "#333333",
-        "text_light": "#555555",
-    },
-    "dark": {
-        "name": "暗黑模式",
-        "cover_bg": "linear-gradient(180deg, #1a1a2e 0%, #16213e 100%)",
-        "card_bg": "linear-gradient(135deg, #1a1a2e 0%, #16213e 100%)",
-        "accent_color": "#e94560",
-    },
-}
+from render_core import require
+# 渲染核心与样式配置与 V2 共用
+from render_xhs_v2 import (
+    CARD_HEIGHT, CARD_WIDTH, SAFE_HEIGHT, STYLES,
+    parse_markdown_file, split_content_by_separator, estimate_content_height,
+    smart_split_content, convert_markdown_to_html, generate_cover_html,
+    generate_card_html, render_html_to_image, process_and_render_cards,
+    render_markdown_to_cards
+)
+
 
 def get_user_confirmation(prompt: str, options: List[str] = None) -> str:
     """获取用户确认"""
@@ -162,10 +105,12 @@ def optimize_copy_with_confirmation(markdown_file: str, copy_framework: str) ->
         else:
             body_content = original_content
 
+        # 模板表为模块级共享数据，生成器在重试循环外创建一次即可
+        copywriter = XiaohongshuCopywriter()
+
         while True:
             # 优化文案
-            copywriter = XiaohongshuCopywriter()
-            optimized_result = copywriter.optimize_content(body_content)
+            optimized_result = copywriter.optimize_content(body_content, frameworks=[copy_framework])
 
             # 显示优化结果
             print(f"🎯 内容主题: {optimized_result['analysis'].theme}")
@@ -225,77 +170,14 @@ subtitle: "AI优化版本"
         print(f"❌ 文案优化失败: {e}")
         return markdown_file
 
-# 这里导入原有的渲染函数
-from render_xhs_v2 import (
-    parse_markdown_file, split_content_by_separator, estimate_content_height,
-    smart_split_content, convert_markdown_to_html, generate_cover_html,
-    generate_card_html, render_html_to_image, process_and_render_cards
-)
-
-async def render_markdown_to_cards_with_confirmation(md_file: str, output_dir: str, style_key: str = "purple"):
-    """带确认的渲染函数"""
-    print(f"\n🎨 开始渲染: {md_file}")
-    print(f"🎨 使用样式: {STYLES[style_key]['name']}")
-
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
-
-    # 解析 Markdown 文件
-    data = parse_markdown_file(md_file)
-    metadata = data['metadata']
-    body = data['body']
-
-    # 分割正文内容（基于用户手动分隔符）
-    card_contents = split_content_by_separator(body)
-    print(f"  📄 检测到 {len(card_contents)} 个内容块")
-
-    # 处理内容，智能分页
-    print("  🔍 分析内容高度并智能分页...")
-    processed_cards = await process_and_render_cards(card_contents, output_dir, style_key)
-    total_cards = len(processed_cards)
-    print(f"  📄 将生成 {total_cards} 张卡片")
-
-    # 存储生成的图片路径
-    generated_images = []
-
-    # 生成封面
-    if metadata.get('emoji') or metadata.get('title'):
-        print("  📷 生成封面...")
-        cover_html = generate_cover_html(metadata, style_key)
-        cover_path = os.path.join(output_dir, 'cover.png')
-        await render_html_to_image(cover_html, cover_path)
-        generated_images.append(cover_path)
-
-    # 生成正文卡片
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page(viewport={'width': CARD_WIDTH, 'height': CARD_HEIGHT})
-
-        try:
-            for i, content in enumerate(processed_cards, 1):
-                print(f"  📷 生成卡片 {i}/{total_cards}...")
-                card_html = generate_card_html(content, i, total_cards, style_key)
-                card_path = os.path.join(output_dir, f'card_{i}.png')
-
-                await page.set_content(card_html, wait_until='networkidle')
-                await page.wait_for_timeout(300)
-
-                await page.screenshot(
-                    path=card_path,
-                    clip={'x': 0, 'y': 0, 'width': CARD_WIDTH, 'height': CARD_HEIGHT},
-                    type='png'
-                )
-                print(f"  ✅ 已生成: {card_path}")
-                generated_images.append(card_path)
-
-        finally:
-            await browser.close()
-
-    print(f"\n✨ 渲染完成！共生成 {len(generated_images)} 张图片，保存到: {output_dir}")
-    return generated_images
+# 渲染流程与 V2 完全一致，确认逻辑在 render_with_confirmation 中
+render_markdown_to_cards_with_confirmation = render_markdown_to_cards
 
 def render_with_confirmation(markdown_file: str, output_dir: str, style: str) -> List[str]:
     """渲染图片并确认"""
+    # asyncio 导入耗时明显，只在真正渲染时加载
+    import asyncio
+
     while True:
         # 渲染基础图片
         generated_images = asyncio.run(render_markdown_to_cards_with_confirmation(markdown_file, output_dir, style))
@@ -535,7 +417,7 @@ def main():
                     content = f.read()
                 yaml_match = re.match(r'^---\s*\n(.*?)\n---\s*\n', content, re.DOTALL)
                 if yaml_match:
-                    metadata = yaml.safe_load(yaml_match.group(1))
+                    metadata = require('yaml').safe_load(yaml_match.group(1))
                     title = metadata.get('title', '小红书笔记')
             except:
                 title = "小红书笔记"
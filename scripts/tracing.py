@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+渲染流程分阶段计时与链路追踪
+在渲染、美化、发布流程中用 stage() / span() / traced 标记各阶段，
+未开启记录或追踪时开销几乎为零
+
+两种用法:
+    1. 阶段汇总（基准测试使用）
+        from tracing import StageRecorder, recording
+
+        with recording(StageRecorder()) as recorder:
+            asyncio.run(render_markdown_to_cards(...))
+        print(recorder.summary())
+
+    2. 链路追踪（命令行 --trace 使用）
+        from tracing import tracing_to
+
+        with tracing_to('trace.jsonl', fmt='jsonl'):
+            asyncio.run(render_markdown_to_cards(...))
+
+输出格式:
+    jsonl - 每行一个 span（结束时立即写出，适合长时间运行的任务）
+    otlp  - OpenTelemetry OTLP/JSON 格式（结束时一次性写出，可导入 Jaeger 等工具）
+"""
+
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional
+
+# 标准阶段名称
+STAGES = (
+    'parse',        # 解析 Markdown 文件 / YAML 头部
+    'html',         # Markdown 转换 + 生成卡片 HTML
+    'launch',       # 启动浏览器
+    'load',         # 加载页面（goto / set_content + networkidle）
+    'font_wait',    # 等待字体渲染
+    'measure',      # 测量内容高度 / 自动缩放
+    'screenshot',   # 截图（包含浏览器端 PNG 编码）
+    'write',        # 写出图片文件
+)
+
+TRACE_FORMATS = ('jsonl', 'otlp')
+
+_RECORDER: ContextVar[Optional['StageRecorder']] = ContextVar('xhs_stage_recorder', default=None)
+_CURRENT_SPAN: ContextVar[Optional['Span']] = ContextVar('xhs_current_span', default=None)
+
+# 追踪器为进程级全局对象，线程池中的任务同样可以上报
+_TRACER: Optional['Tracer'] = None
+
+
+class StageRecorder:
+    """累计各阶段耗时与调用次数"""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.totals[name] += seconds
+        self.counts[name] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """返回 {阶段: {"total_ms", "count"}}"""
+        return {
+            name: {
+                "total_ms": round(self.totals[name] * 1000, 3),
+                "count": self.counts[name]
+            }
+            for name in self.totals
+        }
+
+
+@contextmanager
+def recording(recorder: Optional[StageRecorder] = None) -> Iterator[StageRecorder]:
+    """在当前上下文（含其中创建的 asyncio 任务）中开启阶段记录"""
+    recorder = recorder or StageRecorder()
+    token = _RECORDER.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _RECORDER.reset(token)
+
+
+# ============ Span ============
+
+@dataclass
+class Span:
+    """一次计时区间，记录父子关系与属性"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_record(self) -> Dict[str, Any]:
+        """转换为 JSON 行记录"""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class JsonLinesExporter:
+    """每个 span 结束时写出一行 JSON"""
+
+    def __init__(self, out: IO[str]):
+        self.out = out
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_record(), ensure_ascii=False, default=str)
+        with self._lock:
+            self.out.write(line + '\n')
+            self.out.flush()
+
+    def close(self) -> None:
+        pass
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OTLPJsonExporter:
+    """收集 span，结束时按 OTLP/JSON（ExportTraceServiceRequest）格式写出"""
+
+    def __init__(self, out: IO[str], service_name: str):
+        self.out = out
+        self.service_name = service_name
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def _to_otlp(self, span: Span) -> Dict[str, Any]:
+        otlp = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+    def close(self) -> None:
+        with self._lock:
+            spans = [self._to_otlp(span) for span in self._spans]
+            self._spans = []
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "xhs.tracing"}, "spans": spans}],
+            }]
+        }
+        json.dump(payload, self.out, ensure_ascii=False)
+        self.out.write('\n')
+        self.out.flush()
+
+
+class Tracer:
+    """创建 span 并交给导出器"""
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def start(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _CURRENT_SPAN.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes),
+        )
+
+    def end(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        self.exporter.export(span)
+
+
+@contextmanager
+def tracing_to(path: str, fmt: str = 'jsonl', service_name: str = 'xhs') -> Iterator[Tracer]:
+    """开启链路追踪，输出到文件（'-' 表示标准错误输出）"""
+    global _TRACER
+    if fmt not in TRACE_FORMATS:
+        raise ValueError(f"不支持的追踪输出格式: {fmt}（可选: {', '.join(TRACE_FORMATS)}）")
+
+    if path == '-':
+        out, owned = sys.stderr, False
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        out, owned = open(path, 'a' if fmt == 'jsonl' else 'w', encoding='utf-8'), True
+
+    exporter = JsonLinesExporter(out) if fmt == 'jsonl' else OTLPJsonExporter(out, service_name)
+    previous, _TRACER = _TRACER, Tracer(exporter)
+    try:
+        yield _TRACER
+    finally:
+        _TRACER = previous
+        exporter.close()
+        if owned:
+            out.close()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """标记一个 span，未开启追踪时返回 None"""
+    tracer = _TRACER
+    if tracer is None:
+        yield None
+        return
+
+    current = tracer.start(name, attributes)
+    token = _CURRENT_SPAN.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        tracer.end(current)
+
+
+def set_attributes(**attributes) -> None:
+    """为当前 span 补充属性（未开启追踪时忽略）"""
+    current = _CURRENT_SPAN.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+@contextmanager
+def stage(name: str, **attributes) -> Iterator[None]:
+    """标记一个渲染阶段：同时计入 StageRecorder 与链路追踪，均未开启时直接执行"""
+    recorder = _RECORDER.get()
+    if recorder is None and _TRACER is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        with span(name, **attributes):
+            yield
+    finally:
+        if recorder is not None:
+            recorder.add(name, time.perf_counter() - start)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """函数装饰器：整个调用记为一个 span（支持同步与 async 函数）"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _TRACER is None:
+                    return await func(*args, **kwargs)
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _TRACER is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def add_trace_arguments(parser) -> None:
+    """为命令行添加 --trace / --trace-format 参数"""
+    parser.add_argument(
+        '--trace',
+        metavar='PATH',
+        default=None,
+        help='输出链路追踪数据到文件（- 表示标准错误输出）'
+    )
+    parser.add_argument(
+        '--trace-format',
+        choices=TRACE_FORMATS,
+        default='jsonl',
+        help='追踪输出格式：jsonl 或 otlp（OpenTelemetry JSON，默认: jsonl）'
+    )
+
+
+@contextmanager
+def tracing_from_args(args, service_name: str) -> Iterator[Optional[Tracer]]:
+    """根据命令行参数开启追踪，未指定 --trace 时不做任何事"""
+    if not getattr(args, 'trace', None):
+        yield None
+        return
+    with tracing_to(args.trace, args.trace_format, service_name) as tracer:
+        yield tracer
+    if args.trace != '-':
+        print(f"🧭 追踪数据已保存: {args.trace}")